@@ -1,5 +1,7 @@
 import streamlit as st
 
+from src import startup
+
 # Configuração da página
 st.set_page_config(
     page_title="Sistema Preditivo de Obesidade",
@@ -8,6 +10,10 @@ st.set_page_config(
     initial_sidebar_state="expanded"
 )
 
+# Importa as bibliotecas pesadas e carrega modelo e dados em segundo plano,
+# para que a primeira visita às páginas de Predição e Dashboard não espere por eles
+startup.start_warmup()
+
 # Título principal
 st.title("🏥 Sistema Preditivo de Obesidade")
 st.markdown("### Previsão de Risco Utilizando Machine Learning")
@@ -28,17 +34,23 @@ st.header("📊 Performance do Modelo")
 
 col1, col2, col3, col4 = st.columns(4)
 
+# Métricas do último treinamento (models/model_info.json, regravado pelo pipeline)
+try:
+    metrics = startup.model_info.get()['metrics']
+except Exception:
+    metrics = None
+
 with col1:
     st.metric(
         label="Acurácia",
-        value="93.2%",
+        value=f"{metrics['accuracy']:.1%}" if metrics else "—",
         delta="Alta precisão"
     )
 
 with col2:
     st.metric(
         label="AUC-ROC",
-        value="0.997",
+        value=f"{metrics['roc_auc']:.3f}" if metrics else "—",
         delta="Excelente"
     )
 
@@ -0,0 +1 @@
+"""Suíte de benchmarks de desempenho (inferência, ETL e agregações do dashboard)."""
@@ -0,0 +1,263 @@
+"""Benchmarks de desempenho em várias escalas do dataset processado.
+
+Cada escala N replica `data/processed/obesity_data_clean.csv` N vezes, grava o
+resultado em Parquet temporário e mede:
+
+    encode_form_single / predict_proba_single   uma linha do formulário (apenas na escala 1x)
+    encode_form_batch / predict_proba_batch     N x 2111 linhas do formulário (até FORM_MAX_SCALE)
+    load_data                                   leitura colunar das colunas do dashboard
+    filter_rows                                 filtro de gênero e faixa etária
+    cube_build / habit_matrix                   cubo de contagens e matriz dos heatmaps (crosstabs)
+    bitsets_build / scenarios                   índice de bitsets e cenários de risco padrão
+
+Os resultados (mediana e mínimo em segundos) são gravados em JSON e comparados
+com uma linha de base: um benchmark regride quando sua mediana excede a da
+linha de base pelo limite configurado. Com regressões, o processo termina com
+código 1.
+
+`create_input_dataframe` da página de Predição apenas repassa os argumentos a
+`encode_form`, que é medido diretamente (importar a página executaria o Streamlit).
+A inferência em lote (~30 mil linhas/s) fica limitada às escalas até
+`FORM_MAX_SCALE`: na escala 1000x seriam 2,1 milhões de linhas por repetição.
+Leitura, filtro e agregações rodam em todas as escalas.
+
+Uso:
+    python -m benchmarks.suite                                  # escalas 1, 10, 100 e 1000
+    python -m benchmarks.suite --scales 1 10 --save-baseline    # grava benchmarks/baseline.json
+    python -m benchmarks.suite --threshold 0.2 --threshold-for predict_proba_batch=0.5
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.cube import CountCube
+from src.data import DASHBOARD_COLUMNS, filter_rows, load_clean_data
+from src.etl import to_columnar
+from src.features import FREQUENCY_OPTIONS, GENDER_OPTIONS, TRANSPORT_OPTIONS, YES_NO_OPTIONS, encode_form
+from src.model import load_model_artifacts
+from src.scenarios import DEFAULT_SCENARIOS, BitsetIndex
+
+BENCHMARKS_DIR = Path(__file__).resolve().parent
+BASELINE_PATH = BENCHMARKS_DIR / "baseline.json"
+RESULTS_DIR = BENCHMARKS_DIR / "results"
+
+DEFAULT_SCALES = [1, 10, 100, 1000]
+# Maior escala dos benchmarks do formulário e de predição em lote
+FORM_MAX_SCALE = 10
+DEFAULT_THRESHOLD = 0.25
+
+# Filtro usado nos benchmarks do dashboard
+FILTER_GENDERS = [1]
+FILTER_AGE_RANGE = (20, 40)
+
+
+def sample_form(n_rows, seed=0):
+    """Entradas do formulário de Predição sorteadas nas faixas dos controles da página"""
+    rng = np.random.default_rng(seed)
+    return (
+        rng.choice(np.array(GENDER_OPTIONS, dtype=object), n_rows),
+        rng.integers(14, 62, n_rows).astype(np.float64),
+        rng.uniform(1.45, 1.98, n_rows),
+        rng.uniform(39.0, 173.0, n_rows),
+        rng.choice(np.array(YES_NO_OPTIONS, dtype=object), n_rows),
+        rng.choice(np.array(YES_NO_OPTIONS, dtype=object), n_rows),
+        rng.integers(0, 7, n_rows) / 2,
+        rng.integers(2, 9, n_rows) / 2,
+        rng.choice(np.array(FREQUENCY_OPTIONS, dtype=object), n_rows),
+        rng.choice(np.array(YES_NO_OPTIONS, dtype=object), n_rows),
+        rng.integers(0, 7, n_rows) / 2,
+        rng.choice(np.array(YES_NO_OPTIONS, dtype=object), n_rows),
+        rng.integers(0, 15, n_rows) / 2,
+        rng.integers(0, 25, n_rows) / 2,
+        rng.choice(np.array(FREQUENCY_OPTIONS, dtype=object), n_rows),
+        rng.choice(np.array(TRANSPORT_OPTIONS, dtype=object), n_rows),
+    )
+
+
+def measure(func, min_time=1.0, max_repeats=50):
+    """Executa `func` até somar `min_time` segundos (ao menos uma vez); devolve estatísticas"""
+    timings = []
+    while not timings or (sum(timings) < min_time and len(timings) < max_repeats):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return {
+        'median_s': statistics.median(timings),
+        'min_s': min(timings),
+        'repeats': len(timings),
+    }
+
+
+def write_scaled(base, scale, directory):
+    """Grava o dataset replicado `scale` vezes em Parquet; devolve o caminho"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    path = Path(directory) / f"obesity_{scale}x.parquet"
+    scaled = pd.concat([base] * scale, ignore_index=True)
+    pq.write_table(pa.Table.from_pandas(to_columnar(scaled), preserve_index=False), path)
+    return path
+
+
+def run_scale(scale, base, model, directory, min_time, max_repeats, form_max_scale=FORM_MAX_SCALE, log=print):
+    """Mede todos os benchmarks de uma escala; devolve {nome@escala: estatísticas}"""
+    results = {}
+
+    def record(name, func, rows):
+        stats = measure(func, min_time, max_repeats)
+        stats['rows'] = rows
+        results[f"{name}@{scale}x"] = stats
+        log(f"  {name:22}{rows:>12,} linhas  {stats['median_s'] * 1000:12.3f} ms  ({stats['repeats']}x)")
+
+    n_rows = len(base) * scale
+    if scale == 1:
+        single = sample_form(1)
+        record('encode_form_single', lambda: encode_form(*single), 1)
+        if model is not None:
+            features = encode_form(*single)
+            record('predict_proba_single', lambda: model.predict_proba(features), 1)
+
+    if scale <= form_max_scale:
+        form = sample_form(n_rows)
+        record('encode_form_batch', lambda: encode_form(*form), n_rows)
+        if model is not None:
+            features = encode_form(*form)
+            record('predict_proba_batch', lambda: model.predict_proba(features), n_rows)
+            del features
+        del form
+
+    parquet_path = write_scaled(base, scale, directory)
+    missing_csv = Path(directory) / "ausente.csv"
+    record('load_data', lambda: load_clean_data(DASHBOARD_COLUMNS, parquet_path, missing_csv), n_rows)
+    df = load_clean_data(DASHBOARD_COLUMNS, parquet_path, missing_csv)
+
+    record('filter_rows', lambda: filter_rows(df, FILTER_GENDERS, FILTER_AGE_RANGE), n_rows)
+
+    record('cube_build', lambda: CountCube(df), n_rows)
+    cube = CountCube(df)
+    record('habit_matrix', lambda: cube.select(FILTER_GENDERS, FILTER_AGE_RANGE).habit_matrix(), n_rows)
+
+    record('bitsets_build', lambda: BitsetIndex(df), n_rows)
+    bitsets = BitsetIndex(df)
+    clauses = [c for _, c in DEFAULT_SCENARIOS]
+    record('scenarios', lambda: bitsets.evaluate(clauses, bitsets.select(FILTER_GENDERS, FILTER_AGE_RANGE)), n_rows)
+
+    parquet_path.unlink()
+    return results
+
+
+def run(scales=DEFAULT_SCALES, min_time=1.0, max_repeats=50, form_max_scale=FORM_MAX_SCALE, log=print):
+    """Executa a suíte nas escalas pedidas; devolve o relatório (metadados + resultados)"""
+    base = load_clean_data()
+    try:
+        model, _ = load_model_artifacts()
+    except (OSError, ValueError) as e:
+        log(f"Modelo indisponível, benchmarks de predição ignorados: {e}")
+        model = None
+    if model is not None:
+        # Aquecimento: o que o modelo carrega sob demanda (ex.: o .joblib dos lotes grandes) fica fora das medidas
+        model.predict_proba(encode_form(*sample_form(len(base))))
+
+    report = {
+        'meta': {
+            'date': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'platform': platform.platform(),
+            'model': type(model).__name__ if model is not None else None,
+            'base_rows': len(base),
+        },
+        'results': {},
+    }
+    with tempfile.TemporaryDirectory() as directory:
+        for scale in scales:
+            log(f"Escala {scale}x ({len(base) * scale:,} linhas)")
+            report['results'].update(run_scale(scale, base, model, directory, min_time, max_repeats, form_max_scale, log))
+    return report
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD, thresholds=None):
+    """Compara medianas com a linha de base; devolve [(chave, atual, base, razão, regrediu)]"""
+    thresholds = thresholds or {}
+    rows = []
+    for key, stats in results.items():
+        if key not in baseline:
+            continue
+        name = key.split('@')[0]
+        ratio = stats['median_s'] / baseline[key]['median_s']
+        limit = thresholds.get(name, threshold)
+        rows.append((key, stats['median_s'], baseline[key]['median_s'], ratio, ratio > 1 + limit))
+    return rows
+
+
+def _parse_thresholds(items):
+    thresholds = {}
+    for item in items:
+        name, _, value = item.partition('=')
+        thresholds[name] = float(value)
+    return thresholds
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks de inferência, ETL e agregações do dashboard")
+    parser.add_argument("--scales", type=int, nargs='+', default=DEFAULT_SCALES, help="Múltiplos do dataset processado")
+    parser.add_argument("--min-time", type=float, default=1.0, help="Tempo mínimo medido por benchmark (s)")
+    parser.add_argument("--max-repeats", type=int, default=50, help="Máximo de repetições por benchmark")
+    parser.add_argument("--form-max-scale", type=int, default=FORM_MAX_SCALE,
+                        help="Maior escala dos benchmarks do formulário e de predição em lote")
+    parser.add_argument("--out", type=Path, help="JSON de resultados (padrão: benchmarks/results/bench-<data>.json)")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH, help="Linha de base para comparação")
+    parser.add_argument("--save-baseline", action="store_true", help="Grava os resultados como nova linha de base")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Aumento relativo máximo da mediana antes de acusar regressão (0.25 = 25%%)")
+    parser.add_argument("--threshold-for", action="append", default=[], metavar="NOME=LIMITE",
+                        help="Limite específico de um benchmark (repetível)")
+    args = parser.parse_args()
+
+    report = run(args.scales, args.min_time, args.max_repeats, args.form_max_scale)
+
+    out = args.out or RESULTS_DIR / f"bench-{datetime.now():%Y%m%d-%H%M%S}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    with open(out, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"Resultados gravados em {out}")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"Linha de base gravada em {args.baseline}")
+        return
+
+    if not args.baseline.exists():
+        print("Sem linha de base para comparar (use --save-baseline)")
+        return
+
+    with open(args.baseline, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)['results']
+    rows = compare(report['results'], baseline, args.threshold, _parse_thresholds(args.threshold_for))
+
+    print(f"{'benchmark':32}{'atual (ms)':>14}{'base (ms)':>14}{'razão':>9}")
+    for key, current, base, ratio, regressed in rows:
+        flag = "  REGRESSÃO" if regressed else ""
+        print(f"{key:32}{current * 1000:14.3f}{base * 1000:14.3f}{ratio:9.2f}{flag}")
+
+    regressions = [row for row in rows if row[-1]]
+    if regressions:
+        print(f"{len(regressions)} regressão(ões) acima do limite")
+        sys.exit(1)
+    print("Nenhuma regressão acima do limite")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,13 @@
 import streamlit as st
-import pandas as pd
-import numpy as np
-import joblib
-import json
+import tempfile
 from pathlib import Path
 
+from src import audit, startup, telemetry
+from src.config import AUDIT_DB_PATH
+
+# pandas, plotly, o modelo e as explicações são importados nas funções que os usam: o aquecimento
+# em segundo plano começa antes deles e o primeiro render não espera essas importações
+
 # Configuração da página
 st.set_page_config(
     page_title="Predição de Obesidade",
@@ -12,101 +15,288 @@ st.set_page_config(
     layout="wide"
 )
 
-# Cache do modelo
-@st.cache_resource
+# Aquecimento em segundo plano (sem efeito se já iniciado por outra página)
+startup.start_warmup()
+
 def load_model():
-    """Carrega o modelo treinado"""
-    model_path = Path("models/obesity_risk_model_random_forest.joblib")
-    model = joblib.load(model_path)
+    """Carrega o modelo treinado (compartilhado entre sessões e recarregado quando o artefato muda)"""
+    version = startup.model.version()
+    with telemetry.span('predição.carga_modelo'):
+        model, model_info = startup.model.get(version)
+    return model, model_info, version
+
+# Rótulos das features nas explicações
+FEATURE_LABELS = {
+    'age': 'Idade',
+    'bmi': 'IMC',
+    'gender': 'Gênero',
+    'family_history_overweight': 'Histórico familiar',
+    'frequent_high_caloric_food': 'Alimentos calóricos',
+    'vegetable_consumption_freq': 'Consumo de vegetais',
+    'main_meals_per_day': 'Refeições principais',
+    'food_between_meals': 'Comer entre refeições',
+    'smoker': 'Fumante',
+    'water_intake': 'Consumo de água',
+    'calorie_monitoring': 'Monitora calorias',
+    'physical_activity_freq': 'Atividade física',
+    'technology_use_time': 'Tempo de telas',
+    'alcohol_consumption': 'Álcool',
+    'transportation_mode': 'Transporte',
+}
+
+def load_explainer(version):
+    """Explicador TreeSHAP do modelo (compartilhado entre sessões, montado no aquecimento)"""
+    with telemetry.span('predição.carga_explicador'):
+        return startup.explainer.get(version)
+
+def render_explanation(input_df, version, predicted_index, predicted_class):
+    """Contribuição de cada feature para a probabilidade da classe prevista (TreeSHAP)"""
+    import pandas as pd
+    from src.explain import explain_cached
+    
+    st.subheader("🔎 O que mais pesou na classificação")
+    try:
+        explainer = load_explainer(version)
+        with telemetry.span('predição.explicação'):
+            values = explain_cached(explainer, input_df, version)
+    except Exception as e:
+        st.caption(f"Explicação indisponível: {str(e)}")
+        return
+    
+    attributions = explainer.attributions(values, predicted_index)
+    top = attributions.reindex(attributions.abs().sort_values(ascending=False).index)[:8]
+    chart = pd.DataFrame({
+        'Feature': [FEATURE_LABELS.get(c, c) for c in top.index],
+        'Contribuição (p.p.)': top.to_numpy() * 100
+    })
+    st.bar_chart(chart.set_index('Feature'))
+    st.caption(
+        f"Pontos percentuais somados (positivos) ou subtraídos (negativos) da probabilidade de "
+        f"**{predicted_class}** em relação à média do modelo, pelo algoritmo TreeSHAP."
+    )
+
+def sweep_cached(model, version, inputs, x, y):
+    """Grade what-if avaliada em uma chamada a predict_proba, guardada no cache de predições"""
+    from src.model import cached
+    from src.whatif import sweep
     
-    # Carregar informações do modelo
-    info_path = Path("models/model_info.json")
-    with open(info_path, 'r', encoding='utf-8') as f:
-        model_info = json.load(f)
+    def compute():
+        with telemetry.span('predição.whatif'):
+            return sweep(model, inputs, x, y)
     
-    return model, model_info
+    return cached(version, ('whatif', tuple(sorted(inputs.items())), x, y), compute)
 
-def calculate_bmi(weight, height):
-    """Calcula o IMC"""
-    return weight / (height ** 2)
+def render_whatif(model, version, inputs):
+    """Curvas de probabilidade com uma ou duas entradas variando (atualizadas a cada alteração do formulário)"""
+    import numpy as np
+    import pandas as pd
+    import plotly.express as px
+    from src.whatif import SWEEPS, is_numeric
+    
+    st.header("🔀 Simulação What-if")
+    st.write(
+        "Veja como a classificação muda quando uma ou duas entradas variam e as demais "
+        "ficam como no formulário acima. Toda a grade é avaliada de uma só vez."
+    )
+    
+    names = list(SWEEPS)
+    col1, col2 = st.columns(2)
+    with col1:
+        x = st.selectbox("Variar", names, format_func=lambda n: SWEEPS[n][0])
+    with col2:
+        y = st.selectbox(
+            "E também (opcional)", [None] + [n for n in names if n != x],
+            format_func=lambda n: "Nenhuma" if n is None else SWEEPS[n][0]
+        )
+    
+    try:
+        probabilities, x_values, y_values = sweep_cached(model, version, inputs, x, y)
+    except Exception as e:
+        st.error(f"Erro na simulação: {str(e)}")
+        return
+    
+    class_labels = list(model.classes_)
+    x_label = SWEEPS[x][0]
+    
+    if y is None:
+        # Uma entrada: probabilidade de cada classe ao longo da grade
+        curves = pd.DataFrame(probabilities, columns=class_labels)
+        curves[x_label] = x_values
+        curves = curves.melt(id_vars=x_label, var_name='Classe', value_name='Probabilidade')
+        if is_numeric(x):
+            fig = px.line(curves, x=x_label, y='Probabilidade', color='Classe', markers=True)
+            fig.add_vline(x=inputs[x], line_dash='dash', line_color='gray', annotation_text='Atual')
+        else:
+            fig = px.bar(curves, x=x_label, y='Probabilidade', color='Classe', barmode='group')
+        fig.update_layout(yaxis_tickformat='.0%', height=450, hovermode='x unified')
+        st.plotly_chart(fig, use_container_width=True)
+        
+        predicted = pd.Series(np.asarray(class_labels)[probabilities.argmax(axis=1)], index=x_values)
+        changes = predicted[predicted.ne(predicted.shift())]
+        st.caption("**Classe prevista ao longo da grade:** " + " → ".join(
+            f"{label} (a partir de {value:g})" if is_numeric(x) else f"{label} ({value})"
+            for value, label in changes.items()
+        ))
+    else:
+        # Duas entradas: probabilidade de uma classe em cada ponto da grade
+        # Padrão: a classe com maior probabilidade média na grade
+        dominant = int(probabilities.reshape(-1, len(class_labels)).mean(axis=0).argmax())
+        target = st.selectbox("Classe exibida", class_labels, index=dominant)
+        fig = px.imshow(
+            probabilities[:, :, class_labels.index(target)],
+            x=[str(v) for v in x_values], y=[str(v) for v in y_values],
+            labels={'x': x_label, 'y': SWEEPS[y][0], 'color': 'Probabilidade'},
+            color_continuous_scale='RdYlGn_r', zmin=0, zmax=1, origin='lower', aspect='auto'
+        )
+        fig.update_layout(height=500)
+        st.plotly_chart(fig, use_container_width=True)
+        st.caption(f"Probabilidade de **{target}** em {probabilities.shape[0] * probabilities.shape[1]} combinações.")
+
+def render_counterfactual(model, version, inputs):
+    """Menor conjunto de mudanças de hábitos que reduz a classe prevista (busca contrafactual)"""
+    from src.counterfactual import search as search_counterfactual
+    from src.model import cached
+    
+    def compute():
+        with telemetry.span('predição.contrafactual'):
+            return search_counterfactual(model, inputs)
+    
+    try:
+        report = cached(version, ('counterfactual', tuple(sorted(inputs.items()))), compute)
+    except Exception as e:
+        st.caption(f"Sugestões personalizadas indisponíveis: {str(e)}")
+        return
+    
+    if not report['solutions']:
+        st.info(
+            "Nenhuma combinação de até 3 mudanças de hábitos reduz a classificação prevista; "
+            "siga as recomendações gerais abaixo e procure acompanhamento profissional."
+        )
+    else:
+        st.markdown("**🎯 Menores mudanças de hábitos que reduzem a classificação prevista:**")
+        for i, solution in enumerate(report['solutions'], 1):
+            changes = "; ".join(
+                f"{label}: de *{before}* para **{after}**" for label, before, after in solution['changes']
+            )
+            st.markdown(
+                f"{i}. {changes} → **{solution['predicted_class']}** "
+                f"({solution['probability']:.0%})"
+            )
+    st.caption(
+        f"{report['evaluated']} combinações avaliadas em {report['calls']} chamadas ao modelo "
+        f"({report['elapsed_ms']:.0f} ms). Simulação do modelo, não substitui orientação profissional."
+    )
 
 def create_input_dataframe(gender, age, height, weight, family_history, favc, fcvc, ncp, caec, smoke, ch2o, scc, faf, tue, calc, mtrans):
-    """Cria dataframe com os dados de entrada"""
-    
-    # Calcular IMC
-    bmi = calculate_bmi(weight, height)
-    
-    # Mapear valores para o formato esperado pelo modelo
-    # Gênero: 0 = Feminino, 1 = Masculino
-    gender_val = 1 if gender == 'Masculino' else 0
-    
-    # Número de refeições
-    meals_map = {1.0: 'one_meal', 1.5: 'one_meal', 2.0: 'two_meals', 2.5: 'two_meals', 
-                 3.0: 'three_meals', 3.5: 'three_meals', 4.0: 'more_than_three'}
-    main_meals = meals_map.get(ncp, 'three_meals')
-    
-    # Consumo de vegetais
-    veg_map = {0.0: 'never', 0.5: 'never', 1.0: 'sometimes', 1.5: 'sometimes', 
-               2.0: 'sometimes', 2.5: 'always', 3.0: 'always'}
-    veg_consumption = veg_map.get(fcvc, 'sometimes')
-    
-    # Consumo de água
-    water_map = {0.0: 'low_consumption', 0.5: 'low_consumption', 1.0: 'low_consumption',
-                 1.5: 'adequate_consumption', 2.0: 'adequate_consumption', 2.5: 'high_consumption', 3.0: 'high_consumption'}
-    water_intake = water_map.get(ch2o, 'adequate_consumption')
-    
-    # Comida entre refeições
-    food_between_map = {'Não': 'no', 'Às vezes': 'Sometimes', 'Frequentemente': 'Frequently', 'Sempre': 'Always'}
-    food_between = food_between_map.get(caec, 'Sometimes')
-    
-    # Atividade física
-    activity_map = {0.0: 'sedentary', 0.5: 'sedentary', 1.0: 'low_frequency', 1.5: 'low_frequency',
-                    2.0: 'moderate_frequency', 2.5: 'moderate_frequency', 3.0: 'high_frequency',
-                    3.5: 'high_frequency', 4.0: 'high_frequency', 4.5: 'high_frequency',
-                    5.0: 'high_frequency', 5.5: 'high_frequency', 6.0: 'high_frequency',
-                    6.5: 'high_frequency', 7.0: 'high_frequency'}
-    physical_activity = activity_map.get(faf, 'low_frequency')
-    
-    # Tempo de tecnologia
-    tech_map = {0.0: 'low_use', 0.5: 'low_use', 1.0: 'low_use', 1.5: 'low_use',
-                2.0: 'moderate_use', 2.5: 'moderate_use', 3.0: 'moderate_use', 3.5: 'moderate_use',
-                4.0: 'moderate_use', 4.5: 'high_use', 5.0: 'high_use', 5.5: 'high_use',
-                6.0: 'high_use', 6.5: 'high_use', 7.0: 'high_use', 7.5: 'high_use',
-                8.0: 'high_use', 8.5: 'high_use', 9.0: 'high_use', 9.5: 'high_use',
-                10.0: 'high_use', 10.5: 'high_use', 11.0: 'high_use', 11.5: 'high_use', 12.0: 'high_use'}
-    tech_use = tech_map.get(tue, 'moderate_use')
-    
-    # Álcool
-    alcohol_map = {'Não': 'no', 'Às vezes': 'Sometimes', 'Frequentemente': 'Frequently', 'Sempre': 'Always'}
-    alcohol = alcohol_map.get(calc, 'no')
-    
-    # Transporte
-    transport_map = {'Caminhando': 'Walking', 'Bicicleta': 'Bike', 'Motocicleta': 'Motorbike',
-                     'Transporte Público': 'Public_Transportation', 'Automóvel': 'Automobile'}
-    transportation = transport_map.get(mtrans, 'Public_Transportation')
-    
-    # Criar dicionário com as features no formato correto
-    data = {
-        'age': [age],
-        'height': [height],
-        'weight': [weight],
-        'gender': [gender_val],
-        'main_meals_per_day': [main_meals],
-        'vegetable_consumption_freq': [veg_consumption],
-        'water_intake': [water_intake],
-        'frequent_high_caloric_food': [1 if favc == 'Sim' else 0],
-        'food_between_meals': [food_between],
-        'physical_activity_freq': [physical_activity],
-        'technology_use_time': [tech_use],
-        'smoker': [1 if smoke == 'Sim' else 0],
-        'calorie_monitoring': [1 if scc == 'Sim' else 0],
-        'alcohol_consumption': [alcohol],
-        'family_history_overweight': [1 if family_history == 'Sim' else 0],
-        'transportation_mode': [transportation],
-        'bmi': [bmi]
-    }
+    """Cria dataframe com os dados de entrada (aceita escalares ou arrays)"""
+    from src.features import encode_form
+    return encode_form(
+        gender, age, height, weight, family_history, favc, fcvc, ncp,
+        caec, smoke, ch2o, scc, faf, tue, calc, mtrans
+    )
+
+def render_history():
+    """Últimas predições do registro de auditoria"""
+    import pandas as pd
     
-    return pd.DataFrame(data)
+    with st.expander("🗂️ Histórico de predições (auditoria)"):
+        try:
+            with telemetry.span('predição.histórico'):
+                history = audit.recent(20)
+                total = audit.count()
+        except Exception as e:
+            st.caption(f"Histórico indisponível: {str(e)}")
+            return
+        
+        if history.empty:
+            st.caption("Nenhuma predição registrada ainda.")
+            return
+        
+        inputs = pd.DataFrame(list(history['inputs']))
+        st.dataframe(pd.DataFrame({
+            'Data': history['created_at'].str.replace('T', ' ').str[:19],
+            'Classe': history['predicted_class'],
+            'Probabilidade': history['probability'].map(lambda p: f"{p:.1%}"),
+            'Gênero': inputs.get('gender'),
+            'Idade': inputs.get('age'),
+            'Altura (m)': inputs.get('height'),
+            'Peso (kg)': inputs.get('weight'),
+            'Versão do modelo': history['model_version'],
+        }), use_container_width=True, hide_index=True)
+        
+        stats = audit.log.stats() if audit.log is not None else None
+        st.caption(
+            f"{total:,} predições registradas em `{AUDIT_DB_PATH.name}`, gravadas em segundo plano"
+            + (f" • {stats['queued']} na fila • {stats['dropped']} descartadas" if stats else "")
+        )
+
+def render_batch_scoring(model, version):
+    """Predição em lote a partir de um CSV no formato de Base/Obesity.csv"""
+    import pandas as pd
+    from src.features import RAW_COLUMNS
+    from src.config import EXPLAIN_WORKERS
+    from src.explain import shared_explanation_pool
+    from src.scoring import score_csv
+    
+    st.header("📂 Predição em Lote")
+    st.write(
+        "Envie um arquivo CSV com as colunas do formato original "
+        f"(`{', '.join(RAW_COLUMNS)}`). O arquivo é processado em blocos "
+        "e o resultado pode ser baixado ao final."
+    )
+    
+    uploaded = st.file_uploader("Arquivo CSV de pacientes", type=["csv"])
+    explain = st.checkbox(
+        "Incluir explicações (TreeSHAP) da classe prevista",
+        help="Adiciona uma coluna shap_<feature> por feature. Bem mais lento que a predição: "
+             f"as linhas são explicadas em paralelo por {EXPLAIN_WORKERS} processo(s)."
+    )
+    if uploaded is None:
+        return
+    
+    # Evita reprocessar o mesmo arquivo a cada rerun (ex.: clique no download)
+    upload_key = (uploaded.name, uploaded.size, explain)
+    batch_result = st.session_state.get("batch_result")
+    
+    if batch_result is None or batch_result["key"] != upload_key:
+        status = st.empty()
+        
+        def report(rows):
+            status.info(f"⏳ {rows:,} linhas processadas...")
+        
+        try:
+            output = tempfile.NamedTemporaryFile(
+                mode="w", suffix=".csv", prefix="predicoes_", delete=False, encoding="utf-8", newline=""
+            )
+            explainer = load_explainer(version) if explain else None
+            pool = shared_explanation_pool(explainer) if explain else None
+            with output, telemetry.span('predição.lote'):
+                total = score_csv(uploaded, model, output, progress=report, explainer=explainer, pool=pool)
+        except Exception as e:
+            Path(output.name).unlink(missing_ok=True)
+            status.empty()
+            st.error(f"Erro ao processar arquivo: {str(e)}")
+            return
+        
+        status.empty()
+        if batch_result is not None:
+            Path(batch_result["path"]).unlink(missing_ok=True)
+        batch_result = {"key": upload_key, "path": output.name, "rows": total}
+        st.session_state["batch_result"] = batch_result
+    
+    st.success(f"✅ {batch_result['rows']:,} pacientes classificados")
+    
+    with open(batch_result["path"], "rb") as f:
+        st.download_button(
+            "⬇️ Baixar resultados (CSV)",
+            data=f,
+            file_name=f"predicoes_{Path(uploaded.name).stem}.csv",
+            mime="text/csv",
+            use_container_width=True
+        )
+    
+    # Prévia com as primeiras linhas, sem carregar o arquivo inteiro
+    st.dataframe(pd.read_csv(batch_result["path"], nrows=20), use_container_width=True, hide_index=True)
 
 def main():
     st.title("🔍 Predição de Obesidade")
@@ -114,36 +304,55 @@ def main():
     
     st.divider()
     
+    import pandas as pd
+    from src import drift
+    from src.features import FREQUENCY_OPTIONS, GENDER_OPTIONS, OBESITY_LEVELS, TRANSPORT_OPTIONS, calculate_bmi
+    from src.inference import PooledModel
+    from src.model import prediction_cache, predict_proba_cached, top_class
+    
+    # Verificações periódicas de drift das predições servidas (uma thread por processo)
+    drift.monitor.start()
+    
     # Sidebar com informações do modelo
     with st.sidebar:
         st.header("ℹ️ Informações do Modelo")
         
         try:
-            model, model_info = load_model()
+            model, model_info, version = load_model()
             
             st.metric("Acurácia", f"{model_info['metrics']['accuracy']:.1%}")
             st.metric("AUC-ROC", f"{model_info['metrics']['roc_auc']:.3f}")
             st.metric("Algoritmo", "Random Forest")
             
+            cache_stats = prediction_cache.stats()
+            st.caption(
+                f"**Cache de predições:** {cache_stats['hits']} acertos • "
+                f"{cache_stats['misses']} falhas • {cache_stats['size']}/{cache_stats['maxsize']} entradas"
+            )
+            if isinstance(model, PooledModel):
+                pool_stats = model.stats()
+                st.caption(
+                    f"**Pool de inferência:** {pool_stats['workers']} processos • {pool_stats['calls']} chamadas • "
+                    f"{pool_stats['timeouts']} prazos estourados • {pool_stats['restarts']} reinícios"
+                )
+            
             st.divider()
             
             st.caption("**Classes de Obesidade:**")
-            class_labels = [
-                'Insufficient_Weight',
-                'Normal_Weight',
-                'Overweight_Level_I',
-                'Overweight_Level_II',
-                'Obesity_Type_I',
-                'Obesity_Type_II',
-                'Obesity_Type_III'
-            ]
-            for i, label in enumerate(class_labels, 1):
+            for i, label in enumerate(OBESITY_LEVELS, 1):
                 st.caption(f"{i}. {label}")
                 
         except Exception as e:
             st.error(f"Erro ao carregar modelo: {str(e)}")
             return
     
+    # Modo de predição
+    mode = st.radio("Modo de predição", ["Individual", "Lote (CSV)"], horizontal=True)
+    
+    if mode == "Lote (CSV)":
+        render_batch_scoring(model, version)
+        return
+    
     # Formulário de entrada
     st.header("📝 Dados do Paciente")
     
@@ -152,7 +361,7 @@ def main():
     col1, col2, col3 = st.columns(3)
     
     with col1:
-        gender = st.selectbox("Gênero", ["Masculino", "Feminino"])
+        gender = st.selectbox("Gênero", GENDER_OPTIONS)
         age = st.number_input("Idade", min_value=1, max_value=120, value=25)
     
     with col2:
@@ -176,13 +385,11 @@ def main():
     
     with col2:
         ncp = st.slider("Número de refeições principais (1-4)", 1.0, 4.0, 3.0, 0.5)
-        caec = st.selectbox("Consumo de alimentos entre refeições", 
-                           ["Não", "Às vezes", "Frequentemente", "Sempre"])
+        caec = st.selectbox("Consumo de alimentos entre refeições", FREQUENCY_OPTIONS)
     
     with col3:
         ch2o = st.slider("Consumo diário de água (litros)", 0.0, 3.0, 2.0, 0.5)
-        calc = st.selectbox("Consumo de álcool", 
-                           ["Não", "Às vezes", "Frequentemente", "Sempre"])
+        calc = st.selectbox("Consumo de álcool", FREQUENCY_OPTIONS)
     
     st.divider()
     
@@ -199,45 +406,57 @@ def main():
         tue = st.slider("Tempo usando dispositivos eletrônicos (horas/dia)", 0.0, 12.0, 4.0, 0.5)
     
     with col3:
-        mtrans = st.selectbox("Meio de transporte principal", 
-                             ["Caminhando", "Bicicleta", "Motocicleta", "Transporte Público", "Automóvel"])
+        mtrans = st.selectbox("Meio de transporte principal", TRANSPORT_OPTIONS)
     
     st.divider()
     
+    # Valores atuais do formulário (argumentos de encode_form)
+    inputs = {
+        'gender': gender, 'age': age, 'height': height, 'weight': weight,
+        'family_history': family_history, 'favc': favc, 'fcvc': fcvc, 'ncp': ncp,
+        'caec': caec, 'smoke': smoke, 'ch2o': ch2o, 'scc': scc, 'faf': faf,
+        'tue': tue, 'calc': calc, 'mtrans': mtrans
+    }
+    
     # Botão de predição
     if st.button("🎯 Realizar Predição", type="primary", use_container_width=True):
         try:
             # Criar dataframe com os dados
-            input_df = create_input_dataframe(
-                gender, age, height, weight, family_history, favc, fcvc, ncp,
-                caec, smoke, ch2o, scc, faf, tue, calc, mtrans
-            )
+            with telemetry.span('predição.features'):
+                input_df = create_input_dataframe(
+                    gender, age, height, weight, family_history, favc, fcvc, ncp,
+                    caec, smoke, ch2o, scc, faf, tue, calc, mtrans
+                )
             
-            # Fazer predição
-            prediction = model.predict(input_df)[0]
-            probabilities = model.predict_proba(input_df)[0]
+            # Fazer predição (uma única passagem pela floresta, com cache entre sessões)
+            with telemetry.span('predição.predição'):
+                probabilities = predict_proba_cached(model, input_df, version)
             
             # Usar as classes na ordem do modelo
             class_labels = list(model.classes_)
+            predicted_class, predicted_index = top_class(model, probabilities)
+            drift.monitor.observe(input_df, [predicted_class])
             
-            # Usar o retorno direto do modelo
-            if isinstance(prediction, str):
-                predicted_class = prediction
-                predicted_index = class_labels.index(prediction)
-            else:
-                predicted_index = int(prediction)
-                predicted_class = class_labels[predicted_index]
+            # Registro de auditoria, gravado em segundo plano fora do caminho da requisição
+            if audit.log is not None:
+                audit.log.record(inputs, predicted_class, dict(zip(class_labels, probabilities)), version)
             
             st.divider()
             
             # Resultado da predição
             st.header("📊 Resultado da Predição")
             
+            # Gravidade clínica pela ordem de OBESITY_LEVELS (model.classes_ está em ordem alfabética):
+            # a mesma faixa define a cor, as recomendações e as sugestões personalizadas
+            severity = OBESITY_LEVELS.index(predicted_class)
+            healthy = OBESITY_LEVELS.index('Normal_Weight')
+            obese = OBESITY_LEVELS.index('Obesity_Type_I')
+            
             # Definir cor baseado na classe
-            if predicted_index <= 1:
+            if severity == healthy:
                 result_type = "success"
                 icon = "✅"
-            elif predicted_index <= 3:
+            elif severity < obese:
                 result_type = "warning"
                 icon = "⚠️"
             else:
@@ -264,7 +483,8 @@ def main():
                 'Probabilidade': probabilities
             }).sort_values('Probabilidade', ascending=False)
             
-            st.bar_chart(prob_df.set_index('Classe'))
+            with telemetry.span('predição.gráfico'):
+                st.bar_chart(prob_df.set_index('Classe'))
             
             # Tabela de probabilidades
             prob_df['Probabilidade'] = prob_df['Probabilidade'].apply(lambda x: f"{x:.2%}")
@@ -272,17 +492,34 @@ def main():
             
             st.divider()
             
+            # Explicação (TreeSHAP, em cache junto da predição)
+            render_explanation(input_df, version, predicted_index, predicted_class)
+            
+            st.divider()
+            
             # Recomendações
             st.subheader("💡 Recomendações")
             
-            if predicted_index <= 1:
+            # Sugestões personalizadas acima do peso normal
+            if severity > healthy:
+                render_counterfactual(model, version, inputs)
+            
+            if severity < healthy:
+                st.warning("""
+                **Atenção!** Você está na faixa de peso insuficiente.
+                - Consulte um nutricionista para orientação alimentar
+                - Inclua refeições e lanches nutritivos ao longo do dia
+                - Investigue com um médico possíveis causas da perda de peso
+                - Monitore seu peso regularmente
+                """)
+            elif severity == healthy:
                 st.success("""
                 **Parabéns!** Você está na faixa de peso saudável.
                 - Continue mantendo seus hábitos alimentares equilibrados
                 - Mantenha a prática regular de atividades físicas
                 - Faça check-ups médicos periódicos
                 """)
-            elif predicted_index <= 3:
+            elif severity < obese:
                 st.warning("""
                 **Atenção!** Você está na faixa de sobrepeso.
                 - Consulte um nutricionista para orientação alimentar
@@ -305,6 +542,13 @@ def main():
             
         except Exception as e:
             st.error(f"Erro ao fazer predição: {str(e)}")
+    
+    st.divider()
+    
+    # Simulação what-if com os valores atuais do formulário
+    render_whatif(model, version, inputs)
+    
+    render_history()
 
 if __name__ == "__main__":
     main()
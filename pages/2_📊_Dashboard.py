@@ -1,9 +1,14 @@
+import json
+import time
+
 import streamlit as st
-import pandas as pd
-import numpy as np
-import plotly.express as px
-import plotly.graph_objects as go
-from pathlib import Path
+
+from src import startup, telemetry
+from src.cache import LRUCache
+from src.config import DASHBOARD_BACKEND, FIGURE_CACHE_SIZE, FIGURE_CACHE_TTL, SCATTER_MAX_POINTS, SQL_DB_PATH
+
+# pandas, plotly e os módulos de dados são importados nas funções que os usam: o aquecimento em
+# segundo plano começa antes deles e o primeiro render não espera essas importações
 
 # Configuração da página
 st.set_page_config(
@@ -12,13 +17,499 @@ st.set_page_config(
     layout="wide"
 )
 
-# Cache dos dados
-@st.cache_data
-def load_data():
-    """Carrega os dados processados"""
-    data_path = Path("data/processed/obesity_data_clean.csv")
-    df = pd.read_csv(data_path)
-    return df
+# Aquecimento em segundo plano (sem efeito se já iniciado por outra página)
+startup.start_warmup()
+
+# Com DASHBOARD_BACKEND=sql, KPIs, tabelas e cenários são agregados no banco SQLite e o dataset
+# nunca é carregado; a versão passa a ser a do banco.
+SQL_BACKEND = DASHBOARD_BACKEND == 'sql'
+
+def current_version():
+    """Versão dos dados consultados (arquivo processado ou banco SQL)"""
+    return startup.sql_store.version() if SQL_BACKEND else startup.dataset.version()
+
+# Dados e estruturas derivadas (por versão do arquivo processado) vêm do registro de recursos
+# do processo: compartilhados entre sessões, sem cópia a cada rerun, e nunca modificados pela página.
+def load_data(version):
+    """Dados processados com tipos compactos"""
+    return startup.dataset.get(version)
+
+def load_cube(version):
+    """Cubo de contagens pré-agregadas (ou o banco SQL, que responde às mesmas seleções)"""
+    return startup.sql_store.get(version) if SQL_BACKEND else startup.cube.get(version)
+
+def load_bitsets(version):
+    """Bitsets por predicado dos cenários de risco"""
+    return startup.bitsets.get(version)
+
+def load_jitter(version):
+    """Jitter fixo por paciente do gráfico de dispersão"""
+    return startup.jitter.get(version)
+
+@st.cache_data(max_entries=64)
+def habit_matrix(version, genders, age_range):
+    """% de cada categoria de cada hábito por nível de obesidade, para o filtro atual"""
+    return load_cube(version).select(genders, age_range).habit_matrix()
+
+# Linhas de cada heatmap: (hábito, prefixo do rótulo); categorias na ordem do cubo
+FOOD_HABITS = [
+    ('vegetable_consumption_freq', 'Vegetais'),
+    ('water_intake', 'Água'),
+    ('main_meals_per_day', 'Refeições'),
+    ('food_between_meals', 'Lanches'),
+]
+LIFESTYLE_HABITS = [
+    ('physical_activity_freq', 'Atividade Física'),
+    ('technology_use_time', 'Tempo de Tela'),
+    ('transportation_mode', 'Transporte'),
+    ('frequent_high_caloric_food', 'Alimentos Calóricos'),
+]
+YES_NO_LABELS = {0: 'Não', 1: 'Sim'}
+
+ACTIVITY_COLORS = {
+    'sedentary': '#d62728',
+    'low_frequency': '#ff7f0e',
+    'moderate_frequency': '#2ca02c',
+    'high_frequency': '#1f77b4'
+}
+
+def category_label(cat):
+    return YES_NO_LABELS.get(cat) or str(cat).replace('_', ' ').title()
+
+def habit_heatmap(habits, specs):
+    """Seleciona as colunas dos hábitos pedidos na matriz única; devolve (z, rótulos)"""
+    columns = [(habit, cat) for habit, _ in specs for h, cat in habits.columns if h == habit]
+    prefixes = dict(specs)
+    labels = [f"{prefixes[habit]}: {category_label(cat)}" for habit, cat in columns]
+    return habits[columns].to_numpy().T, labels
+
+SCENARIO_LABELS = {
+    'family_history_overweight': 'Histórico Familiar',
+    'vegetable_consumption_freq': 'Vegetais',
+    'water_intake': 'Água',
+    'main_meals_per_day': 'Refeições',
+    'food_between_meals': 'Lanches',
+    'physical_activity_freq': 'Atividade Física',
+    'technology_use_time': 'Tempo de Tela',
+    'transportation_mode': 'Transporte',
+    'frequent_high_caloric_food': 'Alimentos Calóricos',
+}
+
+def describe_clauses(clauses):
+    """Texto legível de um cenário, ex.: (Água: Low Consumption e Refeições: One Meal) OU (...)"""
+    groups = [
+        " e ".join(f"{SCENARIO_LABELS[c]}: {'/'.join(category_label(v) for v in values)}" for c, values in clause.items())
+        for clause in clauses
+    ]
+    return " OU ".join(f"({g})" for g in groups)
+
+def render_scenario_builder():
+    """Editor de cenários: cada grupo é um E de predicados; os grupos de um cenário combinam-se por OU"""
+    from src.cube import categories_of
+    from src.scenarios import SCENARIO_COLUMNS
+    
+    draft = st.session_state.setdefault('scenario_draft', [])
+    custom = st.session_state.setdefault('custom_scenarios', [])
+    
+    with st.expander("➕ Criar cenário personalizado"):
+        st.caption("Valores de um mesmo fator combinam-se por **OU**; fatores de um grupo, por **E**; "
+                   "grupos de um cenário, por **OU**.")
+        
+        with st.form("scenario_group", clear_on_submit=True):
+            clause = {}
+            for column in SCENARIO_COLUMNS:
+                values = st.multiselect(
+                    SCENARIO_LABELS[column],
+                    options=categories_of(column),
+                    format_func=category_label,
+                    key=f"scenario_{column}"
+                )
+                if values:
+                    clause[column] = values
+            if st.form_submit_button("Adicionar grupo (E)") and clause:
+                draft.append(clause)
+        
+        if draft:
+            st.markdown(f"**Cenário em edição:** {describe_clauses(draft)}")
+            name = st.text_input("Nome do cenário", value=f"Cenário {len(custom) + 1}")
+            col_save, col_discard = st.columns(2)
+            if col_save.button("Salvar cenário", type="primary"):
+                custom.append((name, list(draft)))
+                draft.clear()
+                st.rerun()
+            if col_discard.button("Descartar grupos"):
+                draft.clear()
+                st.rerun()
+        
+        for label, clauses in custom:
+            st.markdown(f"- **{label}:** {describe_clauses(clauses)}")
+        if custom and st.button("Remover cenários personalizados"):
+            custom.clear()
+            st.rerun()
+
+@st.cache_resource
+def figure_cache():
+    """Cache LRU/TTL de figuras compartilhado entre sessões, com acertos contados por gráfico"""
+    return LRUCache(FIGURE_CACHE_SIZE, FIGURE_CACHE_TTL, group=lambda key: key[0])
+
+def cached_figure(name, build, *key):
+    """Resultado de `build(*key)` vindo do cache de figuras; devolve (resultado, acerto)"""
+    cache = figure_cache()
+    value = cache.get((name,) + key)
+    if value is not None:
+        return value, True
+    with telemetry.span(f'dashboard.figura.{name}'):
+        value = build(*key)
+    cache.put((name,) + key, value)
+    return value, False
+
+def plot(name, fig):
+    """Exibe a figura, medindo a serialização para o navegador"""
+    with telemetry.span(f'dashboard.render.{name}'):
+        st.plotly_chart(fig, use_container_width=True)
+
+# Construtores de gráficos: funções puras de (versão dos dados, gêneros, faixa etária, ...)
+def select(version, genders, age_range):
+    return load_cube(version).select(genders, age_range)
+
+def build_level_bar(version, genders, age_range):
+    import plotly.express as px
+    
+    obesity_counts = select(version, genders, age_range).level_counts_series().reset_index()
+    obesity_counts.columns = ['Nível', 'Quantidade']
+    
+    fig_bar = px.bar(
+        obesity_counts,
+        x='Nível',
+        y='Quantidade',
+        title='Contagem por Nível de Obesidade',
+        color='Quantidade',
+        color_continuous_scale='Blues'
+    )
+    fig_bar.update_layout(showlegend=False, xaxis_tickangle=-45)
+    return fig_bar
+
+def build_level_pie(version, genders, age_range):
+    import plotly.express as px
+    
+    obesity_counts = select(version, genders, age_range).level_counts_series().reset_index()
+    obesity_counts.columns = ['Nível', 'Quantidade']
+    
+    return px.pie(
+        obesity_counts,
+        values='Quantidade',
+        names='Nível',
+        title='Proporção dos Níveis de Obesidade'
+    )
+
+def build_gender_bars(version, genders, age_range):
+    import plotly.graph_objects as go
+    from src.features import GENDER_LABELS
+    
+    gender_obesity = select(version, genders, age_range).gender_level_frame(GENDER_LABELS)
+    
+    fig_gender = go.Figure()
+    for obesity_level in gender_obesity.columns:
+        fig_gender.add_trace(go.Bar(
+            name=obesity_level,
+            x=gender_obesity.index,
+            y=gender_obesity[obesity_level]
+        ))
+    
+    fig_gender.update_layout(
+        title='Distribuição de Obesidade por Gênero',
+        barmode='group',
+        xaxis_title='Gênero',
+        yaxis_title='Quantidade'
+    )
+    return fig_gender
+
+def build_age_histogram(version, genders, age_range):
+    import plotly.express as px
+    
+    age_counts = select(version, genders, age_range).age_counts_series().rename_axis('age').reset_index(name='count')
+    fig_age = px.histogram(
+        age_counts,
+        x='age',
+        y='count',
+        histfunc='sum',
+        nbins=30,
+        title='Distribuição de Idade',
+        color_discrete_sequence=['#636EFA']
+    )
+    fig_age.update_layout(
+        xaxis_title='Idade',
+        yaxis_title='Frequência'
+    )
+    return fig_age
+
+def build_habit_heatmap(version, genders, age_range, specs, colorscale, title, yaxis_title):
+    import numpy as np
+    import plotly.graph_objects as go
+    
+    # Percentuais de todos os hábitos por nível, calculados uma vez por estado dos filtros
+    habits = habit_matrix(version, genders, age_range)
+    matrix, labels = habit_heatmap(habits, specs)
+    
+    fig = go.Figure(data=go.Heatmap(
+        z=matrix,
+        x=habits.index,
+        y=labels,
+        colorscale=colorscale,
+        text=np.round(matrix, 1),
+        texttemplate='%{text}%',
+        textfont={"size": 9},
+        colorbar=dict(title="% Pessoas")
+    ))
+    
+    fig.update_layout(
+        title=title,
+        xaxis_title='Nível de Obesidade',
+        yaxis_title=yaxis_title,
+        xaxis_tickangle=-45,
+        height=500
+    )
+    return fig
+
+def build_food_heatmap(version, genders, age_range):
+    return build_habit_heatmap(
+        version, genders, age_range, FOOD_HABITS, 'RdYlGn',
+        'Distribuição de Hábitos Alimentares por Nível de Obesidade', 'Comportamento Alimentar'
+    )
+
+def build_lifestyle_heatmap(version, genders, age_range):
+    return build_habit_heatmap(
+        version, genders, age_range, LIFESTYLE_HABITS, 'RdYlGn_r',
+        'Distribuição de Hábitos de Estilo de Vida por Nível de Obesidade', 'Comportamento'
+    )
+
+def evaluate_scenarios(version, genders, age_range, scenarios):
+    """(tamanho, % de obesidade) de cada cenário: bitsets em memória ou uma consulta SQL"""
+    if SQL_BACKEND:
+        return load_cube(version).evaluate(scenarios, genders, age_range)
+    bitsets = load_bitsets(version)
+    return bitsets.evaluate(scenarios, within=bitsets.select(genders, age_range))
+
+def build_risk_bars(version, genders, age_range, scenarios):
+    """Barras de % de obesidade por cenário; `scenarios` é uma tupla de (rótulo, grupos em JSON)"""
+    import plotly.graph_objects as go
+    
+    start = time.perf_counter()
+    results = evaluate_scenarios(version, genders, age_range, [json.loads(clauses) for _, clauses in scenarios])
+    elapsed = time.perf_counter() - start
+    telemetry.record('dashboard.cenários', elapsed)
+    elapsed_ms = elapsed * 1000
+    
+    risk_combinations = [label for (label, _), (size, _) in zip(scenarios, results) if size > 0]
+    obesity_rates = [rate for size, rate in results if size > 0]
+    
+    fig_risk = go.Figure(data=[
+        go.Bar(
+            y=risk_combinations,
+            x=obesity_rates,
+            orientation='h',
+            marker=dict(
+                color=obesity_rates,
+                colorscale='RdYlGn_r',
+                showscale=True,
+                colorbar=dict(title="% Obesidade")
+            ),
+            text=[f'{rate:.1f}%' for rate in obesity_rates],
+            textposition='outside'
+        )
+    ])
+    
+    fig_risk.update_layout(
+        title='Taxa de Obesidade por Combinação de Fatores',
+        xaxis_title='% Pessoas com Obesidade',
+        yaxis_title='Combinação de Fatores',
+        height=max(500, 45 * len(risk_combinations)),
+        showlegend=False
+    )
+    return fig_risk, elapsed_ms
+
+VEGETABLE_LABELS = {
+    'rarely': 'Raramente',
+    'sometimes': 'Às vezes',
+    'always': 'Sempre'
+}
+
+def scatter_points(version, genders, age_range):
+    """Pontos da dispersão copiados do dataset em memória; devolve (pontos, bytes usados)"""
+    import pandas as pd
+    from src.data import filter_rows, nbytes, take_columns
+    
+    # Apenas as colunas usadas no gráfico, para as linhas filtradas
+    df = load_data(version)
+    with telemetry.span('dashboard.filter_rows'):
+        filtered_rows = filter_rows(df, genders, age_range)
+    df_scatter = take_columns(df, filtered_rows, ['age', 'bmi', 'physical_activity_freq', 'obesity_level'])
+    
+    # Jitter fixo por paciente, calculado uma vez na carga dos dados (evita sobreposição exata)
+    age_jitter, bmi_jitter = load_jitter(version)
+    df_scatter['age_jitter'] = df_scatter['age'] + age_jitter.take(filtered_rows)
+    df_scatter['bmi_jitter'] = df_scatter['bmi'] + bmi_jitter.take(filtered_rows)
+    
+    # Criar label para alimentos calóricos (para hover), como categoria: custo por categoria, não por linha
+    df_scatter['caloric_label'] = pd.Categorical.from_codes(
+        df['frequent_high_caloric_food'].take(filtered_rows).to_numpy(),
+        categories=['Não', 'Sim']
+    )
+    
+    # Criar label para consumo de vegetais
+    df_scatter['veg_label'] = df['vegetable_consumption_freq'].take(filtered_rows).reset_index(drop=True).cat.rename_categories(
+        VEGETABLE_LABELS
+    )
+    return df_scatter, nbytes(filtered_rows) + nbytes(df_scatter)
+
+def sql_scatter_points(version, genders, age_range):
+    """Pontos da dispersão lidos do banco (só as linhas filtradas); devolve (pontos, bytes usados)"""
+    import pandas as pd
+    from src.data import nbytes, row_jitter
+    
+    df_scatter = load_cube(version).rows(genders, age_range, [
+        'age', 'bmi', 'physical_activity_freq', 'obesity_level',
+        'frequent_high_caloric_food', 'vegetable_consumption_freq'
+    ])
+    
+    # Sem o dataset em memória, o jitter fixo de cada paciente vem do identificador da linha
+    age_jitter, bmi_jitter = row_jitter(df_scatter.pop('rowid'))
+    df_scatter['age_jitter'] = df_scatter['age'] + age_jitter
+    df_scatter['bmi_jitter'] = df_scatter['bmi'] + bmi_jitter
+    df_scatter['caloric_label'] = pd.Categorical.from_codes(
+        df_scatter.pop('frequent_high_caloric_food').to_numpy(),
+        categories=['Não', 'Sim']
+    )
+    df_scatter['veg_label'] = df_scatter.pop('vegetable_consumption_freq').cat.rename_categories(VEGETABLE_LABELS)
+    return df_scatter, nbytes(df_scatter)
+
+def build_scatter(version, genders, age_range):
+    """Dispersão IMC x idade; devolve (figura, células agregadas ou None, bytes usados na montagem)"""
+    import numpy as np
+    import plotly.express as px
+    from src.cube import categories_of
+    from src.data import nbytes
+    
+    activity_order = categories_of('physical_activity_freq')
+    cube_slice = select(version, genders, age_range)
+    
+    if cube_slice.total <= SCATTER_MAX_POINTS:
+        # Poucos pontos: um ponto por paciente (WebGL), apenas com as colunas usadas no gráfico
+        df_scatter, build_bytes = (sql_scatter_points if SQL_BACKEND else scatter_points)(version, genders, age_range)
+        
+        fig_scatter = px.scatter(
+            df_scatter,
+            x='age_jitter',
+            y='bmi_jitter',
+            color='physical_activity_freq',
+            color_discrete_map=ACTIVITY_COLORS,
+            category_orders={'physical_activity_freq': activity_order},
+            labels={
+                'age_jitter': 'Idade (anos)',
+                'bmi_jitter': 'IMC',
+                'physical_activity_freq': 'Atividade Física'
+            },
+            title='Distribuição de IMC por Idade e Atividade Física',
+            hover_data={
+                'age_jitter': False,
+                'bmi_jitter': False,
+                'physical_activity_freq': False,
+                'obesity_level': False,
+                'veg_label': False,
+                'caloric_label': False,
+                'age': False,
+                'bmi': False
+            },
+            custom_data=['obesity_level', 'veg_label', 'caloric_label', 'age', 'bmi'],
+            render_mode='webgl'
+        )
+        
+        # Customizar hover template
+        fig_scatter.update_traces(
+            hovertemplate='<b>Nível Obesidade:</b> %{customdata[0]}<br>' +
+                          '<b>Vegetais:</b> %{customdata[1]}<br>' +
+                          '<b>Alim. Calóricos:</b> %{customdata[2]}<br>' +
+                          '<b>Idade:</b> %{customdata[3]}<br>' +
+                          '<b>IMC:</b> %{customdata[4]:.2f}<extra></extra>',
+            marker=dict(
+                size=7,
+                opacity=0.35,
+                line=dict(width=0, color='rgba(0,0,0,0)')
+            )
+        )
+        cells = None
+    else:
+        # Muitos pontos: contagens por (idade, IMC) de cada classe de atividade, vindas do cubo.
+        # O número de células não depende do número de pacientes.
+        df_scatter = cube_slice.density_frame()
+        
+        # Classes lado a lado dentro de cada idade, para que as bolhas não se sobreponham
+        offsets = np.linspace(-0.3, 0.3, len(activity_order), dtype=np.float32)
+        df_scatter['age_offset'] = df_scatter['age'] + offsets[df_scatter['physical_activity_freq'].cat.codes]
+        
+        fig_scatter = px.scatter(
+            df_scatter,
+            x='age_offset',
+            y='bmi',
+            size='count',
+            size_max=14,
+            color='physical_activity_freq',
+            color_discrete_map=ACTIVITY_COLORS,
+            category_orders={'physical_activity_freq': activity_order},
+            labels={
+                'age_offset': 'Idade (anos)',
+                'bmi': 'IMC',
+                'physical_activity_freq': 'Atividade Física'
+            },
+            title='Distribuição de IMC por Idade e Atividade Física',
+            custom_data=['age', 'bmi', 'count'],
+            render_mode='webgl'
+        )
+        fig_scatter.update_traces(
+            hovertemplate='<b>Idade:</b> %{customdata[0]}<br>' +
+                          '<b>IMC:</b> %{customdata[1]}<br>' +
+                          '<b>Pacientes:</b> %{customdata[2]:,}<extra></extra>',
+            marker=dict(opacity=0.6, line=dict(width=0, color='rgba(0,0,0,0)'))
+        )
+        cells = len(df_scatter)
+        build_bytes = nbytes(df_scatter)
+    
+    fig_scatter.update_layout(
+        height=500,
+        xaxis_title='Idade (anos)',
+        yaxis_title='IMC',
+        legend=dict(
+            title=dict(text="Atividade Física", font=dict(size=11)),
+            orientation="v",
+            yanchor="top",
+            y=0.98,
+            xanchor="left",
+            x=1.02
+        )
+    )
+    return fig_scatter, cells, build_bytes
+
+def render_cache_debug():
+    """Painel de depuração com as taxas de acerto do cache de figuras"""
+    import pandas as pd
+    
+    cache = figure_cache()
+    with st.expander("🐞 Cache de figuras"):
+        stats = cache.stats()
+        st.caption(
+            f"{stats['size']}/{stats['maxsize']} figuras • TTL {FIGURE_CACHE_TTL:g}s • "
+            f"acertos {stats['hits']} • falhas {stats['misses']} • taxa {stats['hit_rate']:.0%}"
+        )
+        groups = cache.group_stats()
+        if groups:
+            table = pd.DataFrame.from_dict(groups, orient='index').rename_axis('Gráfico')
+            table['hit_rate'] = (table['hit_rate'] * 100).round(1)
+            st.dataframe(
+                table.rename(columns={'hits': 'Acertos', 'misses': 'Falhas', 'hit_rate': 'Acerto (%)'}),
+                use_container_width=True
+            )
+        if st.button("Limpar cache de figuras"):
+            cache.clear()
 
 def main():
     st.title("📊 Dashboard - Análise de Obesidade")
@@ -26,9 +517,19 @@ def main():
     
     st.divider()
     
+    from src.data import nbytes
+    from src.features import GENDER_LABELS
+    from src.scenarios import DEFAULT_SCENARIOS
+    
     # Carregar dados
     try:
-        df = load_data()
+        version = current_version()
+        with telemetry.span('dashboard.dados'):
+            cube = load_cube(version)
+            if SQL_BACKEND:
+                shared_bytes = cube.nbytes
+            else:
+                shared_bytes = nbytes(load_data(version)) + cube.nbytes + load_bitsets(version).nbytes
     except Exception as e:
         st.error(f"Erro ao carregar dados: {str(e)}")
         return
@@ -42,25 +543,28 @@ def main():
             "Gênero",
             options=[0, 1],
             default=[0, 1],
-            format_func=lambda x: 'Feminino' if x == 0 else 'Masculino'
+            format_func=lambda x: GENDER_LABELS[x]
         )
         
         # Filtro de idade
         age_range = st.slider(
             "Faixa Etária",
-            int(df['age'].min()),
-            int(df['age'].max()),
-            (int(df['age'].min()), int(df['age'].max()))
+            int(cube.ages[0]),
+            int(cube.ages[-1]),
+            (int(cube.ages[0]), int(cube.ages[-1]))
         )
         
         st.divider()
-        st.caption(f"**Total de registros:** {len(df)}")
+        st.caption(f"**Total de registros:** {cube.n_rows}")
+        if SQL_BACKEND:
+            st.caption(f"**Backend:** SQL (`{SQL_DB_PATH.name}`)")
+        memory_slot = st.empty()
+        debug_slot = st.container()
     
-    # Aplicar filtros
-    df_filtered = df[
-        (df['gender'].isin(gender_filter)) &
-        (df['age'].between(age_range[0], age_range[1]))
-    ]
+    # Estado dos filtros: chave dos gráficos em cache (agregados vêm do cubo e cenários dos bitsets)
+    filters = (version, tuple(sorted(gender_filter)), tuple(age_range))
+    with telemetry.span('dashboard.filtro'):
+        cube_slice = cube.select(gender_filter, age_range)
     
     # Métricas principais
     st.header("📈 Visão Geral")
@@ -70,26 +574,26 @@ def main():
     with col1:
         st.metric(
             "Total de Pacientes",
-            f"{len(df_filtered):,}",
-            delta=f"{len(df_filtered) - len(df)} (filtro)"
+            f"{cube_slice.total:,}",
+            delta=f"{cube_slice.total - cube.n_rows} (filtro)"
         )
     
     with col2:
-        avg_age = df_filtered['age'].mean()
+        avg_age = cube_slice.mean_age
         st.metric(
             "Idade Média",
             f"{avg_age:.1f} anos"
         )
     
     with col3:
-        avg_bmi = df_filtered['bmi'].mean()
+        avg_bmi = cube_slice.mean_bmi
         st.metric(
             "IMC Médio",
             f"{avg_bmi:.2f}"
         )
     
     with col4:
-        obesity_rate = (df_filtered['obesity_level'].isin(['Obesity_Type_I', 'Obesity_Type_II', 'Obesity_Type_III']).sum() / len(df_filtered)) * 100
+        obesity_rate = cube_slice.obesity_rate
         st.metric(
             "Taxa de Obesidade",
             f"{obesity_rate:.1f}%"
@@ -104,29 +608,13 @@ def main():
     
     with col1:
         # Gráfico de barras
-        obesity_counts = df_filtered['obesity_level'].value_counts().reset_index()
-        obesity_counts.columns = ['Nível', 'Quantidade']
-        
-        fig_bar = px.bar(
-            obesity_counts,
-            x='Nível',
-            y='Quantidade',
-            title='Contagem por Nível de Obesidade',
-            color='Quantidade',
-            color_continuous_scale='Blues'
-        )
-        fig_bar.update_layout(showlegend=False, xaxis_tickangle=-45)
-        st.plotly_chart(fig_bar, use_container_width=True)
+        fig_bar, _ = cached_figure('Barras por nível', build_level_bar, *filters)
+        plot('Barras por nível', fig_bar)
     
     with col2:
         # Gráfico de pizza
-        fig_pie = px.pie(
-            obesity_counts,
-            values='Quantidade',
-            names='Nível',
-            title='Proporção dos Níveis de Obesidade'
-        )
-        st.plotly_chart(fig_pie, use_container_width=True)
+        fig_pie, _ = cached_figure('Pizza por nível', build_level_pie, *filters)
+        plot('Pizza por nível', fig_pie)
     
     st.divider()
     
@@ -137,39 +625,13 @@ def main():
     
     with col1:
         # Distribuição por gênero
-        df_filtered['gender_label'] = df_filtered['gender'].map({0: 'Feminino', 1: 'Masculino'})
-        gender_obesity = pd.crosstab(df_filtered['gender_label'], df_filtered['obesity_level'])
-        
-        fig_gender = go.Figure()
-        for obesity_level in gender_obesity.columns:
-            fig_gender.add_trace(go.Bar(
-                name=obesity_level,
-                x=gender_obesity.index,
-                y=gender_obesity[obesity_level]
-            ))
-        
-        fig_gender.update_layout(
-            title='Distribuição de Obesidade por Gênero',
-            barmode='group',
-            xaxis_title='Gênero',
-            yaxis_title='Quantidade'
-        )
-        st.plotly_chart(fig_gender, use_container_width=True)
+        fig_gender, _ = cached_figure('Gênero x nível', build_gender_bars, *filters)
+        plot('Gênero x nível', fig_gender)
     
     with col2:
         # Distribuição de idade
-        fig_age = px.histogram(
-            df_filtered,
-            x='age',
-            nbins=30,
-            title='Distribuição de Idade',
-            color_discrete_sequence=['#636EFA']
-        )
-        fig_age.update_layout(
-            xaxis_title='Idade',
-            yaxis_title='Frequência'
-        )
-        st.plotly_chart(fig_age, use_container_width=True)
+        fig_age, _ = cached_figure('Histograma de idade', build_age_histogram, *filters)
+        plot('Histograma de idade', fig_age)
     
     st.divider()
     
@@ -181,116 +643,14 @@ def main():
     with col1:
         # Heatmap de hábitos alimentares
         st.subheader("Padrões de Hábitos Alimentares")
-        
-        # Criar matriz de contagem para hábitos alimentares
-        food_habits = ['vegetable_consumption_freq', 'water_intake', 'main_meals_per_day', 'food_between_meals']
-        food_matrix = []
-        food_labels = []
-        
-        for habit in food_habits:
-            habit_dist = pd.crosstab(
-                df_filtered['obesity_level'], 
-                df_filtered[habit], 
-                normalize='index'
-            ) * 100
-            
-            # Obter categorias ordenadas
-            if habit == 'vegetable_consumption_freq':
-                categories = ['rarely', 'sometimes', 'always']
-                label_prefix = 'Vegetais'
-            elif habit == 'water_intake':
-                categories = ['low_consumption', 'adequate_consumption', 'high_consumption']
-                label_prefix = 'Água'
-            elif habit == 'main_meals_per_day':
-                categories = ['one_meal', 'two_meals', 'three_meals', 'four_or_more_meals']
-                label_prefix = 'Refeições'
-            else:
-                categories = df_filtered[habit].unique()
-                label_prefix = 'Lanches'
-            
-            for cat in categories:
-                if cat in habit_dist.columns:
-                    food_matrix.append(habit_dist[cat].values)
-                    food_labels.append(f"{label_prefix}: {cat.replace('_', ' ').title()}")
-        
-        fig_food = go.Figure(data=go.Heatmap(
-            z=food_matrix,
-            x=habit_dist.index,
-            y=food_labels,
-            colorscale='RdYlGn',
-            text=np.round(food_matrix, 1),
-            texttemplate='%{text}%',
-            textfont={"size": 9},
-            colorbar=dict(title="% Pessoas")
-        ))
-        
-        fig_food.update_layout(
-            title='Distribuição de Hábitos Alimentares por Nível de Obesidade',
-            xaxis_title='Nível de Obesidade',
-            yaxis_title='Comportamento Alimentar',
-            xaxis_tickangle=-45,
-            height=500
-        )
-        st.plotly_chart(fig_food, use_container_width=True)
+        fig_food, _ = cached_figure('Heatmap alimentar', build_food_heatmap, *filters)
+        plot('Heatmap alimentar', fig_food)
     
     with col2:
         # Heatmap de estilo de vida
         st.subheader("Padrões de Estilo de Vida")
-        
-        # Criar matriz de contagem para estilo de vida
-        lifestyle_habits = ['physical_activity_freq', 'technology_use_time', 'transportation_mode', 'frequent_high_caloric_food']
-        lifestyle_matrix = []
-        lifestyle_labels = []
-        
-        for habit in lifestyle_habits:
-            habit_dist = pd.crosstab(
-                df_filtered['obesity_level'], 
-                df_filtered[habit], 
-                normalize='index'
-            ) * 100
-            
-            # Obter categorias ordenadas
-            if habit == 'physical_activity_freq':
-                categories = ['sedentary', 'low_frequency', 'moderate_frequency', 'high_frequency']
-                label_prefix = 'Atividade Física'
-            elif habit == 'technology_use_time':
-                categories = ['low_use', 'moderate_use', 'high_use']
-                label_prefix = 'Tempo de Tela'
-            elif habit == 'frequent_high_caloric_food':
-                categories = [0, 1]
-                label_prefix = 'Alimentos Calóricos'
-            else:
-                categories = df_filtered[habit].unique()
-                label_prefix = 'Transporte'
-            
-            for cat in categories:
-                if cat in habit_dist.columns:
-                    lifestyle_matrix.append(habit_dist[cat].values)
-                    if habit == 'frequent_high_caloric_food':
-                        cat_label = 'Não' if cat == 0 else 'Sim'
-                    else:
-                        cat_label = str(cat).replace('_', ' ').title()
-                    lifestyle_labels.append(f"{label_prefix}: {cat_label}")
-        
-        fig_lifestyle = go.Figure(data=go.Heatmap(
-            z=lifestyle_matrix,
-            x=habit_dist.index,
-            y=lifestyle_labels,
-            colorscale='RdYlGn_r',
-            text=np.round(lifestyle_matrix, 1),
-            texttemplate='%{text}%',
-            textfont={"size": 9},
-            colorbar=dict(title="% Pessoas")
-        ))
-        
-        fig_lifestyle.update_layout(
-            title='Distribuição de Hábitos de Estilo de Vida por Nível de Obesidade',
-            xaxis_title='Nível de Obesidade',
-            yaxis_title='Comportamento',
-            xaxis_tickangle=-45,
-            height=500
-        )
-        st.plotly_chart(fig_lifestyle, use_container_width=True)
+        fig_lifestyle, _ = cached_figure('Heatmap estilo de vida', build_lifestyle_heatmap, *filters)
+        plot('Heatmap estilo de vida', fig_lifestyle)
     
     st.divider()
     
@@ -302,174 +662,36 @@ def main():
     with col1:
         st.subheader("Impacto de Fatores Combinados")
         
-        # Criar combinações de fatores de risco
-        risk_combinations = []
-        obesity_rates = []
-        
-        # Cenário 1: Histórico familiar + Sedentarismo
-        scenario_1 = df_filtered[
-            (df_filtered['family_history_overweight'] == 1) & 
-            (df_filtered['physical_activity_freq'] == 'sedentary')
-        ]
-        if len(scenario_1) > 0:
-            obesity_rate_1 = (scenario_1['obesity_level'].isin(['Obesity_Type_I', 'Obesity_Type_II', 'Obesity_Type_III']).sum() / len(scenario_1)) * 100
-            risk_combinations.append('Histórico Familiar +\nSedentarismo')
-            obesity_rates.append(obesity_rate_1)
-        
-        # Cenário 2: Sem histórico + Atividade regular
-        scenario_2 = df_filtered[
-            (df_filtered['family_history_overweight'] == 0) & 
-            (df_filtered['physical_activity_freq'].isin(['moderate_frequency', 'high_frequency']))
-        ]
-        if len(scenario_2) > 0:
-            obesity_rate_2 = (scenario_2['obesity_level'].isin(['Obesity_Type_I', 'Obesity_Type_II', 'Obesity_Type_III']).sum() / len(scenario_2)) * 100
-            risk_combinations.append('Sem Histórico +\nAtividade Regular')
-            obesity_rates.append(obesity_rate_2)
-        
-        # Cenário 3: Alimentos calóricos + Sedentarismo
-        scenario_3 = df_filtered[
-            (df_filtered['frequent_high_caloric_food'] == 1) & 
-            (df_filtered['physical_activity_freq'] == 'sedentary')
-        ]
-        if len(scenario_3) > 0:
-            obesity_rate_3 = (scenario_3['obesity_level'].isin(['Obesity_Type_I', 'Obesity_Type_II', 'Obesity_Type_III']).sum() / len(scenario_3)) * 100
-            risk_combinations.append('Alimentos Calóricos +\nSedentarismo')
-            obesity_rates.append(obesity_rate_3)
-        
-        # Cenário 4: Vegetais raros + Baixa água
-        scenario_4 = df_filtered[
-            (df_filtered['vegetable_consumption_freq'] == 'rarely') & 
-            (df_filtered['water_intake'] == 'low_consumption')
-        ]
-        if len(scenario_4) > 0:
-            obesity_rate_4 = (scenario_4['obesity_level'].isin(['Obesity_Type_I', 'Obesity_Type_II', 'Obesity_Type_III']).sum() / len(scenario_4)) * 100
-            risk_combinations.append('Poucos Vegetais +\nPouca Água')
-            obesity_rates.append(obesity_rate_4)
-        
-        # Cenário 5: Múltiplos fatores protetores
-        scenario_5 = df_filtered[
-            (df_filtered['physical_activity_freq'].isin(['moderate_frequency', 'high_frequency'])) & 
-            (df_filtered['vegetable_consumption_freq'].isin(['sometimes', 'always'])) &
-            (df_filtered['water_intake'].isin(['adequate_consumption', 'high_consumption']))
-        ]
-        if len(scenario_5) > 0:
-            obesity_rate_5 = (scenario_5['obesity_level'].isin(['Obesity_Type_I', 'Obesity_Type_II', 'Obesity_Type_III']).sum() / len(scenario_5)) * 100
-            risk_combinations.append('Múltiplos Fatores\nProtetores')
-            obesity_rates.append(obesity_rate_5)
-        
-        # Criar gráfico de barras
-        fig_risk = go.Figure(data=[
-            go.Bar(
-                y=risk_combinations,
-                x=obesity_rates,
-                orientation='h',
-                marker=dict(
-                    color=obesity_rates,
-                    colorscale='RdYlGn_r',
-                    showscale=True,
-                    colorbar=dict(title="% Obesidade")
-                ),
-                text=[f'{rate:.1f}%' for rate in obesity_rates],
-                textposition='outside'
-            )
-        ])
-        
-        fig_risk.update_layout(
-            title='Taxa de Obesidade por Combinação de Fatores',
-            xaxis_title='% Pessoas com Obesidade',
-            yaxis_title='Combinação de Fatores',
-            height=500,
-            showlegend=False
+        # Cenários pré-definidos seguidos dos criados pelo usuário nesta sessão (em JSON, para compor a chave do cache)
+        scenarios = tuple(
+            (label, json.dumps(clauses, sort_keys=True))
+            for label, clauses in DEFAULT_SCENARIOS + st.session_state.get('custom_scenarios', [])
         )
-        st.plotly_chart(fig_risk, use_container_width=True)
+        (fig_risk, elapsed_ms), hit = cached_figure('Cenários de risco', build_risk_bars, *filters, scenarios)
+        plot('Cenários de risco', fig_risk)
+        st.caption(f"{len(scenarios)} cenários avaliados em {elapsed_ms:.1f} ms" + (" (gráfico em cache)" if hit else ""))
+        
+        render_scenario_builder()
     
     with col2:
         st.subheader("Relação IMC, Idade e Atividade Física")
         
-        # Criar scatter plot IMC vs Idade colorido por atividade física
-        df_scatter = df_filtered.copy()
-        
-        # Adicionar pequeno jitter para melhor visualização (evita sobreposição exata)
-        np.random.seed(42)
-        df_scatter['age_jitter'] = df_scatter['age'] + np.random.uniform(-0.3, 0.3, len(df_scatter))
-        df_scatter['bmi_jitter'] = df_scatter['bmi'] + np.random.uniform(-0.2, 0.2, len(df_scatter))
-        
-        # Criar label para alimentos calóricos (para hover)
-        df_scatter['caloric_label'] = df_scatter['frequent_high_caloric_food'].map({
-            0: 'Não',
-            1: 'Sim'
-        })
-        
-        # Criar label para consumo de vegetais
-        df_scatter['veg_label'] = df_scatter['vegetable_consumption_freq'].map({
-            'rarely': 'Raramente',
-            'sometimes': 'Às vezes',
-            'always': 'Sempre'
-        })
-        
-        fig_scatter = px.scatter(
-            df_scatter,
-            x='age_jitter',
-            y='bmi_jitter',
-            color='physical_activity_freq',
-            color_discrete_map={
-                'sedentary': '#d62728',
-                'low_frequency': '#ff7f0e',
-                'moderate_frequency': '#2ca02c',
-                'high_frequency': '#1f77b4'
-            },
-            category_orders={
-                'physical_activity_freq': ['sedentary', 'low_frequency', 'moderate_frequency', 'high_frequency']
-            },
-            labels={
-                'age_jitter': 'Idade (anos)',
-                'bmi_jitter': 'IMC',
-                'physical_activity_freq': 'Atividade Física'
-            },
-            title='Distribuição de IMC por Idade e Atividade Física',
-            hover_data={
-                'age_jitter': False,
-                'bmi_jitter': False,
-                'physical_activity_freq': False,
-                'obesity_level': False,
-                'veg_label': False,
-                'caloric_label': False,
-                'age': False,
-                'bmi': False
-            },
-            custom_data=['obesity_level', 'veg_label', 'caloric_label', 'age', 'bmi']
-        )
-        
-        # Customizar hover template
-        fig_scatter.update_traces(
-            hovertemplate='<b>Nível Obesidade:</b> %{customdata[0]}<br>' +
-                          '<b>Vegetais:</b> %{customdata[1]}<br>' +
-                          '<b>Alim. Calóricos:</b> %{customdata[2]}<br>' +
-                          '<b>Idade:</b> %{customdata[3]}<br>' +
-                          '<b>IMC:</b> %{customdata[4]:.2f}<extra></extra>',
-            marker=dict(
-                size=7,
-                opacity=0.35,
-                line=dict(width=0, color='rgba(0,0,0,0)')
-            )
-        )
-        
-        fig_scatter.update_layout(
-            height=500,
-            xaxis_title='Idade (anos)',
-            yaxis_title='IMC',
-            legend=dict(
-                title=dict(text="Atividade Física", font=dict(size=11)),
-                orientation="v",
-                yanchor="top",
-                y=0.98,
-                xanchor="left",
-                x=1.02
-            )
+        (fig_scatter, cells, build_bytes), hit = cached_figure('Dispersão IMC x idade', build_scatter, *filters)
+        plot('Dispersão IMC x idade', fig_scatter)
+        if cells is not None:
+            st.caption(f"Exibindo {cells:,} células agregadas de {cube_slice.total:,} pacientes "
+                       f"(acima de {SCATTER_MAX_POINTS:,} pontos; tamanho = nº de pacientes).")
+        
+        # Memória: dados, cubo, bitsets e figuras são compartilhados; por sessão fica só o recorte
+        # usado para montar o gráfico de dispersão quando ele não vem do cache
+        session_bytes = 0 if hit else build_bytes
+        peak_bytes = max(session_bytes, st.session_state.get('peak_session_bytes', 0))
+        st.session_state['peak_session_bytes'] = peak_bytes
+        memory_slot.caption(
+            f"**Memória:** dados compartilhados {shared_bytes / 2**20:.1f} MB • "
+            f"sessão {session_bytes / 2**20:.2f} MB (pico {peak_bytes / 2**20:.2f} MB)"
         )
         
-        st.plotly_chart(fig_scatter, use_container_width=True)
-        
         st.caption("💡 **Dica:** Cores mais intensas = maior concentração. Passe o mouse sobre os pontos para ver detalhes individuais.")
     
     st.divider()
@@ -516,24 +738,36 @@ def main():
     # Performance do Modelo
     st.header("🎯 Performance do Modelo")
     
-    col1, col2, col3 = st.columns(3)
-    
-    with col1:
-        st.metric("Acurácia", "93.2%")
-        st.caption("Precisão geral do modelo")
-    
-    with col2:
-        st.metric("AUC-ROC", "0.997")
-        st.caption("Excelente capacidade discriminatória")
+    # Métricas do último treinamento (models/model_info.json, regravado pelo pipeline)
+    try:
+        metrics = startup.model_info.get()['metrics']
+    except Exception as e:
+        st.caption(f"Métricas do modelo indisponíveis: {str(e)}")
+        metrics = None
     
-    with col3:
-        st.metric("F1-Score", "93.1%")
-        st.caption("Balanceamento entre precisão e recall")
+    if metrics is not None:
+        col1, col2, col3 = st.columns(3)
+        
+        with col1:
+            st.metric("Acurácia", f"{metrics['accuracy']:.1%}")
+            st.caption("Precisão geral do modelo")
+        
+        with col2:
+            st.metric("AUC-ROC", f"{metrics['roc_auc']:.3f}")
+            st.caption("Excelente capacidade discriminatória")
+        
+        with col3:
+            st.metric("F1-Score", f"{metrics['f1_score']:.1%}")
+            st.caption("Balanceamento entre precisão e recall")
     
     st.divider()
     
     # Rodapé
     st.caption("Dashboard desenvolvido com Streamlit • Tech Challenge Fase 4 • 2025")
+    
+    # Painel de depuração preenchido por último, já com os acessos ao cache desta execução
+    with debug_slot:
+        render_cache_debug()
 
 if __name__ == "__main__":
     main()
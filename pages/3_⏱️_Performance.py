@@ -0,0 +1,142 @@
+import streamlit as st
+
+from src import telemetry
+from src.config import TELEMETRY_EXPORT_DIR, TELEMETRY_WINDOW
+
+# Configuração da página
+st.set_page_config(
+    page_title="Performance",
+    page_icon="⏱️",
+    layout="wide"
+)
+
+COLUMN_LABELS = {
+    'count': 'Chamadas',
+    'window': 'Janela',
+    'p50_ms': 'p50 (ms)',
+    'p95_ms': 'p95 (ms)',
+    'p99_ms': 'p99 (ms)',
+    'mean_ms': 'Média (ms)',
+    'max_ms': 'Máx (ms)',
+    'total_ms': 'Total (ms)',
+}
+
+def summary_frame():
+    """Resumo da telemetria como tabela, das etapas com maior tempo total para as menores"""
+    import pandas as pd
+    
+    summary = telemetry.snapshot()
+    if not summary:
+        return None
+    frame = pd.DataFrame.from_dict(summary, orient='index').rename_axis('Etapa')
+    return frame[list(COLUMN_LABELS)].sort_values('total_ms', ascending=False)
+
+def build_percentile_bars(frame):
+    """Barras horizontais de p50/p95/p99 por etapa"""
+    import plotly.graph_objects as go
+    
+    fig = go.Figure()
+    for column, color in [('p50_ms', '#2ecc71'), ('p95_ms', '#f39c12'), ('p99_ms', '#e74c3c')]:
+        fig.add_trace(go.Bar(
+            y=frame.index, x=frame[column], name=COLUMN_LABELS[column],
+            orientation='h', marker_color=color
+        ))
+    fig.update_layout(
+        barmode='group',
+        xaxis_title='Tempo (ms)',
+        xaxis_type='log',
+        yaxis={'autorange': 'reversed'},
+        height=max(400, 28 * len(frame) * 3),
+        legend={'orientation': 'h', 'y': 1.02, 'yanchor': 'bottom'}
+    )
+    return fig
+
+def build_histogram(stage, row):
+    """Histograma das durações da janela de uma etapa, com as linhas dos percentis"""
+    import plotly.express as px
+    
+    samples_ms = [s * 1000 for s in telemetry.samples(stage)]
+    fig = px.histogram(x=samples_ms, nbins=50, labels={'x': 'Tempo (ms)'})
+    for column, color in [('p50_ms', '#2ecc71'), ('p95_ms', '#f39c12'), ('p99_ms', '#e74c3c')]:
+        fig.add_vline(x=row[column], line_dash='dash', line_color=color,
+                      annotation_text=COLUMN_LABELS[column].split()[0])
+    fig.update_layout(yaxis_title='Ocorrências', showlegend=False, height=350)
+    return fig
+
+def main():
+    st.title("⏱️ Performance")
+    st.markdown("### Tempo gasto em cada etapa das páginas")
+
+    # Sidebar - controles da instrumentação
+    with st.sidebar:
+        st.header("⚙️ Instrumentação")
+        enabled = st.toggle("Medição ativa", value=telemetry.enabled())
+        if enabled != telemetry.enabled():
+            telemetry.set_enabled(enabled)
+
+        st.caption(
+            f"Percentis calculados sobre as últimas {TELEMETRY_WINDOW:,} medições de cada etapa, "
+            "somando todas as sessões deste processo."
+        )
+
+        if st.button("Zerar medições", use_container_width=True):
+            telemetry.reset()
+
+        st.divider()
+        st.subheader("💾 Exportar")
+        if st.button("Gravar em arquivo", use_container_width=True):
+            path = telemetry.export()
+            st.success(f"Gravado em `{path}`")
+        st.caption(f"Pasta: `{TELEMETRY_EXPORT_DIR}`")
+        st.download_button(
+            "⬇️ Baixar JSON",
+            data=telemetry.export_json(),
+            file_name="telemetry.json",
+            mime="application/json",
+            use_container_width=True
+        )
+
+    frame = summary_frame()
+    if frame is None:
+        st.info(
+            "Nenhuma medição registrada ainda. Use as páginas de Predição e Dashboard "
+            "(ou ative a medição na barra lateral) e volte a esta página."
+        )
+        return
+
+    # Métricas principais
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("Etapas medidas", len(frame))
+    with col2:
+        st.metric("Medições", f"{int(frame['count'].sum()):,}")
+    with col3:
+        slowest = frame['p95_ms'].idxmax()
+        st.metric("Maior p95", f"{frame.loc[slowest, 'p95_ms']:.1f} ms", delta=slowest, delta_color="off")
+
+    st.divider()
+
+    # Tabela de percentis
+    st.header("📋 Percentis por Etapa")
+    st.dataframe(
+        frame.rename(columns=COLUMN_LABELS).round(2),
+        use_container_width=True
+    )
+
+    st.plotly_chart(build_percentile_bars(frame), use_container_width=True)
+
+    st.divider()
+
+    # Distribuição de uma etapa
+    st.header("📊 Distribuição de uma Etapa")
+    stage = st.selectbox("Etapa", frame.index)
+    st.plotly_chart(build_histogram(stage, frame.loc[stage]), use_container_width=True)
+
+    st.caption(
+        "**Etapas:** `startup.*` importações e cargas do aquecimento • `predição.*` e `lote.*` página de Predição • "
+        "`modelo.predict_proba` predições calculadas (fora do cache) • `dashboard.figura.*` montagem dos gráficos "
+        "(apenas quando não estão em cache) • `dashboard.render.*` serialização dos gráficos para o navegador."
+    )
+
+if __name__ == "__main__":
+    main()
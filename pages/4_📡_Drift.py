@@ -0,0 +1,168 @@
+import streamlit as st
+
+from src import startup
+from src.config import DRIFT_CHECK_INTERVAL, DRIFT_MIN_SAMPLES, DRIFT_PSI_ALERT, DRIFT_PSI_WARNING
+
+# Configuração da página
+st.set_page_config(
+    page_title="Drift",
+    page_icon="📡",
+    layout="wide"
+)
+
+# Aquecimento em segundo plano (sem efeito se já iniciado por outra página)
+startup.start_warmup()
+
+# pandas, plotly e o monitor (numpy) são importados nas funções que os usam, depois do início do aquecimento
+
+FEATURE_LABELS = {
+    'predicted_class': 'Classe prevista',
+    'age': 'Idade',
+    'bmi': 'IMC',
+    'gender': 'Gênero (1 = feminino)',
+    'family_history_overweight': 'Histórico familiar',
+    'frequent_high_caloric_food': 'Alimentos calóricos',
+    'vegetable_consumption_freq': 'Consumo de vegetais',
+    'main_meals_per_day': 'Refeições principais',
+    'food_between_meals': 'Comer entre refeições',
+    'smoker': 'Fumante',
+    'water_intake': 'Consumo de água',
+    'calorie_monitoring': 'Monitora calorias',
+    'physical_activity_freq': 'Atividade física',
+    'technology_use_time': 'Tempo de telas',
+    'alcohol_consumption': 'Álcool',
+    'transportation_mode': 'Transporte',
+}
+
+def report_frame(features):
+    """Tabela de PSI, qui-quadrado e situação por variável"""
+    import pandas as pd
+    from src import drift
+    
+    status_icons = {drift.STATUS_OK: '🟢', drift.STATUS_WARNING: '🟡', drift.STATUS_ALERT: '🔴'}
+    frame = pd.DataFrame(features)
+    return pd.DataFrame({
+        'Variável': frame['feature'].map(lambda c: FEATURE_LABELS.get(c, c)),
+        'PSI': frame['psi'].round(3),
+        'Qui-quadrado': frame['chi2'].round(1),
+        'p-valor': frame['p_value'].map(lambda p: f"{p:.2g}"),
+        'Situação': frame['status'].map(lambda s: f"{status_icons[s]} {s}"),
+    })
+
+def render_alerts(features):
+    from src import drift
+    
+    alerts = [f for f in features if f['status'] == drift.STATUS_ALERT]
+    warnings = [f for f in features if f['status'] == drift.STATUS_WARNING]
+    for f in alerts:
+        st.error(f"🔴 **{FEATURE_LABELS.get(f['feature'], f['feature'])}**: PSI {f['psi']:.3f} — "
+                 "distribuição muito diferente do treino")
+    for f in warnings:
+        st.warning(f"🟡 **{FEATURE_LABELS.get(f['feature'], f['feature'])}**: PSI {f['psi']:.3f} — "
+                   "mudança moderada em relação ao treino")
+    if not alerts and not warnings:
+        st.success("🟢 Nenhuma variável com drift relevante")
+
+def build_distribution(reference, sketch, feature):
+    """Proporções por faixa/categoria no treino e nas predições servidas"""
+    import plotly.graph_objects as go
+    
+    labels = reference.labels[feature]
+    fig = go.Figure()
+    for name, counts, color in [('Treino', reference.counts[feature], '#95a5a6'),
+                                ('Servidas', sketch.counts[feature], '#3498db')]:
+        fig.add_trace(go.Bar(x=labels, y=counts / max(counts.sum(), 1) * 100, name=name, marker_color=color))
+    fig.update_layout(barmode='group', yaxis_title='% dos pacientes', height=400,
+                      legend={'orientation': 'h', 'y': 1.02, 'yanchor': 'bottom'})
+    return fig
+
+def build_history(history):
+    """Maior PSI de cada verificação, com os limites de atenção e alerta"""
+    import pandas as pd
+    import plotly.graph_objects as go
+    
+    frame = pd.DataFrame([{'time': r['time'], 'max_psi': r['max_psi']} for r in history])
+    fig = go.Figure(go.Scatter(x=frame['time'], y=frame['max_psi'], mode='lines+markers', name='Maior PSI'))
+    fig.add_hline(y=DRIFT_PSI_WARNING, line_dash='dash', line_color='#f39c12', annotation_text='atenção')
+    fig.add_hline(y=DRIFT_PSI_ALERT, line_dash='dash', line_color='#e74c3c', annotation_text='alerta')
+    fig.update_layout(xaxis_title='Verificação', yaxis_title='PSI', height=350)
+    return fig
+
+def main():
+    st.title("📡 Monitoramento de Drift")
+    st.markdown("### Entradas servidas comparadas com o dataset de treino")
+
+    from src import drift
+    
+    monitor = drift.monitor
+    monitor.start()
+
+    # Sidebar - verificações
+    with st.sidebar:
+        st.header("⚙️ Verificações")
+        if st.button("Verificar agora", use_container_width=True):
+            if monitor.check() is None:
+                st.info(f"A janela atual ainda tem menos de {monitor.min_samples:,} predições.")
+        if st.button("Zerar monitoramento", use_container_width=True):
+            monitor.reset()
+        st.caption(
+            f"Verificação automática a cada {DRIFT_CHECK_INTERVAL:g} s, sobre as predições servidas "
+            f"desde a anterior (mínimo de {DRIFT_MIN_SAMPLES:,}). PSI ≥ {DRIFT_PSI_WARNING:g} indica "
+            f"atenção e ≥ {DRIFT_PSI_ALERT:g}, alerta."
+        )
+
+    try:
+        reference, window, total = monitor.snapshot()
+    except Exception as e:
+        st.error(f"Referência de treino indisponível: {str(e)}")
+        return
+    history = list(monitor.history)
+
+    # Métricas principais
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Predições monitoradas", f"{total.n:,}")
+    with col2:
+        st.metric("Na janela atual", f"{window.n:,}")
+    with col3:
+        st.metric("Última verificação", history[-1]['time'][11:] if history else "—")
+    with col4:
+        st.metric("Memória dos esboços", f"{monitor.nbytes():,} B")
+
+    st.divider()
+
+    # Alertas e tabela da última verificação
+    st.header("🚨 Última Verificação")
+    if history:
+        latest = history[-1]
+        st.caption(f"{latest['time']} • {latest['samples']:,} predições na janela")
+        render_alerts(latest['features'])
+        st.dataframe(report_frame(latest['features']), use_container_width=True, hide_index=True)
+    else:
+        st.info(
+            "Nenhuma verificação concluída ainda. Faça predições na página de Predição "
+            "(ou no serviço HTTP) e aguarde a próxima verificação."
+        )
+
+    if total.n == 0:
+        return
+
+    st.divider()
+
+    # Distribuições acumuladas desde o início
+    st.header("📊 Distribuições")
+    st.caption("Todas as predições servidas desde o início do monitoramento, comparadas com o treino.")
+    features = drift.compare(total, reference)
+    st.dataframe(report_frame(features), use_container_width=True, hide_index=True)
+    feature = st.selectbox(
+        "Variável", [f['feature'] for f in features], format_func=lambda c: FEATURE_LABELS.get(c, c)
+    )
+    st.plotly_chart(build_distribution(reference, total, feature), use_container_width=True)
+
+    if len(history) > 1:
+        st.divider()
+        st.header("📈 Histórico")
+        st.plotly_chart(build_history(history), use_container_width=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+"""Módulos compartilhados do Sistema Preditivo de Obesidade."""
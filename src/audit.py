@@ -0,0 +1,266 @@
+"""Registro de auditoria das predições, gravado em segundo plano.
+
+Cada predição da página de Predição (entradas do formulário, classe prevista,
+probabilidades e versão do modelo) é enfileirada em uma fila limitada e
+gravada por uma thread de fundo em um SQLite local em modo WAL. A thread
+agrupa o que estiver na fila (até `AUDIT_BATCH_SIZE` registros, ou o que
+chegar em `AUDIT_FLUSH_INTERVAL` segundos) e grava cada grupo em uma única
+transação, fora do caminho da requisição.
+
+Com a fila cheia, `record` aguarda até `AUDIT_PUT_TIMEOUT` segundos por
+espaço (a página desacelera em vez de perder registros); passado esse tempo o
+registro é descartado e contado em `dropped` (informado no log). No
+encerramento do processo a fila é esvaziada antes de fechar o banco; se a
+gravação não avançar, o encerramento desiste após alguns segundos e informa no
+log quantos registros ficaram sem gravar.
+
+Se o banco ficar indisponível, o lote em gravação é descartado (e contado
+em `dropped`) e a conexão é reaberta no lote seguinte: a thread de gravação
+não morre nem deixa a fila encher. Se ainda assim parar, `record` a reinicia.
+
+Leituras (`recent`, `count`) usam conexões próprias, somente leitura: com WAL,
+não bloqueiam nem são bloqueadas pela gravação.
+
+Uso:
+    python -m src.audit [--limit 20]      # últimas predições registradas
+"""
+
+import argparse
+import atexit
+import json
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+from src.config import (
+    AUDIT_BATCH_SIZE, AUDIT_DB_PATH, AUDIT_ENABLED, AUDIT_FLUSH_INTERVAL, AUDIT_PUT_TIMEOUT, AUDIT_QUEUE_SIZE
+)
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS predictions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    created_at TEXT NOT NULL,
+    model_version TEXT,
+    predicted_class TEXT NOT NULL,
+    probability REAL NOT NULL,
+    probabilities TEXT NOT NULL,
+    inputs TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS predictions_created_at ON predictions (created_at);
+"""
+
+INSERT = """
+INSERT INTO predictions (created_at, model_version, predicted_class, probability, probabilities, inputs)
+VALUES (?, ?, ?, ?, ?, ?)
+"""
+
+_STOP = object()
+
+
+def connect(path=AUDIT_DB_PATH):
+    """Conexão ao banco de auditoria (cria o arquivo e a tabela se preciso), em modo WAL"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    connection = sqlite3.connect(path, timeout=30)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    connection.executescript(SCHEMA)
+    return connection
+
+
+def connect_readonly(path=AUDIT_DB_PATH):
+    """Conexão somente leitura ao banco de auditoria (não cria nem altera o arquivo)"""
+    return sqlite3.connect(f"{path.resolve().as_uri()}?mode=ro", uri=True, timeout=30)
+
+
+class AuditLog:
+    """Fila limitada de registros e thread que os grava em lotes no SQLite"""
+
+    def __init__(self, path=AUDIT_DB_PATH, queue_size=AUDIT_QUEUE_SIZE, batch_size=AUDIT_BATCH_SIZE,
+                 flush_interval=AUDIT_FLUSH_INTERVAL, put_timeout=AUDIT_PUT_TIMEOUT):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.put_timeout = put_timeout
+        self.written = 0
+        self.dropped = 0
+        self.batches = 0
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self._thread = None
+        atexit.register(self.close)
+
+    def start(self):
+        """Inicia a thread de gravação, ou a reinicia se tiver parado"""
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="audit", daemon=True)
+                self._thread.start()
+        return self._thread
+
+    def record(self, inputs, predicted_class, probabilities, model_version=None):
+        """Enfileira uma predição; devolve False se foi descartada por falta de espaço na fila
+
+        `inputs` são os campos do formulário e `probabilities` um dicionário classe -> probabilidade.
+        """
+        self.start()
+        row = (
+            datetime.now().isoformat(timespec='milliseconds'),
+            None if model_version is None else str(model_version),
+            str(predicted_class),
+            float(max(probabilities.values())),
+            json.dumps({str(k): round(float(v), 6) for k, v in probabilities.items()}),
+            json.dumps(inputs, ensure_ascii=False, default=str),
+        )
+        try:
+            self._queue.put(row, timeout=self.put_timeout)
+            return True
+        except queue.Full:
+            dropped = self._drop(1)
+            if dropped == 1 or dropped % 1000 == 0:
+                logger.error("fila de auditoria cheia: registro descartado (%d no total)", dropped)
+            return False
+
+    def _drop(self, count):
+        # Chamado pelas threads das requisições e pela de gravação: contagem sob o lock
+        with self._lock:
+            self.dropped += count
+            return self.dropped
+
+    def _next_batch(self):
+        # Bloqueia até o primeiro registro (ou o intervalo) e junta o que já estiver na fila
+        try:
+            batch = [self._queue.get(timeout=self.flush_interval)]
+        except queue.Empty:
+            return []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, connection, rows):
+        for attempt in range(3):
+            try:
+                with connection:
+                    connection.executemany(INSERT, rows)
+                break
+            except sqlite3.OperationalError as e:
+                if attempt == 2:
+                    logger.error("falha ao gravar %d registros de auditoria: %s", len(rows), e)
+                    self._drop(len(rows))
+                    return
+                time.sleep(0.1 * (attempt + 1))
+        self.written += len(rows)
+        self.batches += 1
+
+    def _run(self):
+        connection = None
+        try:
+            stopping = False
+            while not stopping:
+                batch = self._next_batch()
+                rows = [item for item in batch if item is not _STOP]
+                stopping = len(rows) < len(batch)
+                try:
+                    if rows:
+                        if connection is None:
+                            connection = connect(self.path)
+                        self._write(connection, rows)
+                except Exception as e:
+                    # Banco indisponível: descarta o lote e reabre a conexão no próximo
+                    logger.error("falha ao gravar %d registros de auditoria: %s", len(rows), e)
+                    self._drop(len(rows))
+                    if connection is not None:
+                        connection.close()
+                        connection = None
+                finally:
+                    for _ in batch:
+                        self._queue.task_done()
+        finally:
+            if connection is not None:
+                connection.close()
+
+    def flush(self):
+        """Aguarda a gravação de tudo o que já foi enfileirado"""
+        if self._thread is not None and self._thread.is_alive():
+            self._queue.join()
+
+    def close(self, timeout=10):
+        """Grava o que resta na fila e encerra a thread"""
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is None or not thread.is_alive():
+            return
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            logger.error("fila de auditoria cheia no encerramento: %d registros não gravados", self._queue.qsize())
+            return
+        thread.join(timeout)
+
+    def stats(self):
+        return {
+            'queued': self._queue.qsize(),
+            'written': self.written,
+            'dropped': self.dropped,
+            'batches': self.batches,
+        }
+
+
+def recent(limit=50, path=AUDIT_DB_PATH):
+    """Últimas `limit` predições registradas, da mais recente para a mais antiga"""
+    import pandas as pd
+
+    if not path.exists():
+        return pd.DataFrame(columns=['created_at', 'model_version', 'predicted_class', 'probability',
+                                     'probabilities', 'inputs'])
+    connection = connect_readonly(path)
+    try:
+        frame = pd.read_sql_query(
+            "SELECT created_at, model_version, predicted_class, probability, probabilities, inputs "
+            "FROM predictions ORDER BY id DESC LIMIT ?",
+            connection, params=(int(limit),)
+        )
+    finally:
+        connection.close()
+    frame['probabilities'] = frame['probabilities'].map(json.loads)
+    frame['inputs'] = frame['inputs'].map(json.loads)
+    return frame
+
+
+def count(path=AUDIT_DB_PATH):
+    """Total de predições registradas"""
+    if not path.exists():
+        return 0
+    connection = connect_readonly(path)
+    try:
+        return connection.execute("SELECT COUNT(*) FROM predictions").fetchone()[0]
+    finally:
+        connection.close()
+
+
+# Registro do processo, compartilhado por todas as sessões (desativado com AUDIT_ENABLED=0)
+log = AuditLog() if AUDIT_ENABLED else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Últimas predições do registro de auditoria")
+    parser.add_argument("--limit", type=int, default=20, help="Número de predições exibidas")
+    parser.add_argument("--db", default=AUDIT_DB_PATH, type=Path, help="Banco SQLite de auditoria")
+    args = parser.parse_args()
+
+    frame = recent(args.limit, args.db)
+    print(f"{count(args.db):,} predições registradas em {args.db}")
+    if len(frame):
+        print(frame[['created_at', 'model_version', 'predicted_class', 'probability']].to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
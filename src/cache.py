@@ -0,0 +1,88 @@
+"""Cache LRU com expiração (TTL), seguro para uso entre sessões concorrentes."""
+
+import threading
+import time
+from collections import OrderedDict
+
+_MISSING = object()
+
+
+class LRUCache:
+    """Cache limitado por número de entradas e por tempo de vida, com contadores de acerto
+
+    `group`, se informado, mapeia cada chave a um rótulo (ex.: nome do gráfico) para
+    contar acertos e falhas também por grupo.
+    """
+
+    def __init__(self, maxsize=1024, ttl=None, group=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.group = group
+        self.hits = 0
+        self.misses = 0
+        self._groups = {}
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key, _MISSING)
+            if entry is not _MISSING:
+                expires_at, value = entry
+                if expires_at is None or expires_at > now:
+                    self._data.move_to_end(key)
+                    self._count(key, hit=True)
+                    return value
+                del self._data[key]
+            self._count(key, hit=False)
+            return default
+
+    def _count(self, key, hit):
+        # Chamado com o lock adquirido
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+        if self.group is not None:
+            counts = self._groups.setdefault(self.group(key), [0, 0])
+            counts[0 if hit else 1] += 1
+
+    def put(self, key, value):
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def get_or_compute(self, key, compute):
+        """Devolve o valor em cache ou calcula (fora do lock) e armazena"""
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def group_stats(self):
+        """Acertos, falhas e taxa de acerto por grupo de chaves"""
+        with self._lock:
+            return {
+                name: {'hits': hits, 'misses': misses, 'hit_rate': hits / (hits + misses)}
+                for name, (hits, misses) in self._groups.items()
+            }
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+            }
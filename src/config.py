@@ -0,0 +1,63 @@
+"""Caminhos dos artefatos e parâmetros do projeto (ajustáveis por variáveis de ambiente)."""
+
+import os
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+
+RAW_DATA_PATH = ROOT_DIR / "Base" / "Obesity.csv"
+CLEAN_DATA_PATH = ROOT_DIR / "data" / "processed" / "obesity_data_clean.csv"
+CLEAN_PARQUET_PATH = ROOT_DIR / "data" / "processed" / "obesity_data_clean.parquet"
+
+MODELS_DIR = ROOT_DIR / "models"
+MODEL_PATH = MODELS_DIR / "obesity_risk_model_random_forest.joblib"
+MODEL_INFO_PATH = MODELS_DIR / "model_info.json"
+COMPILED_MODEL_PATH = MODELS_DIR / "obesity_risk_model_random_forest.npz"
+MMAP_MODEL_PATH = MODELS_DIR / "obesity_risk_model_random_forest.mmap"
+
+# Cache de predições individuais (entradas e tempo de vida em segundos)
+PREDICTION_CACHE_SIZE = int(os.environ.get("PREDICTION_CACHE_SIZE", 4096))
+PREDICTION_CACHE_TTL = float(os.environ.get("PREDICTION_CACHE_TTL", 3600))
+
+# Processos que explicam (TreeSHAP) os lotes enviados na página de Predição e pelo `python -m src.explain`
+EXPLAIN_WORKERS = int(os.environ.get("EXPLAIN_WORKERS", 2))
+
+# Acima deste número de pontos, o gráfico de dispersão do dashboard passa a ser agregado em células
+SCATTER_MAX_POINTS = int(os.environ.get("SCATTER_MAX_POINTS", 20000))
+
+# Cache de figuras do dashboard, compartilhado entre sessões (entradas e tempo de vida em segundos)
+FIGURE_CACHE_SIZE = int(os.environ.get("FIGURE_CACHE_SIZE", 256))
+FIGURE_CACHE_TTL = float(os.environ.get("FIGURE_CACHE_TTL", 1800))
+
+# Instrumentação de tempos por etapa (0 desativa), amostras mantidas por etapa e pasta de exportação
+TELEMETRY_ENABLED = os.environ.get("TELEMETRY_ENABLED", "1") not in ("0", "false", "False", "")
+TELEMETRY_WINDOW = int(os.environ.get("TELEMETRY_WINDOW", 2048))
+TELEMETRY_EXPORT_DIR = Path(os.environ.get("TELEMETRY_EXPORT_DIR", ROOT_DIR / "telemetry"))
+
+# Monitoramento de drift: intervalo entre verificações (s), predições mínimas por janela,
+# relatórios mantidos e limites do PSI para atenção e alerta
+DRIFT_CHECK_INTERVAL = float(os.environ.get("DRIFT_CHECK_INTERVAL", 300))
+DRIFT_MIN_SAMPLES = int(os.environ.get("DRIFT_MIN_SAMPLES", 100))
+DRIFT_HISTORY = int(os.environ.get("DRIFT_HISTORY", 288))
+DRIFT_PSI_WARNING = float(os.environ.get("DRIFT_PSI_WARNING", 0.1))
+DRIFT_PSI_ALERT = float(os.environ.get("DRIFT_PSI_ALERT", 0.25))
+
+# Registro de auditoria das predições (0 desativa): banco SQLite, tamanho da fila, registros por
+# transação, espera máxima por registros (s) e espera por espaço na fila cheia antes de descartar (s)
+AUDIT_ENABLED = os.environ.get("AUDIT_ENABLED", "1") not in ("0", "false", "False", "")
+AUDIT_DB_PATH = Path(os.environ.get("AUDIT_DB_PATH", ROOT_DIR / "audit" / "predictions.db"))
+AUDIT_QUEUE_SIZE = int(os.environ.get("AUDIT_QUEUE_SIZE", 10000))
+AUDIT_BATCH_SIZE = int(os.environ.get("AUDIT_BATCH_SIZE", 256))
+AUDIT_FLUSH_INTERVAL = float(os.environ.get("AUDIT_FLUSH_INTERVAL", 1.0))
+AUDIT_PUT_TIMEOUT = float(os.environ.get("AUDIT_PUT_TIMEOUT", 1.0))
+
+# Backend das consultas do dashboard: "memory" (dataset, cubo e bitsets em memória) ou "sql"
+# (agregações no banco SQLite gerado por python -m src.sqlstore)
+DASHBOARD_BACKEND = os.environ.get("DASHBOARD_BACKEND", "memory")
+SQL_DB_PATH = Path(os.environ.get("SQL_DB_PATH", ROOT_DIR / "data" / "processed" / "obesity_data.sqlite"))
+
+# Inferência em pool de processos (0 = no próprio processo do Streamlit), prazo por chamada (s)
+# e linhas por bloco enviado a cada processo
+INFERENCE_WORKERS = int(os.environ.get("INFERENCE_WORKERS", 0))
+INFERENCE_TIMEOUT = float(os.environ.get("INFERENCE_TIMEOUT", 30))
+INFERENCE_CHUNK_ROWS = int(os.environ.get("INFERENCE_CHUNK_ROWS", 8192))
@@ -0,0 +1,172 @@
+"""Busca contrafactual: o menor conjunto de mudanças de hábitos que reduz a classe prevista.
+
+O espaço de busca é discreto: cada hábito modificável tem opções ordenadas da
+menos para a mais saudável, e só mudanças no sentido saudável são propostas.
+Hábitos numéricos do formulário (dias de atividade física, horas de telas...)
+entram como as faixas que o modelo enxerga, com um valor representativo por
+faixa; mudar dentro da mesma faixa não altera a predição.
+
+A busca é em largura pelo número de mudanças: todos os candidatos de um nível
+são codificados juntos e avaliados em uma única chamada a `predict_proba`. Ela
+para no primeiro nível em que algum candidato reduz a classe (menor número de
+mudanças). Só contam como redução as classes entre a atual e o peso normal:
+nenhuma mudança é sugerida se levar a predição para abaixo do peso, e as
+soluções mais próximas do peso normal vêm primeiro. Só são expandidos os
+candidatos que aumentaram a probabilidade das classes melhores em relação ao
+candidato de origem (os demais são dominados), e no máximo `MAX_FRONTIER` por
+nível.
+"""
+
+import time
+
+import numpy as np
+
+from src.features import (
+    ACTIVITY_DAYS_EDGES, OBESITY_LEVELS, TECHNOLOGY_HOURS_EDGES, VEGETABLE_EDGES, WATER_EDGES, encode_form
+)
+
+HEALTHY_LEVEL = OBESITY_LEVELS.index('Normal_Weight')
+
+MAX_CHANGES = 3
+MAX_FRONTIER = 64
+MAX_RESULTS = 3
+
+
+class Habit:
+    """Hábito modificável: opções do formulário em ordem crescente de saúde"""
+
+    def __init__(self, name, label, values, texts, position):
+        self.name = name
+        self.label = label
+        self.values = values
+        self.texts = texts
+        self._position = position
+
+    def position(self, value):
+        """Posição da opção (faixa) em que o valor atual do formulário cai"""
+        return self._position(value)
+
+
+def _numeric(name, label, edges, values, texts, healthier_is_higher=True):
+    # Faixas em ordem crescente; para hábitos em que menos é melhor, a ordem é invertida
+    def position(value):
+        band = int(np.digitize(value, edges))
+        return band if healthier_is_higher else len(edges) - band
+
+    if not healthier_is_higher:
+        values, texts = values[::-1], texts[::-1]
+    return Habit(name, label, values, texts, position)
+
+
+def _categorical(name, label, options):
+    return Habit(name, label, options, options, options.index)
+
+
+HABITS = [
+    _numeric('faf', 'Atividade física', ACTIVITY_DAYS_EDGES, [0.0, 1.0, 2.0, 3.0],
+             ['nenhuma', '1 dia/semana', '2 dias/semana', '3 ou mais dias/semana']),
+    _numeric('fcvc', 'Consumo de vegetais', VEGETABLE_EDGES, [1.0, 2.0, 3.0],
+             ['raramente', 'às vezes', 'sempre']),
+    _numeric('ch2o', 'Consumo de água', WATER_EDGES, [1.0, 2.0, 3.0],
+             ['até 1,5 L/dia', 'cerca de 2 L/dia', '2,5 L/dia ou mais']),
+    _numeric('tue', 'Tempo de telas', TECHNOLOGY_HOURS_EDGES, [1.0, 3.0, 6.0],
+             ['menos de 2 h/dia', '2 a 4 h/dia', '4,5 h/dia ou mais'], healthier_is_higher=False),
+    _categorical('caec', 'Comer entre refeições', ['Sempre', 'Frequentemente', 'Às vezes', 'Não']),
+    _categorical('calc', 'Consumo de álcool', ['Sempre', 'Frequentemente', 'Às vezes', 'Não']),
+    _categorical('mtrans', 'Meio de transporte',
+                 ['Automóvel', 'Motocicleta', 'Transporte Público', 'Bicicleta', 'Caminhando']),
+    _categorical('favc', 'Alimentos calóricos frequentes', ['Sim', 'Não']),
+]
+
+
+def _evaluate(model, inputs, candidates):
+    """Probabilidades de todos os candidatos (listas de (hábito, posição)) em uma única chamada"""
+    columns = {name: np.full(len(candidates), value, dtype=object if isinstance(value, str) else np.float64)
+               for name, value in inputs.items()}
+    for row, changes in enumerate(candidates):
+        for habit, position in changes:
+            columns[HABITS[habit].name][row] = HABITS[habit].values[position]
+    return model.predict_proba(encode_form(**columns))
+
+
+def search(model, inputs, max_changes=MAX_CHANGES, max_frontier=MAX_FRONTIER, max_results=MAX_RESULTS):
+    """Menores conjuntos de mudanças saudáveis que reduzem a classe prevista para `inputs`
+
+    `inputs` traz os valores de todos os campos do formulário (argumentos de `encode_form`).
+    Devolve um dicionário com a classe atual, as soluções (mudanças, classe e probabilidade
+    resultantes), o número de candidatos avaliados e de chamadas ao modelo, e o tempo gasto.
+    """
+    start = time.perf_counter()
+    # Severidade de cada coluna de predict_proba (posição em OBESITY_LEVELS)
+    severity = np.array([OBESITY_LEVELS.index(c) for c in model.classes_])
+
+    base = model.predict_proba(encode_form(**inputs))[0]
+    current = int(severity[base.argmax()])
+    report = {
+        'current_class': OBESITY_LEVELS[current],
+        'solutions': [],
+        'evaluated': 1,
+        'calls': 1,
+    }
+    if current <= HEALTHY_LEVEL:
+        report['elapsed_ms'] = (time.perf_counter() - start) * 1000
+        return report
+
+    # Classes melhores: abaixo da atual, mas sem passar do peso normal para abaixo do peso
+    better = (severity < current) & (severity >= HEALTHY_LEVEL)
+    positions = [habit.position(inputs[habit.name]) for habit in HABITS]
+
+    # Fronteira: (mudanças [(hábito, posição)], probabilidade das classes melhores)
+    frontier = [((), float(base[better].sum()))]
+    seen = set()
+    for _ in range(max_changes):
+        candidates, parents = [], []
+        for changes, score in frontier:
+            changed = {habit for habit, _ in changes}
+            for habit in range(len(HABITS)):
+                if habit in changed:
+                    continue
+                for position in range(positions[habit] + 1, len(HABITS[habit].values)):
+                    candidate = tuple(sorted(changes + ((habit, position),)))
+                    if candidate not in seen:
+                        seen.add(candidate)
+                        candidates.append(candidate)
+                        parents.append(score)
+        if not candidates:
+            break
+
+        probabilities = _evaluate(model, inputs, candidates)
+        report['evaluated'] += len(candidates)
+        report['calls'] += 1
+        predicted = severity[probabilities.argmax(axis=1)]
+        scores = probabilities[:, better].sum(axis=1)
+
+        solved = np.flatnonzero((predicted < current) & (predicted >= HEALTHY_LEVEL))
+        if len(solved):
+            # Mais perto do peso normal, depois menos passos entre faixas, depois maior confiança
+            steps = [sum(p - positions[h] for h, p in candidates[i]) for i in solved]
+            order = sorted(range(len(solved)), key=lambda k: (
+                predicted[solved[k]], steps[k], -probabilities[solved[k]].max()
+            ))
+            for k in order[:max_results]:
+                i = solved[k]
+                report['solutions'].append({
+                    'changes': [
+                        (HABITS[h].label, HABITS[h].texts[positions[h]], HABITS[h].texts[p])
+                        for h, p in candidates[i]
+                    ],
+                    'inputs': {HABITS[h].name: HABITS[h].values[p] for h, p in candidates[i]},
+                    'predicted_class': OBESITY_LEVELS[predicted[i]],
+                    'probability': float(probabilities[i].max()),
+                })
+            break
+
+        # Poda: só continuam candidatos que melhoraram em relação à origem, os melhores primeiro
+        improved = np.flatnonzero(scores > np.asarray(parents))
+        improved = improved[np.argsort(-scores[improved], kind='stable')][:max_frontier]
+        frontier = [(candidates[i], float(scores[i])) for i in improved]
+        if not frontier:
+            break
+
+    report['elapsed_ms'] = (time.perf_counter() - start) * 1000
+    return report
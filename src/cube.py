@@ -0,0 +1,185 @@
+"""Cubo de contagens pré-agregadas para o dashboard.
+
+O dataset é reduzido uma única vez (por versão dos dados) a arrays densos de
+contagens e somas indexados por (gênero, idade, nível de obesidade, ...).
+Os filtros de gênero e idade viram fatias desses arrays, de modo que KPIs,
+gráficos e heatmaps custam tempo proporcional ao número de células, e não ao
+número de pacientes.
+"""
+
+import numpy as np
+import pandas as pd
+
+from src.features import CATEGORIES, OBESITY_LEVELS, OBESITY_TYPES
+
+BINARY_CATEGORIES = [0, 1]
+
+# Hábitos empilhados em uma única tabela (gênero, idade, nível, hábito:categoria)
+HABIT_COLUMNS = [
+    'vegetable_consumption_freq', 'water_intake', 'main_meals_per_day', 'food_between_meals',
+    'physical_activity_freq', 'technology_use_time', 'transportation_mode', 'frequent_high_caloric_food'
+]
+
+# Cor do gráfico de dispersão IMC x idade, agregado por (idade, IMC) quando há muitos pontos
+DENSITY_COLUMN = 'physical_activity_freq'
+
+# Linhas agregadas por vez na construção do cubo (limita a memória dos códigos intermediários)
+BUILD_CHUNK_ROWS = 1_000_000
+
+
+def categories_of(column):
+    return CATEGORIES.get(column, BINARY_CATEGORIES)
+
+
+# Posição de cada hábito no eixo empilhado de categorias
+HABIT_SIZES = [len(categories_of(c)) for c in HABIT_COLUMNS]
+HABIT_OFFSETS = np.concatenate([[0], np.cumsum(HABIT_SIZES)[:-1]]).astype(np.int64)
+HABIT_INDEX = pd.MultiIndex.from_tuples(
+    [(column, category) for column in HABIT_COLUMNS for category in categories_of(column)],
+    names=['habit', 'category']
+)
+
+
+def category_codes(series, categories):
+    """Códigos inteiros de uma coluna segundo uma lista fixa de categorias (-1 se desconhecida)"""
+    if isinstance(series.dtype, pd.CategoricalDtype) and list(series.cat.categories) == list(categories):
+        return series.cat.codes.to_numpy(dtype=np.int64)
+    return pd.Index(categories).get_indexer(series.to_numpy())
+
+
+class CountCube:
+    """Contagens e somas do dataset por (gênero, idade, nível de obesidade, hábito)"""
+
+    def __init__(self, df):
+        age = df['age'].to_numpy(dtype=np.int64)
+        self.age_min = int(age.min()) if len(age) else 0
+        self.ages = np.arange(self.age_min, int(age.max()) + 1 if len(age) else 1)
+        self.levels = np.asarray(OBESITY_LEVELS, dtype=object)
+        self.n_rows = len(df)
+        bmi = df['bmi'].to_numpy(dtype=np.int64)
+        self.bmi_min = int(bmi.min()) if len(bmi) else 0
+        self.bmis = np.arange(self.bmi_min, int(bmi.max()) + 1 if len(bmi) else 1)
+
+        base_shape = (2, len(self.ages), len(self.levels))
+        self.counts = np.zeros(base_shape, dtype=np.int64)
+        self.bmi_sum = np.zeros(base_shape, dtype=np.float64)
+        self.habit_counts = np.zeros(base_shape + (len(HABIT_INDEX),), dtype=np.int64)
+        self.density = np.zeros(
+            (2, len(self.ages), len(categories_of(DENSITY_COLUMN)), len(self.bmis)), dtype=np.int64
+        )
+
+        for start in range(0, len(df), BUILD_CHUNK_ROWS):
+            self._add(df.iloc[start:start + BUILD_CHUNK_ROWS], base_shape)
+
+    def _add(self, df, base_shape):
+        """Acumula um bloco de linhas em todas as tabelas"""
+        gender = df['gender'].to_numpy(dtype=np.int64)
+        level = category_codes(df['obesity_level'], OBESITY_LEVELS)
+        valid = (level >= 0) & np.isin(gender, BINARY_CATEGORIES)
+
+        # Célula base (gênero, idade, nível) de cada linha válida
+        base = np.ravel_multi_index(
+            [gender[valid], df['age'].to_numpy(dtype=np.int64)[valid] - self.age_min, level[valid]], base_shape
+        )
+        n_base = int(np.prod(base_shape))
+        self.counts += np.bincount(base, minlength=n_base).reshape(base_shape)
+        self.bmi_sum += np.bincount(
+            base, weights=df['bmi'].to_numpy(dtype=np.float64)[valid], minlength=n_base
+        ).reshape(base_shape)
+
+        # Todos os hábitos em uma única passada: código de cada hábito deslocado para o eixo empilhado
+        habit_codes = np.stack([category_codes(df[c], categories_of(c))[valid] for c in HABIT_COLUMNS])
+        stacked = base * len(HABIT_INDEX) + habit_codes + HABIT_OFFSETS[:, None]
+        self.habit_counts += np.bincount(
+            stacked[habit_codes >= 0], minlength=self.habit_counts.size
+        ).reshape(self.habit_counts.shape)
+
+        # Dispersão agregada: (gênero, idade, atividade física, IMC)
+        activity = category_codes(df[DENSITY_COLUMN], categories_of(DENSITY_COLUMN))[valid]
+        known = activity >= 0
+        cell = np.ravel_multi_index([
+            gender[valid][known], df['age'].to_numpy(dtype=np.int64)[valid][known] - self.age_min,
+            activity[known], df['bmi'].to_numpy(dtype=np.int64)[valid][known] - self.bmi_min
+        ], self.density.shape)
+        self.density += np.bincount(cell, minlength=self.density.size).reshape(self.density.shape)
+
+    @property
+    def nbytes(self):
+        return sum(a.nbytes for a in (self.counts, self.bmi_sum, self.habit_counts, self.density))
+
+    def select(self, genders, age_range):
+        """Fatia do cubo para os gêneros e a faixa etária (inclusiva) escolhidos"""
+        genders = sorted(g for g in genders if g in BINARY_CATEGORIES)
+        start = max(age_range[0] - self.age_min, 0)
+        stop = max(age_range[1] - self.age_min + 1, start)
+        return CubeSlice(self, genders, self.ages[start:stop], (genders, slice(start, stop)))
+
+
+class CubeSlice:
+    """Agregados de uma seleção de gênero e idade, obtidos somando células do cubo"""
+
+    def __init__(self, cube, genders, ages, index):
+        self.cube = cube
+        self.genders = genders
+        self.ages = ages
+        self._index = index
+
+        counts = cube.counts[index]                      # (gêneros, idades, níveis)
+        self.gender_level = counts.sum(axis=1)           # (gêneros, níveis)
+        self.age_counts = counts.sum(axis=(0, 2))        # (idades,)
+        self.level_counts = self.gender_level.sum(axis=0)
+        self.total = int(self.level_counts.sum())
+        self.bmi_total = float(cube.bmi_sum[index].sum())
+
+    def _sum(self, table):
+        # Soma sobre gênero e idade, mantendo nível e dimensões seguintes
+        return table[self._index].sum(axis=(0, 1))
+
+    @property
+    def mean_age(self):
+        return float(self.age_counts @ self.ages / self.total) if self.total else float('nan')
+
+    @property
+    def mean_bmi(self):
+        return self.bmi_total / self.total if self.total else float('nan')
+
+    @property
+    def obesity_rate(self):
+        obese = np.isin(self.cube.levels, OBESITY_TYPES)
+        return float(self.level_counts[obese].sum() / self.total * 100) if self.total else float('nan')
+
+    def level_counts_series(self):
+        """Contagem por nível (apenas níveis presentes), em ordem decrescente como value_counts"""
+        series = pd.Series(self.level_counts, index=self.cube.levels)
+        return series[series > 0].sort_values(ascending=False, kind='stable')
+
+    def gender_level_frame(self, labels):
+        """Tabela gênero x nível (equivalente a pd.crosstab), sem linhas ou colunas vazias"""
+        frame = pd.DataFrame(self.gender_level, index=[labels[g] for g in self.genders], columns=self.cube.levels)
+        return frame.loc[frame.sum(axis=1) > 0, frame.sum(axis=0) > 0]
+
+    def age_counts_series(self):
+        return pd.Series(self.age_counts, index=self.ages)
+
+    def habit_matrix(self):
+        """% de cada categoria de cada hábito dentro de cada nível, para todos os hábitos de uma vez
+
+        Linhas: níveis presentes na seleção; colunas: MultiIndex (hábito, categoria),
+        sem categorias ausentes (equivale a um pd.crosstab normalizado por linha por hábito).
+        """
+        counts = self._sum(self.cube.habit_counts)       # (níveis, categorias empilhadas)
+        present = self.level_counts > 0
+        percentages = counts[present] / self.level_counts[present, None] * 100
+        frame = pd.DataFrame(percentages, index=self.cube.levels[present], columns=HABIT_INDEX)
+        return frame.loc[:, counts[present].sum(axis=0) > 0]
+
+    def density_frame(self):
+        """Pacientes por (atividade física, idade, IMC), apenas células não vazias"""
+        counts = self.cube.density[self._index].sum(axis=0)     # (idades, atividade, IMC)
+        age, activity, bmi = np.nonzero(counts)
+        return pd.DataFrame({
+            DENSITY_COLUMN: pd.Categorical.from_codes(activity, categories_of(DENSITY_COLUMN)),
+            'age': self.ages[age],
+            'bmi': self.cube.bmis[bmi],
+            'count': counts[age, activity, bmi],
+        })
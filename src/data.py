@@ -0,0 +1,82 @@
+"""Leitura do dataset processado usado pelo dashboard.
+
+O DataFrame carregado é compartilhado entre sessões e tratado como somente
+leitura: filtros produzem índices de linhas, e apenas as colunas efetivamente
+plotadas são copiadas para as linhas selecionadas.
+"""
+
+import numpy as np
+import pandas as pd
+
+from src.config import CLEAN_DATA_PATH, CLEAN_PARQUET_PATH
+from src.etl import COLUMNAR_DTYPES
+
+# Colunas consultadas pelo dashboard
+DASHBOARD_COLUMNS = [
+    'age', 'gender', 'bmi', 'obesity_level', 'main_meals_per_day', 'vegetable_consumption_freq',
+    'water_intake', 'food_between_meals', 'physical_activity_freq', 'technology_use_time',
+    'transportation_mode', 'frequent_high_caloric_food', 'family_history_overweight'
+]
+
+
+def load_clean_data(columns=DASHBOARD_COLUMNS, parquet_path=CLEAN_PARQUET_PATH, csv_path=CLEAN_DATA_PATH):
+    """Lê apenas as colunas pedidas, do Parquet (mapeado em memória) ou, na falta dele, do CSV"""
+    if parquet_path.exists():
+        return pd.read_parquet(parquet_path, columns=columns, memory_map=True)
+
+    df = pd.read_csv(csv_path, usecols=columns)[columns]
+    return df.astype({c: t for c, t in COLUMNAR_DTYPES.items() if c in columns})
+
+
+def data_version(parquet_path=CLEAN_PARQUET_PATH, csv_path=CLEAN_DATA_PATH):
+    """Identificador da versão do dataset processado (muda quando o arquivo é regravado)"""
+    path = parquet_path if parquet_path.exists() else csv_path
+    stat = path.stat()
+    return f"{path.name}-{stat.st_mtime_ns}-{stat.st_size}"
+
+
+def filter_rows(df, genders, age_range):
+    """Índices das linhas que atendem aos filtros de gênero e faixa etária (inclusiva)"""
+    age = df['age'].to_numpy()
+    mask = np.isin(df['gender'].to_numpy(), genders)
+    mask &= (age >= age_range[0]) & (age <= age_range[1])
+    return np.flatnonzero(mask).astype(np.int32 if len(df) < 2 ** 31 else np.int64)
+
+
+def scatter_jitter(n_rows, seed=42):
+    """Deslocamentos fixos por linha para o gráfico de dispersão (idade ±0,3; IMC ±0,2)
+
+    Gerados uma vez por versão dos dados, para que cada paciente fique sempre no mesmo ponto.
+    """
+    rng = np.random.default_rng(seed)
+    return (rng.uniform(-0.3, 0.3, n_rows).astype(np.float32),
+            rng.uniform(-0.2, 0.2, n_rows).astype(np.float32))
+
+
+def row_jitter(row_ids):
+    """Deslocamentos fixos (idade ±0,3; IMC ±0,2) derivados do identificador de cada linha
+
+    Alternativa a `scatter_jitter` quando o dataset não está em memória (backend SQL): cada
+    identificador é embaralhado por um hash multiplicativo, sem guardar um valor por paciente.
+    """
+    x = np.asarray(row_ids, dtype=np.uint64) * np.uint64(0x9E3779B97F4A7C15)
+    x ^= x >> np.uint64(29)
+    x *= np.uint64(0xBF58476D1CE4E5B9)
+    x ^= x >> np.uint64(32)
+    u = (x >> np.uint64(40)).astype(np.float32) / 2 ** 24
+    v = (x & np.uint64(0xFFFFFF)).astype(np.float32) / 2 ** 24
+    return (u * 0.6 - 0.3).astype(np.float32), (v * 0.4 - 0.2).astype(np.float32)
+
+
+def take_columns(df, rows, columns):
+    """Novo DataFrame só com `columns` nas linhas `rows` (sem copiar as demais colunas)"""
+    return pd.DataFrame({c: df[c].take(rows).reset_index(drop=True) for c in columns})
+
+
+def nbytes(obj):
+    """Memória ocupada por um DataFrame, Series ou array, em bytes"""
+    if isinstance(obj, pd.DataFrame):
+        return int(obj.memory_usage(index=True, deep=True).sum())
+    if isinstance(obj, pd.Series):
+        return int(obj.memory_usage(index=True, deep=True))
+    return int(getattr(obj, 'nbytes', 0))
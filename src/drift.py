@@ -0,0 +1,279 @@
+"""Monitoramento de drift das entradas servidas, em memória constante.
+
+Cada predição servida atualiza esboços de tamanho fixo: contagens por faixa de
+idade e de IMC (limites nos decis do dataset de treino), por categoria de cada
+variável categórica e binária e por classe prevista. A atualização é um
+`np.bincount` por variável, com custo independente do volume já servido, e a
+memória não cresce com o tráfego.
+
+A cada `DRIFT_CHECK_INTERVAL` segundos uma thread de fundo compara a janela de
+predições desde a última verificação com a referência de treino (as mesmas
+faixas, calculadas uma vez por versão do dataset processado): PSI e teste
+qui-quadrado de aderência por variável. Janelas com menos de
+`DRIFT_MIN_SAMPLES` predições continuam acumulando até a verificação seguinte.
+Os relatórios ficam em um histórico de tamanho fixo.
+"""
+
+import logging
+import multiprocessing
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from src.config import (
+    DRIFT_CHECK_INTERVAL, DRIFT_HISTORY, DRIFT_MIN_SAMPLES, DRIFT_PSI_ALERT, DRIFT_PSI_WARNING
+)
+from src.features import CATEGORIES, OBESITY_LEVELS, TARGET_COLUMN
+
+logger = logging.getLogger(__name__)
+
+NUMERIC_COLUMNS = ['age', 'bmi']
+BINARY_COLUMNS = [
+    'gender', 'frequent_high_caloric_food', 'smoker', 'calorie_monitoring', 'family_history_overweight'
+]
+CATEGORICAL_COLUMNS = list(CATEGORIES)
+PREDICTION_COLUMN = 'predicted_class'
+
+# Colunas do dataset processado lidas para montar a referência
+REFERENCE_COLUMNS = NUMERIC_COLUMNS + BINARY_COLUMNS + CATEGORICAL_COLUMNS + [TARGET_COLUMN]
+
+NUMERIC_BINS = 10
+
+# Proporção mínima de cada faixa no PSI (evita log de zero em faixas vazias)
+EPSILON = 1e-4
+
+STATUS_OK = 'estável'
+STATUS_WARNING = 'atenção'
+STATUS_ALERT = 'alerta'
+
+
+def _interval_labels(edges):
+    edges = [f"{e:g}" for e in edges]
+    return [f"< {edges[0]}"] + [f"{a}–{b}" for a, b in zip(edges, edges[1:])] + [f"≥ {edges[-1]}"]
+
+
+class DriftReference:
+    """Faixas e contagens de referência de cada variável, calculadas sobre o dataset de treino"""
+
+    def __init__(self, df):
+        self.edges = {}
+        self.labels = {}
+        for column in NUMERIC_COLUMNS:
+            values = df[column].to_numpy(dtype=np.float64)
+            edges = np.unique(np.quantile(values, np.linspace(0, 1, NUMERIC_BINS + 1)[1:-1]))
+            self.edges[column] = edges
+            self.labels[column] = _interval_labels(edges)
+        for column in BINARY_COLUMNS:
+            self.labels[column] = ['0', '1']
+        for column in CATEGORICAL_COLUMNS:
+            self.labels[column] = list(CATEGORIES[column])
+        self.labels[PREDICTION_COLUMN] = list(OBESITY_LEVELS)
+
+        self._categories = {c: pd.Index(self.labels[c]) for c in CATEGORICAL_COLUMNS + [PREDICTION_COLUMN]}
+        self.counts = self.bin_counts(df, df[TARGET_COLUMN])
+        self.n = len(df)
+
+    def codes(self, column, values):
+        """Faixa ou categoria (0..k-1) de cada valor; -1 para categorias desconhecidas"""
+        if column in self.edges:
+            return np.searchsorted(self.edges[column], np.asarray(values, dtype=np.float64), side='right')
+        if column in BINARY_COLUMNS:
+            return np.asarray(values, dtype=np.int64)
+        categories = self._categories[column]
+        dtype = getattr(values, 'dtype', None)
+        if isinstance(dtype, pd.CategoricalDtype) and dtype.categories.equals(categories):
+            return values.array.codes
+        return categories.get_indexer(np.asarray(values, dtype=object))
+
+    def bin_counts(self, features, predicted):
+        """Contagens por faixa/categoria de cada variável (e da classe prevista) de um lote"""
+        counts = {}
+        for column, labels in self.labels.items():
+            codes = self.codes(column, predicted if column == PREDICTION_COLUMN else features[column])
+            codes = codes[(codes >= 0) & (codes < len(labels))]
+            counts[column] = np.bincount(codes, minlength=len(labels))
+        return counts
+
+
+class Sketch:
+    """Contagens de tamanho fixo por faixa/categoria de cada variável"""
+
+    def __init__(self, reference):
+        self.counts = {column: np.zeros(len(labels), dtype=np.int64) for column, labels in reference.labels.items()}
+        self.n = 0
+
+    def add(self, counts, n):
+        for column, values in counts.items():
+            self.counts[column] += values
+        self.n += n
+
+    def copy(self, reference):
+        sketch = Sketch(reference)
+        sketch.add(self.counts, self.n)
+        return sketch
+
+    @property
+    def nbytes(self):
+        return sum(c.nbytes for c in self.counts.values())
+
+
+def _proportions(counts):
+    p = np.maximum(counts / max(counts.sum(), 1), EPSILON)
+    return p / p.sum()
+
+
+def psi(observed, expected):
+    """Population Stability Index entre contagens observadas e de referência"""
+    p, q = _proportions(observed), _proportions(expected)
+    return float(np.sum((p - q) * np.log(p / q)))
+
+
+def chi_square(observed, expected):
+    """Estatística e p-valor do teste qui-quadrado de aderência às proporções de referência"""
+    from scipy.stats import chi2
+
+    q = _proportions(expected)
+    n = observed.sum()
+    statistic = float(np.sum((observed - n * q) ** 2 / (n * q)))
+    return statistic, float(chi2.sf(statistic, len(q) - 1))
+
+
+def status(value, warning=DRIFT_PSI_WARNING, alert=DRIFT_PSI_ALERT):
+    if value >= alert:
+        return STATUS_ALERT
+    if value >= warning:
+        return STATUS_WARNING
+    return STATUS_OK
+
+
+def compare(sketch, reference):
+    """PSI, qui-quadrado e situação de cada variável, da maior para a menor mudança"""
+    rows = []
+    for column in reference.labels:
+        observed, expected = sketch.counts[column], reference.counts[column]
+        value = psi(observed, expected)
+        statistic, p_value = chi_square(observed, expected) if sketch.n else (0.0, 1.0)
+        rows.append({
+            'feature': column,
+            'psi': value,
+            'chi2': statistic,
+            'p_value': p_value,
+            'status': status(value),
+        })
+    return sorted(rows, key=lambda row: -row['psi'])
+
+
+class DriftMonitor:
+    """Esboços das predições servidas e verificações periódicas contra a referência de treino"""
+
+    def __init__(self, load_reference, interval=DRIFT_CHECK_INTERVAL, min_samples=DRIFT_MIN_SAMPLES,
+                 history=DRIFT_HISTORY):
+        self._load_reference = load_reference
+        self.interval = interval
+        self.min_samples = min_samples
+        self.history = deque(maxlen=history)
+        self._lock = threading.Lock()
+        self._reference = None
+        self._window = None
+        self._total = None
+        self._thread = None
+
+    def reference(self):
+        """Referência da versão atual dos dados; uma nova versão zera os esboços (as faixas mudam)"""
+        reference = self._load_reference()
+        if reference is not self._reference:
+            with self._lock:
+                if reference is not self._reference:
+                    self._reference = reference
+                    self._window = Sketch(reference)
+                    self._total = Sketch(reference)
+                    self.history.clear()
+        return reference
+
+    def observe(self, features, predicted_classes):
+        """Registra um lote servido (features de `encode_form` e classes previstas)
+
+        Falhas são apenas registradas no log: o monitoramento nunca interrompe a predição.
+        """
+        try:
+            reference = self.reference()
+            counts = reference.bin_counts(features, predicted_classes)
+            with self._lock:
+                if reference is self._reference:
+                    self._window.add(counts, len(features))
+                    self._total.add(counts, len(features))
+        except Exception as e:
+            logger.warning("monitoramento de drift falhou: %s", e)
+
+    def snapshot(self):
+        """(referência, cópia da janela atual, cópia do acumulado desde o início)"""
+        reference = self.reference()
+        with self._lock:
+            return reference, self._window.copy(reference), self._total.copy(reference)
+
+    def check(self):
+        """Compara a janela atual com a referência e abre uma nova janela
+
+        Devolve o relatório, ou None se a janela ainda tem menos de `min_samples` predições.
+        """
+        reference = self.reference()
+        with self._lock:
+            window = self._window
+            if window.n < self.min_samples:
+                return None
+            self._window = Sketch(reference)
+
+        features = compare(window, reference)
+        report = {
+            'time': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            'samples': window.n,
+            'max_psi': features[0]['psi'],
+            'features': features,
+        }
+        for row in features:
+            if row['status'] != STATUS_OK:
+                logger.warning("drift em %s: PSI %.3f (%s)", row['feature'], row['psi'], row['status'])
+        with self._lock:
+            self.history.append(report)
+        return report
+
+    def reset(self):
+        with self._lock:
+            self._reference = None
+            self.history.clear()
+
+    def nbytes(self):
+        with self._lock:
+            return self._window.nbytes + self._total.nbytes if self._window is not None else 0
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            try:
+                self.check()
+            except Exception as e:
+                logger.warning("verificação de drift falhou: %s", e)
+
+    def start(self):
+        """Inicia (uma única vez) a thread de verificações periódicas; sem efeito nos processos
+        do pool de inferência, que reimportam o script da página"""
+        if multiprocessing.current_process().name != 'MainProcess':
+            return None
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="drift", daemon=True)
+                self._thread.start()
+        return self._thread
+
+
+def _load_reference():
+    from src import startup
+    return startup.drift_reference.get()
+
+
+# Monitor do processo, compartilhado por todas as sessões
+monitor = DriftMonitor(_load_reference)
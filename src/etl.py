@@ -0,0 +1,116 @@
+"""ETL em streaming do dataset bruto (Base/Obesity.csv) para o formato processado.
+
+O CSV bruto é lido em blocos de tamanho fixo, de modo que a memória usada não
+depende do tamanho do arquivo. Cada bloco é limpo com `src.features.clean_raw`
+e gravado no CSV processado e/ou em Parquet tipado (categorias como dicionário,
+flags int8, medidas float32), que o dashboard lê apenas nas colunas necessárias.
+
+Uso:
+    python -m src.etl [--raw Base/Obesity.csv] [--csv data/processed/obesity_data_clean.csv]
+                      [--parquet data/processed/obesity_data_clean.parquet] [--chunksize 100000]
+"""
+
+import argparse
+import os
+from pathlib import Path
+
+import pandas as pd
+
+from src.config import CLEAN_DATA_PATH, CLEAN_PARQUET_PATH, RAW_DATA_PATH
+from src.features import CATEGORIES, CLEAN_COLUMNS, OBESITY_LEVELS, RAW_COLUMNS, RAW_DTYPES, clean_raw
+
+DEFAULT_CHUNKSIZE = 100_000
+
+# Tipos compactos do formato colunar
+COLUMNAR_DTYPES = {
+    'age': 'int16',
+    'height': 'float32',
+    'weight': 'float32',
+    'gender': 'int8',
+    'frequent_high_caloric_food': 'int8',
+    'smoker': 'int8',
+    'calorie_monitoring': 'int8',
+    'family_history_overweight': 'int8',
+    'obesity_level': pd.CategoricalDtype(OBESITY_LEVELS),
+    'bmi': 'int16',
+    **{name: pd.CategoricalDtype(labels) for name, labels in CATEGORIES.items()},
+}
+
+
+def read_raw_chunks(raw_path, chunksize=DEFAULT_CHUNKSIZE):
+    """Lê o CSV bruto em blocos, apenas com as colunas usadas"""
+    return pd.read_csv(
+        raw_path, usecols=lambda c: c in RAW_COLUMNS or c == 'Obesity',
+        dtype={**RAW_DTYPES, 'Obesity': 'category'}, chunksize=chunksize
+    )
+
+
+def to_columnar(clean):
+    """Converte um bloco processado para os tipos compactos do formato colunar"""
+    return clean.astype({c: t for c, t in COLUMNAR_DTYPES.items() if c in clean.columns})
+
+
+def _tmp_path(path):
+    """Arquivo temporário no mesmo diretório do destino, para substituí-lo de uma vez ao final"""
+    path = Path(path)
+    return path.with_name(f"{path.name}.tmp-{os.getpid()}")
+
+
+def run(raw_path=RAW_DATA_PATH, csv_path=CLEAN_DATA_PATH, parquet_path=CLEAN_PARQUET_PATH,
+        chunksize=DEFAULT_CHUNKSIZE):
+    """Processa o CSV bruto em blocos, gravando as saídas informadas; devolve o número de linhas
+
+    As saídas são gravadas em arquivos temporários e só substituem as anteriores quando o
+    processamento termina, de modo que leitores nunca veem um arquivo pela metade.
+    """
+    outputs = {path: _tmp_path(path) for path in (csv_path, parquet_path) if path}
+    writer = None
+    total = 0
+    try:
+        for i, chunk in enumerate(read_raw_chunks(raw_path, chunksize)):
+            clean = clean_raw(chunk)
+            clean = clean[[c for c in CLEAN_COLUMNS if c in clean.columns]]
+
+            if csv_path:
+                clean.to_csv(outputs[csv_path], mode='w' if i == 0 else 'a', header=(i == 0), index=False)
+
+            if parquet_path:
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+
+                table = pa.Table.from_pandas(to_columnar(clean), preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(outputs[parquet_path], table.schema, compression='zstd')
+                writer.write_table(table)
+
+            total += len(clean)
+
+        if writer is not None:
+            writer.close()
+            writer = None
+        for path, tmp in outputs.items():
+            if tmp.exists():
+                os.replace(tmp, path)
+    finally:
+        if writer is not None:
+            writer.close()
+        for tmp in outputs.values():
+            tmp.unlink(missing_ok=True)
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera o dataset processado a partir do dataset bruto")
+    parser.add_argument("--raw", default=RAW_DATA_PATH, help="CSV no formato de Base/Obesity.csv")
+    parser.add_argument("--csv", default=CLEAN_DATA_PATH, help="CSV processado de saída ('' para não gerar)")
+    parser.add_argument("--parquet", default=CLEAN_PARQUET_PATH, help="Parquet de saída ('' para não gerar)")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE, help="Linhas lidas por bloco")
+    args = parser.parse_args()
+
+    rows = run(args.raw, args.csv, args.parquet, args.chunksize)
+    outputs = [str(p) for p in (args.csv, args.parquet) if p]
+    print(f"{rows} linhas gravadas em {', '.join(outputs)}")
+
+
+if __name__ == "__main__":
+    main()
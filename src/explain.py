@@ -0,0 +1,245 @@
+"""Explicações das predições com TreeSHAP.
+
+As atribuições são calculadas pelo TreeSHAP do `shap` (`TreeExplainer`,
+modo tree_path_dependent): o explicador é montado uma única vez por versão do
+modelo, com a estrutura e a cobertura de cada nó das árvores já extraídas, e
+cada explicação percorre apenas os caminhos das árvores, sem amostragem. Os
+valores estão na escala de probabilidade e, somados ao valor esperado,
+reproduzem `predict_proba`. As colunas one-hot do pré-processamento são
+somadas de volta às features de entrada.
+
+Com o pool de inferência (`INFERENCE_WORKERS` > 0), o explicador do app é um
+`PooledExplainer`: o TreeSHAP roda nos processos do pool, que já têm o modelo,
+e o processo do Streamlit não carrega a floresta.
+
+Predições individuais são explicadas com cache (mesmo cache das
+probabilidades); lotes são divididos em blocos explicados em paralelo por
+`EXPLAIN_WORKERS` processos que montam o explicador uma única vez. No app, o
+mesmo pool atende todos os lotes e sessões enquanto o modelo não muda.
+
+Uso:
+    python -m src.explain Base/Obesity.csv predicoes_explicadas.csv [--workers 4]
+"""
+
+import argparse
+import multiprocessing
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import nullcontext
+
+import numpy as np
+import pandas as pd
+
+from src import telemetry
+from src.compiled_forest import CompiledForest, compile_transformer, split_pipeline
+from src.config import EXPLAIN_WORKERS, MODEL_PATH
+from src.model import cached, feature_key
+
+# Linhas por bloco enviado a cada processo no modo em lote
+EXPLAIN_CHUNK_ROWS = 256
+
+ATTRIBUTION_PREFIX = 'shap_'
+
+
+class ForestExplainer:
+    """TreeSHAP de um pipeline (pré-processamento + RandomForestClassifier) por feature de entrada"""
+
+    def __init__(self, pipeline):
+        import shap
+
+        self.pipeline = pipeline
+        self.transformer, forest = split_pipeline(pipeline)
+        self.classes_ = forest.classes_
+        self.input_columns, numeric, categorical = compile_transformer(self.transformer, forest)
+        num_index, num_out = numeric[0], numeric[1]
+
+        # Coluna de entrada de origem de cada coluna vista pela floresta
+        groups = np.empty(forest.n_features_in_, dtype=np.int64)
+        groups[num_out] = num_index
+        for spec in categorical:
+            groups[spec['offset']:spec['offset'] + len(spec['categories'])] = \
+                self.input_columns.index(spec['column'])
+        membership = np.zeros((len(groups), len(self.input_columns)))
+        membership[np.arange(len(groups)), groups] = 1.0
+
+        # Colunas descartadas pelo pré-processamento (ex.: altura e peso, já resumidos no IMC)
+        # não recebem atribuição
+        used = membership.sum(axis=0) > 0
+        self.features = [c for c, u in zip(self.input_columns, used) if u]
+        self._membership = membership[:, used]
+
+        self._tree = shap.TreeExplainer(forest)
+        self.expected_value = np.asarray(self._tree.expected_value, dtype=np.float64)
+
+    @classmethod
+    def from_model(cls, model, model_path=MODEL_PATH):
+        """Explicador do modelo servido
+
+        Para o pool de processos, um `PooledExplainer`, que calcula as atribuições nos processos
+        do pool. O motor compilado não guarda a cobertura dos nós, então nesse caso o pipeline
+        é lido do .joblib de origem.
+        """
+        from src.inference import PooledModel
+
+        if isinstance(model, PooledModel):
+            return PooledExplainer(model)
+        if isinstance(model, CompiledForest):
+            import joblib
+            model = joblib.load(model.fallback_path or model_path)
+        return cls(model)
+
+    def explain(self, X):
+        """Atribuições de shape (linhas, features usadas, classes), na ordem de `self.features`"""
+        X = X[self.input_columns]
+        Xt = self.transformer.transform(X) if self.transformer is not None else X.to_numpy()
+        values = self._tree.shap_values(np.asarray(Xt, dtype=np.float64), check_additivity=False)
+        return np.einsum('nfk,fg->ngk', np.asarray(values), self._membership)
+
+    def attributions(self, values, class_index):
+        """Atribuições de uma linha (saída de `explain_cached`) para uma classe, indexadas pela feature"""
+        return pd.Series(values[:, class_index], index=self.features)
+
+
+class PooledExplainer:
+    """Explicador cujas atribuições são calculadas nos processos de um `src.inference.PooledModel`"""
+
+    def __init__(self, model):
+        self.model = model
+        self.classes_ = model.classes_
+        self.features = model.explanation_features()
+
+    def explain(self, X):
+        """Atribuições de shape (linhas, features usadas, classes), em blocos paralelos no pool"""
+        return self.model.explain(X)
+
+    attributions = ForestExplainer.attributions
+
+
+def explain_cached(explainer, input_df, version):
+    """Atribuições (features, classes) de uma linha, guardadas junto da predição no mesmo cache"""
+    def compute():
+        with telemetry.span('modelo.shap'):
+            values = explainer.explain(input_df)[0]
+        values.flags.writeable = False
+        return values
+
+    return cached(version, ('shap', feature_key(input_df)), compute)
+
+
+# Explicador de cada processo de trabalho, montado uma única vez pelo initializer
+_worker_explainer = None
+
+
+def _init_worker(pipeline):
+    global _worker_explainer
+    _worker_explainer = ForestExplainer(pipeline)
+
+
+def _explain_chunk(X):
+    return _worker_explainer.explain(X)
+
+
+def _new_pool(explainer, workers):
+    # Iniciados com `spawn`, como em `src.inference`: o processo do Streamlit tem várias threads
+    return ProcessPoolExecutor(
+        workers, mp_context=multiprocessing.get_context('spawn'),
+        initializer=_init_worker, initargs=(explainer.pipeline,)
+    )
+
+
+def explanation_pool(explainer, workers=EXPLAIN_WORKERS):
+    """Processos de explicação de uma execução em lote; sem paralelismo (None) com um único processo
+
+    Também None para o `PooledExplainer`, que já distribui os blocos entre os processos de inferência.
+    """
+    if workers <= 1 or not isinstance(explainer, ForestExplainer):
+        return nullcontext()
+    return _new_pool(explainer, workers)
+
+
+# Pool do app, reaproveitado entre lotes e sessões: (explicador, pool)
+_shared_lock = threading.Lock()
+_shared = None
+
+
+def shared_explanation_pool(explainer, workers=EXPLAIN_WORKERS):
+    """Pool de explicação de longa duração, recriado apenas quando o explicador (o modelo) muda
+
+    Devolve None com um único processo ou para o `PooledExplainer`. O pool anterior termina os
+    blocos em andamento antes de encerrar, de modo que um lote iniciado com o modelo antigo não
+    é interrompido.
+    """
+    global _shared
+    if workers <= 1 or not isinstance(explainer, ForestExplainer):
+        return None
+    with _shared_lock:
+        if _shared is not None and _shared[0] is explainer:
+            return _shared[1]
+        if _shared is not None:
+            _shared[1].shutdown(wait=False)
+        _shared = (explainer, _new_pool(explainer, workers))
+        return _shared[1]
+
+
+def _discard_shared(pool):
+    """Descarta o pool compartilhado quebrado (ex.: processo encerrado por falta de memória)"""
+    global _shared
+    with _shared_lock:
+        if _shared is not None and _shared[1] is pool:
+            _shared = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def explain_batch(explainer, X, pool=None, chunksize=EXPLAIN_CHUNK_ROWS):
+    """Atribuições de muitas linhas, em blocos distribuídos entre os processos de `pool`"""
+    if pool is None or len(X) <= chunksize:
+        return explainer.explain(X)
+    chunks = [X.iloc[start:start + chunksize] for start in range(0, len(X), chunksize)]
+    try:
+        return np.concatenate(list(pool.map(_explain_chunk, chunks)))
+    except BrokenProcessPool:
+        # O próximo lote recebe um pool novo
+        _discard_shared(pool)
+        raise
+
+
+def attribution_columns(explainer, values, class_indices):
+    """Colunas shap_<feature> com as atribuições da classe indicada em cada linha"""
+    selected = values[np.arange(len(values)), :, class_indices]
+    return pd.DataFrame(
+        selected.astype(np.float32),
+        columns=[ATTRIBUTION_PREFIX + c for c in explainer.features]
+    )
+
+
+def main():
+    import joblib
+
+    from src.scoring import score_csv
+
+    parser = argparse.ArgumentParser(description="Predição em lote com explicações TreeSHAP por linha")
+    parser.add_argument("source", help="CSV no formato de Base/Obesity.csv")
+    parser.add_argument("dest", help="CSV de saída com predições e colunas shap_<feature>")
+    parser.add_argument("--model", default=MODEL_PATH, help="Pipeline sklearn (.joblib)")
+    parser.add_argument("--workers", type=int, default=EXPLAIN_WORKERS,
+                        help=f"Processos de explicação (padrão: EXPLAIN_WORKERS, {EXPLAIN_WORKERS})")
+    args = parser.parse_args()
+
+    model = joblib.load(args.model)
+    explainer = ForestExplainer(model)
+    start = time.perf_counter()
+
+    def progress(done):
+        print(f"\r{done:,} linhas", end="", file=sys.stderr, flush=True)
+
+    with open(args.dest, 'w', encoding='utf-8', newline='') as dest:
+        total = score_csv(args.source, model, dest, progress=progress, explainer=explainer, workers=args.workers)
+    elapsed = time.perf_counter() - start
+    print(f"\n{total:,} linhas explicadas em {elapsed:.1f} s ({total / elapsed:,.0f} linhas/s)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
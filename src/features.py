@@ -0,0 +1,167 @@
+"""Transformações de features compartilhadas entre o ETL e a aplicação.
+
+As faixas e tabelas de conversão são compiladas uma única vez na importação do
+módulo e aplicadas a colunas inteiras com `np.digitize`/`np.take`, de modo que a
+codificação usada no treino (Base/Obesity.csv -> obesity_data_clean.csv) e na
+predição seja exatamente a mesma.
+"""
+
+import numpy as np
+import pandas as pd
+
+# Colunas do dataset bruto usadas na construção das features
+RAW_COLUMNS = [
+    'Gender', 'Age', 'Height', 'Weight', 'family_history', 'FAVC', 'FCVC', 'NCP',
+    'CAEC', 'SMOKE', 'CH2O', 'SCC', 'FAF', 'TUE', 'CALC', 'MTRANS'
+]
+RAW_DTYPES = {
+    'Gender': 'category', 'Age': 'float64', 'Height': 'float64', 'Weight': 'float64',
+    'family_history': 'category', 'FAVC': 'category', 'FCVC': 'float64', 'NCP': 'float64',
+    'CAEC': 'category', 'SMOKE': 'category', 'CH2O': 'float64', 'SCC': 'category',
+    'FAF': 'float64', 'TUE': 'float64', 'CALC': 'category', 'MTRANS': 'category'
+}
+
+# Ordem das colunas do dataset processado (entrada do modelo + alvo)
+FEATURE_COLUMNS = [
+    'age', 'height', 'weight', 'gender', 'main_meals_per_day', 'vegetable_consumption_freq',
+    'water_intake', 'frequent_high_caloric_food', 'food_between_meals', 'physical_activity_freq',
+    'technology_use_time', 'smoker', 'calorie_monitoring', 'alcohol_consumption',
+    'family_history_overweight', 'transportation_mode', 'bmi'
+]
+TARGET_COLUMN = 'obesity_level'
+CLEAN_COLUMNS = FEATURE_COLUMNS[:-1] + [TARGET_COLUMN, 'bmi']
+
+# Classes em ordem crescente de gravidade
+OBESITY_LEVELS = [
+    'Insufficient_Weight', 'Normal_Weight', 'Overweight_Level_I', 'Overweight_Level_II',
+    'Obesity_Type_I', 'Obesity_Type_II', 'Obesity_Type_III'
+]
+OBESITY_TYPES = ['Obesity_Type_I', 'Obesity_Type_II', 'Obesity_Type_III']
+
+# Gênero: 0 = Masculino, 1 = Feminino (codificação do dataset de treino)
+GENDER_LABELS = {0: 'Masculino', 1: 'Feminino'}
+
+# Categorias de cada variável, na ordem natural
+CATEGORIES = {
+    'main_meals_per_day': ['one_meal', 'two_meals', 'three_meals', 'four_or_more_meals'],
+    'vegetable_consumption_freq': ['rarely', 'sometimes', 'always'],
+    'water_intake': ['low_consumption', 'adequate_consumption', 'high_consumption'],
+    'food_between_meals': ['no', 'Sometimes', 'Frequently', 'Always'],
+    'physical_activity_freq': ['sedentary', 'low_frequency', 'moderate_frequency', 'high_frequency'],
+    'technology_use_time': ['low_use', 'moderate_use', 'high_use'],
+    'alcohol_consumption': ['no', 'Sometimes', 'Frequently', 'Always'],
+    'transportation_mode': ['Walking', 'Bike', 'Motorbike', 'Public_Transportation', 'Automobile'],
+}
+
+# Limites das faixas na escala do questionário original (NCP 1-4, FCVC/CH2O 1-3, FAF 0-3, TUE 0-2).
+# Cada valor é arredondado para o código mais próximo (empates para cima).
+MEALS_EDGES = np.array([1.5, 2.5, 3.5])
+VEGETABLE_EDGES = np.array([1.5, 2.5])
+WATER_EDGES = np.array([1.5, 2.5])
+ACTIVITY_CODE_EDGES = np.array([0.5, 1.5, 2.5])
+TECHNOLOGY_CODE_EDGES = np.array([0.5, 1.5])
+
+# Limites na escala do formulário: atividade física em dias/semana e telas em horas/dia
+ACTIVITY_DAYS_EDGES = np.array([1.0, 2.0, 3.0])
+TECHNOLOGY_HOURS_EDGES = np.array([2.0, 4.5])
+
+# Rótulos do formulário (pt-BR) -> categorias do dataset
+FREQUENCY_OPTIONS = ['Não', 'Às vezes', 'Frequentemente', 'Sempre']
+TRANSPORT_OPTIONS = ['Caminhando', 'Bicicleta', 'Motocicleta', 'Transporte Público', 'Automóvel']
+GENDER_OPTIONS = ['Masculino', 'Feminino']
+YES_NO_OPTIONS = ['Não', 'Sim']
+
+_LABELS = {name: np.asarray(labels, dtype=object) for name, labels in CATEGORIES.items()}
+_DTYPES = {name: pd.CategoricalDtype(labels) for name, labels in CATEGORIES.items()}
+
+
+def _digitize(values, edges, name):
+    """Converte valores contínuos em categorias a partir de limites pré-compilados"""
+    codes = np.digitize(np.asarray(values, dtype=np.float64), edges)
+    return pd.Categorical.from_codes(np.atleast_1d(codes), dtype=_DTYPES[name])
+
+
+def _lookup(values, options, name, default):
+    """Converte rótulos em categorias por posição (take), usando `default` para valores desconhecidos"""
+    codes = pd.Categorical(np.atleast_1d(np.asarray(values, dtype=object)), categories=options).codes
+    table = np.append(np.arange(len(options)), CATEGORIES[name].index(default))
+    return pd.Categorical.from_codes(np.take(table, codes), dtype=_DTYPES[name])
+
+
+def _flag(values, positive):
+    """Converte respostas sim/não em 0/1"""
+    return (np.atleast_1d(np.asarray(values, dtype=object)) == positive).astype(np.int64)
+
+
+def calculate_bmi(weight, height):
+    """Calcula o IMC"""
+    return np.asarray(weight, dtype=np.float64) / np.asarray(height, dtype=np.float64) ** 2
+
+
+def encode_bmi(weight, height):
+    """IMC como inteiro arredondado para cima, conforme o dataset de treino"""
+    return np.ceil(calculate_bmi(weight, height)).astype(np.int64)
+
+
+def clean_raw(raw):
+    """Converte dados no formato bruto (Base/Obesity.csv) para o formato processado"""
+    height = raw['Height'].to_numpy(dtype=np.float64)
+    weight = raw['Weight'].to_numpy(dtype=np.float64)
+
+    data = {
+        'age': np.trunc(raw['Age'].to_numpy(dtype=np.float64)).astype(np.int64),
+        'height': height,
+        'weight': weight,
+        'gender': _flag(raw['Gender'], 'Female'),
+        'main_meals_per_day': _digitize(raw['NCP'], MEALS_EDGES, 'main_meals_per_day'),
+        'vegetable_consumption_freq': _digitize(raw['FCVC'], VEGETABLE_EDGES, 'vegetable_consumption_freq'),
+        'water_intake': _digitize(raw['CH2O'], WATER_EDGES, 'water_intake'),
+        'frequent_high_caloric_food': _flag(raw['FAVC'], 'yes'),
+        'food_between_meals': _lookup(raw['CAEC'], CATEGORIES['food_between_meals'],
+                                      'food_between_meals', 'Sometimes'),
+        'physical_activity_freq': _digitize(raw['FAF'], ACTIVITY_CODE_EDGES, 'physical_activity_freq'),
+        'technology_use_time': _digitize(raw['TUE'], TECHNOLOGY_CODE_EDGES, 'technology_use_time'),
+        'smoker': _flag(raw['SMOKE'], 'yes'),
+        'calorie_monitoring': _flag(raw['SCC'], 'yes'),
+        'alcohol_consumption': _lookup(raw['CALC'], CATEGORIES['alcohol_consumption'],
+                                       'alcohol_consumption', 'no'),
+        'family_history_overweight': _flag(raw['family_history'], 'yes'),
+        'transportation_mode': _lookup(raw['MTRANS'], CATEGORIES['transportation_mode'],
+                                       'transportation_mode', 'Public_Transportation'),
+    }
+    if 'Obesity' in raw.columns:
+        data[TARGET_COLUMN] = raw['Obesity'].to_numpy()
+    data['bmi'] = encode_bmi(weight, height)
+
+    return pd.DataFrame(data, index=raw.index)
+
+
+def encode_form(gender, age, height, weight, family_history, favc, fcvc, ncp, caec, smoke,
+                ch2o, scc, faf, tue, calc, mtrans):
+    """Converte entradas do formulário (escalares ou arrays) nas features do modelo"""
+    columns = np.broadcast_arrays(
+        *[np.asarray(v, dtype=object) for v in (gender, family_history, favc, caec, smoke, scc, calc, mtrans)],
+        *[np.asarray(v, dtype=np.float64) for v in (age, height, weight, fcvc, ncp, ch2o, faf, tue)]
+    )
+    gender, family_history, favc, caec, smoke, scc, calc, mtrans = columns[:8]
+    age, height, weight, fcvc, ncp, ch2o, faf, tue = (np.atleast_1d(c) for c in columns[8:])
+
+    return pd.DataFrame({
+        'age': np.trunc(age).astype(np.int64),
+        'height': height,
+        'weight': weight,
+        'gender': _flag(gender, 'Feminino'),
+        'main_meals_per_day': _digitize(ncp, MEALS_EDGES, 'main_meals_per_day'),
+        'vegetable_consumption_freq': _digitize(fcvc, VEGETABLE_EDGES, 'vegetable_consumption_freq'),
+        'water_intake': _digitize(ch2o, WATER_EDGES, 'water_intake'),
+        'frequent_high_caloric_food': _flag(favc, 'Sim'),
+        'food_between_meals': _lookup(caec, FREQUENCY_OPTIONS, 'food_between_meals', 'Sometimes'),
+        'physical_activity_freq': _digitize(faf, ACTIVITY_DAYS_EDGES, 'physical_activity_freq'),
+        'technology_use_time': _digitize(tue, TECHNOLOGY_HOURS_EDGES, 'technology_use_time'),
+        'smoker': _flag(smoke, 'Sim'),
+        'calorie_monitoring': _flag(scc, 'Sim'),
+        'alcohol_consumption': _lookup(calc, FREQUENCY_OPTIONS, 'alcohol_consumption', 'no'),
+        'family_history_overweight': _flag(family_history, 'Sim'),
+        'transportation_mode': _lookup(mtrans, TRANSPORT_OPTIONS, 'transportation_mode', 'Public_Transportation'),
+        'bmi': encode_bmi(weight, height)
+    })
@@ -0,0 +1,214 @@
+"""Inferência em um pool de processos, para que sessões não disputem o GIL.
+
+Com `INFERENCE_WORKERS` > 0, o modelo servido às páginas é um `PooledModel`:
+cada processo do pool carrega o artefato uma única vez (no initializer, ao
+iniciar o pool) e `predict_proba` envia as linhas aos processos e aguarda a
+resposta com prazo de `INFERENCE_TIMEOUT` segundos por chamada. Lotes
+grandes são divididos em blocos de `INFERENCE_CHUNK_ROWS` linhas avaliados
+em paralelo. O processo do Streamlit não carrega a floresta: só conhece as
+classes do modelo. As explicações TreeSHAP (`explain`) também são calculadas
+nos processos do pool, que montam o explicador na primeira vez em que ele é
+pedido; a explicação de uma linha tem o mesmo prazo da predição, e as de um
+lote, que levam segundos por bloco, não têm prazo.
+
+Uma predição que estoura o prazo não é interrompida: o bloco em execução
+ocupa seu processo até terminar, e os blocos ainda na fila são cancelados.
+
+Os processos são iniciados com `spawn` (o processo do Streamlit tem várias
+threads, e `fork` copiaria locks em estado indefinido). Um pool quebrado (ex.:
+processo encerrado por falta de memória) é recriado na chamada seguinte.
+
+Uso (vazão por número de processos):
+    python -m src.inference [--workers 1 2 4] [--rows 200000]
+"""
+
+import argparse
+import atexit
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError, wait
+from concurrent.futures.process import BrokenProcessPool
+
+import numpy as np
+
+from src import telemetry
+from src.config import INFERENCE_CHUNK_ROWS, INFERENCE_TIMEOUT, MODEL_INFO_PATH, MODEL_PATH, MMAP_MODEL_PATH
+
+
+class InferenceTimeout(Exception):
+    """A predição não terminou dentro do prazo da chamada"""
+
+
+# Modelo de cada processo do pool, carregado uma única vez pelo initializer, e seu
+# explicador TreeSHAP, montado no primeiro pedido de explicação
+_worker_model = None
+_worker_model_path = None
+_worker_explainer = None
+
+
+def _init_worker(model_path, info_path, mmap_path):
+    global _worker_model, _worker_model_path
+    from src.model import load_model_artifacts
+    _worker_model, _ = load_model_artifacts(model_path, info_path, mmap_path)
+    _worker_model_path = model_path
+
+
+def _classes():
+    return list(_worker_model.classes_)
+
+
+def _predict_proba(X):
+    return _worker_model.predict_proba(X)
+
+
+def _explainer():
+    global _worker_explainer
+    if _worker_explainer is None:
+        from src.explain import ForestExplainer
+        _worker_explainer = ForestExplainer.from_model(_worker_model, _worker_model_path)
+    return _worker_explainer
+
+
+def _explanation_features(_):
+    return list(_explainer().features)
+
+
+def _explain(X):
+    return _explainer().explain(X)
+
+
+class PooledModel:
+    """Modelo servido por processos: mesma interface de predição (`classes_`, `predict_proba`)"""
+
+    def __init__(self, workers, timeout=INFERENCE_TIMEOUT, chunk_rows=INFERENCE_CHUNK_ROWS,
+                 model_path=MODEL_PATH, info_path=MODEL_INFO_PATH, mmap_path=MMAP_MODEL_PATH):
+        self.workers = workers
+        self.timeout = timeout
+        self.chunk_rows = chunk_rows
+        self._initargs = (model_path, info_path, mmap_path)
+        self._lock = threading.Lock()
+        self._pool = None
+        self._closed = False
+        self.calls = 0
+        self.timeouts = 0
+        self.restarts = 0
+        self.classes_ = np.asarray(self._start().submit(_classes).result(), dtype=object)
+        atexit.register(self.shutdown)
+
+    def _start(self):
+        """Pool atual, criado (com todos os processos e modelos carregados) se ainda não existir"""
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Pool de inferência encerrado (o modelo foi substituído)")
+            if self._pool is None:
+                pool = ProcessPoolExecutor(
+                    self.workers, mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_init_worker, initargs=self._initargs
+                )
+                # Uma tarefa por processo: todos sobem e carregam o modelo antes da primeira predição
+                wait([pool.submit(_classes) for _ in range(self.workers)])
+                self._pool = pool
+            return self._pool
+
+    def _restart(self, broken):
+        with self._lock:
+            if self._pool is broken:
+                self._pool = None
+                self.restarts += 1
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def _map(self, func, chunks, timeout):
+        """`func` aplicada a cada bloco nos processos do pool, em paralelo; prazo total `timeout` (ou None)"""
+        with self._lock:
+            self.calls += 1
+        for attempt in range(2):
+            pool = self._start()
+            futures = []
+            deadline = time.monotonic() + timeout if timeout is not None else None
+            try:
+                # `submit` já falha se um processo morreu com o pool ocioso
+                futures = [pool.submit(func, chunk) for chunk in chunks]
+                return [f.result(timeout=max(deadline - time.monotonic(), 0) if deadline else None)
+                        for f in futures]
+            except TimeoutError:
+                for f in futures:
+                    f.cancel()
+                with self._lock:
+                    self.timeouts += 1
+                raise InferenceTimeout(f"Predição não concluída em {timeout:g} s")
+            except BrokenProcessPool:
+                self._restart(pool)
+                if attempt:
+                    raise
+
+    @staticmethod
+    def _chunks(X, rows):
+        return [X.iloc[start:start + rows] for start in range(0, len(X), rows)] if len(X) > rows else [X]
+
+    def predict_proba(self, X):
+        """Probabilidades de `X` calculadas nos processos do pool, em blocos paralelos
+
+        Levanta `InferenceTimeout` se a resposta não chegar em `timeout` segundos.
+        """
+        with telemetry.span('inferência.pool'):
+            results = self._map(_predict_proba, self._chunks(X, self.chunk_rows), self.timeout)
+        return np.concatenate(results) if len(results) > 1 else results[0]
+
+    def explanation_features(self):
+        """Features que recebem atribuição no explicador dos processos do pool"""
+        return self._map(_explanation_features, [None], self.timeout)[0]
+
+    def explain(self, X):
+        """Atribuições TreeSHAP de `X` (mesmo formato de `ForestExplainer.explain`), calculadas no pool"""
+        from src.explain import EXPLAIN_CHUNK_ROWS
+
+        chunks = self._chunks(X, EXPLAIN_CHUNK_ROWS)
+        with telemetry.span('inferência.pool.shap'):
+            results = self._map(_explain, chunks, self.timeout if len(chunks) == 1 else None)
+        return np.concatenate(results) if len(results) > 1 else results[0]
+
+    def stats(self):
+        return {
+            'workers': self.workers,
+            'calls': self.calls,
+            'timeouts': self.timeouts,
+            'restarts': self.restarts,
+        }
+
+    def shutdown(self):
+        with self._lock:
+            self._closed = True
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+def main():
+    import pandas as pd
+
+    from src.config import RAW_DATA_PATH
+    from src.features import FEATURE_COLUMNS, clean_raw
+
+    parser = argparse.ArgumentParser(description="Vazão de predict_proba por número de processos do pool")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--rows", type=int, default=200_000, help="Linhas avaliadas por medição")
+    args = parser.parse_args()
+
+    features = clean_raw(pd.read_csv(RAW_DATA_PATH))[FEATURE_COLUMNS]
+    X = features.iloc[np.arange(args.rows) % len(features)].reset_index(drop=True)
+
+    for workers in args.workers:
+        start = time.perf_counter()
+        model = PooledModel(workers)
+        startup = time.perf_counter() - start
+        model.predict_proba(X.iloc[:1])
+        start = time.perf_counter()
+        model.predict_proba(X)
+        elapsed = time.perf_counter() - start
+        model.shutdown()
+        print(f"{workers} processo(s): {args.rows / elapsed:,.0f} linhas/s (início do pool {startup:.1f} s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Carregamento do modelo treinado e predição individual com cache."""
+
+import json
+
+import numpy as np
+
+from src import telemetry
+from src.cache import LRUCache
+from src.config import (
+    INFERENCE_WORKERS, MMAP_MODEL_PATH, MODEL_INFO_PATH, MODEL_PATH, PREDICTION_CACHE_SIZE, PREDICTION_CACHE_TTL
+)
+from src.features import FEATURE_COLUMNS
+
+# Cache de probabilidades compartilhado por todas as sessões do processo
+prediction_cache = LRUCache(maxsize=PREDICTION_CACHE_SIZE, ttl=PREDICTION_CACHE_TTL)
+
+
+def model_version(model_path=MODEL_PATH):
+    """Identificador do artefato do modelo (muda sempre que o arquivo é substituído)"""
+    stat = model_path.stat()
+    return f"{stat.st_mtime_ns}-{stat.st_size}"
+
+
+def load_model_artifacts(model_path=MODEL_PATH, info_path=MODEL_INFO_PATH, mmap_path=MMAP_MODEL_PATH):
+    """Carrega o modelo treinado e seus metadados
+
+    Se existir o diretório mapeável convertido deste mesmo .joblib (`python -m src.compiled_forest
+    convert`), ele é usado no lugar: a carga não copia os nós da floresta, e todos os processos
+    da máquina compartilham as mesmas páginas de memória. Lotes grandes, em que o sklearn é mais
+    rápido, são avaliados pelo próprio .joblib, carregado só quando chega o primeiro deles.
+    """
+    from src.compiled_forest import CompiledForest, mmap_source_version
+
+    if mmap_source_version(mmap_path) == model_version(model_path):
+        model = CompiledForest.load_mmap(mmap_path, fallback_path=model_path)
+    else:
+        import joblib
+        model = joblib.load(model_path)
+    with open(info_path, 'r', encoding='utf-8') as f:
+        model_info = json.load(f)
+    return model, model_info
+
+
+def load_served_model(workers=INFERENCE_WORKERS, model_path=MODEL_PATH, info_path=MODEL_INFO_PATH):
+    """Modelo servido às páginas e seus metadados
+
+    Com `workers` > 0, o modelo é um `PooledModel`: a floresta é carregada apenas nos
+    processos do pool, e este processo só encaminha as predições.
+    """
+    if not workers:
+        return load_model_artifacts(model_path, info_path)
+
+    from src.inference import PooledModel
+    with open(info_path, 'r', encoding='utf-8') as f:
+        model_info = json.load(f)
+    return PooledModel(workers, model_path=model_path, info_path=info_path), model_info
+
+
+def feature_key(input_df):
+    """Tupla normalizada com as features de uma linha, usada como chave do cache"""
+    row = input_df.iloc[0]
+    return tuple(row[c].item() if hasattr(row[c], 'item') else row[c] for c in FEATURE_COLUMNS)
+
+
+def cached(version, key, compute):
+    """Valor de `compute()` guardado no cache de predições sob (versão, chave)
+
+    A versão do modelo faz parte da chave: entradas de um artefato anterior nunca são
+    reaproveitadas e saem do cache pelo LRU/TTL. Não há limpeza por troca de versão, que
+    sessões ainda na versão anterior fariam alternar, apagando as entradas umas das outras.
+    """
+    return prediction_cache.get_or_compute((version, key), compute)
+
+
+def predict_proba_cached(model, input_df, version):
+    """Probabilidades de uma linha, reaproveitando predições idênticas já calculadas"""
+    def compute():
+        with telemetry.span('modelo.predict_proba'):
+            probabilities = model.predict_proba(input_df)[0]
+        probabilities.flags.writeable = False
+        return probabilities
+
+    return cached(version, feature_key(input_df), compute)
+
+
+def top_class(model, probabilities):
+    """Classe e índice da maior probabilidade, na ordem de `model.classes_`"""
+    index = int(np.argmax(probabilities))
+    return model.classes_[index], index
@@ -0,0 +1,217 @@
+"""Pipeline reprodutível de treinamento: CSV bruto -> CSV processado -> modelo -> métricas.
+
+Cada etapa registra o hash do conteúdo de suas entradas (arquivos, código e
+parâmetros) em `models/.pipeline_cache.json`; se nada mudou e as saídas ainda
+estão íntegras, a etapa é pulada. Ajuste e validação cruzada usam todos os
+núcleos (`n_jobs`).
+
+Uso:
+    python -m src.pipeline              # executa apenas as etapas desatualizadas
+    python -m src.pipeline --force      # refaz todas as etapas
+"""
+
+import argparse
+import hashlib
+import json
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src import etl, features
+from src.config import (
+    CLEAN_DATA_PATH, CLEAN_PARQUET_PATH, MODEL_INFO_PATH, MODEL_PATH, MODELS_DIR, RAW_DATA_PATH
+)
+from src.features import FEATURE_COLUMNS, TARGET_COLUMN
+
+CACHE_PATH = MODELS_DIR / ".pipeline_cache.json"
+
+MODEL_NAME = "Random Forest Classifier"
+
+MODEL_FEATURES = {
+    "numeric": ["age", "bmi"],
+    "binary": [
+        "gender", "smoker", "frequent_high_caloric_food", "calorie_monitoring",
+        "family_history_overweight"
+    ],
+    "categorical": [
+        "main_meals_per_day", "vegetable_consumption_freq", "water_intake", "physical_activity_freq",
+        "technology_use_time", "food_between_meals", "alcohol_consumption", "transportation_mode"
+    ]
+}
+
+HYPERPARAMETERS = {
+    "n_estimators": 300,
+    "max_depth": 15,
+    "min_samples_split": 5,
+    "min_samples_leaf": 2,
+    "class_weight": "balanced",
+    "random_state": 42
+}
+
+TEST_SIZE = 0.3
+CV_FOLDS = 5
+
+
+def file_hash(path):
+    """SHA-256 do conteúdo de um arquivo, lido em blocos"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def inputs_hash(paths=(), params=None):
+    """Hash combinado de arquivos de entrada e parâmetros da etapa"""
+    digest = hashlib.sha256()
+    for path in paths:
+        digest.update(file_hash(path).encode())
+    digest.update(json.dumps(params, sort_keys=True, default=str).encode())
+    return digest.hexdigest()
+
+
+def build_model(n_jobs=-1):
+    """Pipeline de pré-processamento + Random Forest com os hiperparâmetros do projeto"""
+    from sklearn.compose import ColumnTransformer
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import OneHotEncoder, StandardScaler
+
+    preprocessor = ColumnTransformer([
+        ('num', StandardScaler(), MODEL_FEATURES['numeric']),
+        ('bin', 'passthrough', MODEL_FEATURES['binary']),
+        ('cat', OneHotEncoder(handle_unknown='ignore'), MODEL_FEATURES['categorical'])
+    ])
+    return Pipeline([
+        ('preprocessor', preprocessor),
+        ('classifier', RandomForestClassifier(**HYPERPARAMETERS, n_jobs=n_jobs))
+    ])
+
+
+def split_data(clean_path):
+    from sklearn.model_selection import train_test_split
+
+    df = pd.read_csv(clean_path)
+    return train_test_split(
+        df[FEATURE_COLUMNS], df[TARGET_COLUMN],
+        test_size=TEST_SIZE, stratify=df[TARGET_COLUMN], random_state=HYPERPARAMETERS['random_state']
+    )
+
+
+def stage_clean(n_jobs):
+    etl.run(RAW_DATA_PATH, CLEAN_DATA_PATH, CLEAN_PARQUET_PATH)
+
+
+def stage_train(n_jobs):
+    import joblib
+
+    X_train, _, y_train, _ = split_data(CLEAN_DATA_PATH)
+    model = build_model(n_jobs).fit(X_train, y_train)
+    joblib.dump(model, MODEL_PATH)
+
+
+def stage_evaluate(n_jobs):
+    import joblib
+    from sklearn.metrics import accuracy_score, precision_recall_fscore_support, roc_auc_score
+    from sklearn.model_selection import StratifiedKFold, cross_val_score
+
+    X_train, X_test, y_train, y_test = split_data(CLEAN_DATA_PATH)
+    model = joblib.load(MODEL_PATH)
+
+    probabilities = model.predict_proba(X_test)
+    predictions = model.classes_[probabilities.argmax(axis=1)]
+    precision, recall, f1, _ = precision_recall_fscore_support(y_test, predictions, average='weighted')
+
+    # Validação cruzada no conjunto de treino: paraleliza entre folds, com a floresta de cada fold serial
+    folds = StratifiedKFold(CV_FOLDS, shuffle=True, random_state=HYPERPARAMETERS['random_state'])
+    cv_scores = cross_val_score(build_model(n_jobs=1), X_train, y_train, cv=folds, n_jobs=n_jobs)
+
+    model_info = {
+        "model_name": MODEL_NAME,
+        "training_date": datetime.fromtimestamp(MODEL_PATH.stat().st_mtime).strftime("%Y-%m-%d %H:%M:%S"),
+        "metrics": {
+            "accuracy": accuracy_score(y_test, predictions),
+            "precision": precision,
+            "recall": recall,
+            "f1_score": f1,
+            "roc_auc": roc_auc_score(y_test, probabilities, multi_class='ovr', average='weighted'),
+            "cv_accuracy_mean": float(np.mean(cv_scores)),
+            "cv_accuracy_std": float(np.std(cv_scores))
+        },
+        "features": MODEL_FEATURES,
+        "hyperparameters": HYPERPARAMETERS
+    }
+    with open(MODEL_INFO_PATH, 'w', encoding='utf-8') as f:
+        json.dump(model_info, f, indent=4, ensure_ascii=False)
+
+
+def _source(module):
+    return Path(module.__file__)
+
+
+# (nome, função, entradas, saídas, parâmetros)
+STAGES = [
+    ('clean', stage_clean, [RAW_DATA_PATH, _source(etl), _source(features)], [CLEAN_DATA_PATH, CLEAN_PARQUET_PATH], None),
+    ('train', stage_train, [CLEAN_DATA_PATH, Path(__file__)], [MODEL_PATH],
+     {'hyperparameters': HYPERPARAMETERS, 'features': MODEL_FEATURES, 'test_size': TEST_SIZE}),
+    ('evaluate', stage_evaluate, [CLEAN_DATA_PATH, MODEL_PATH, Path(__file__)], [MODEL_INFO_PATH],
+     {'cv_folds': CV_FOLDS}),
+]
+
+
+def _load_cache():
+    if CACHE_PATH.exists():
+        with open(CACHE_PATH, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    return {}
+
+
+def _save_cache(cache):
+    with open(CACHE_PATH, 'w', encoding='utf-8') as f:
+        json.dump(cache, f, indent=2)
+
+
+def run(force=False, n_jobs=-1, log=print):
+    """Executa as etapas em ordem, pulando as que estão em dia; devolve as etapas executadas"""
+    cache = _load_cache()
+    executed = []
+
+    for name, func, inputs, outputs, params in STAGES:
+        key = inputs_hash(inputs, params)
+        entry = cache.get(name, {})
+        up_to_date = (
+            not force
+            and entry.get('inputs') == key
+            and all(p.exists() for p in outputs)
+            and entry.get('outputs') == [file_hash(p) for p in outputs]
+        )
+        if up_to_date:
+            log(f"[{name}] em dia, etapa pulada")
+            continue
+
+        start = time.perf_counter()
+        func(n_jobs)
+        cache[name] = {'inputs': key, 'outputs': [file_hash(p) for p in outputs]}
+        _save_cache(cache)
+        executed.append(name)
+        log(f"[{name}] concluída em {time.perf_counter() - start:.1f}s")
+
+    return executed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Treina o modelo a partir de Base/Obesity.csv")
+    parser.add_argument("--force", action="store_true", help="Refaz todas as etapas, ignorando o cache")
+    parser.add_argument("--n-jobs", type=int, default=-1, help="Processos para ajuste e validação cruzada")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    run(force=args.force, n_jobs=args.n_jobs)
+    print(f"Pipeline concluído em {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
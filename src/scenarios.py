@@ -0,0 +1,128 @@
+"""Motor de cenários de risco sobre bitsets.
+
+Cada predicado atômico (coluna == valor) vira, uma única vez por versão dos
+dados, um bitset com 1 bit por paciente empacotado em palavras uint64. Um
+cenário é uma disjunção (OU) de grupos; cada grupo é uma conjunção (E) de
+condições {coluna: [valores aceitos]}, e os valores de uma mesma coluna
+combinam-se por OU. Tamanho e taxa de obesidade de um cenário saem de
+operações bit a bit e contagens de bits (`np.bitwise_count`), sem varrer o
+DataFrame.
+"""
+
+import numpy as np
+
+from src.cube import BINARY_CATEGORIES, HABIT_COLUMNS, categories_of, category_codes
+from src.features import OBESITY_TYPES
+
+# Colunas disponíveis como predicados
+SCENARIO_COLUMNS = ['family_history_overweight'] + HABIT_COLUMNS
+
+# Cenários exibidos no dashboard: (rótulo, grupos)
+DEFAULT_SCENARIOS = [
+    ('Histórico Familiar +\nSedentarismo', [{
+        'family_history_overweight': [1],
+        'physical_activity_freq': ['sedentary']
+    }]),
+    ('Sem Histórico +\nAtividade Regular', [{
+        'family_history_overweight': [0],
+        'physical_activity_freq': ['moderate_frequency', 'high_frequency']
+    }]),
+    ('Alimentos Calóricos +\nSedentarismo', [{
+        'frequent_high_caloric_food': [1],
+        'physical_activity_freq': ['sedentary']
+    }]),
+    ('Poucos Vegetais +\nPouca Água', [{
+        'vegetable_consumption_freq': ['rarely'],
+        'water_intake': ['low_consumption']
+    }]),
+    ('Múltiplos Fatores\nProtetores', [{
+        'physical_activity_freq': ['moderate_frequency', 'high_frequency'],
+        'vegetable_consumption_freq': ['sometimes', 'always'],
+        'water_intake': ['adequate_consumption', 'high_consumption']
+    }]),
+]
+
+
+def pack(mask):
+    """Empacota um vetor booleano em palavras uint64 (bits após o fim ficam zerados)"""
+    bits = np.packbits(mask, bitorder='little')
+    words = np.zeros(-(-len(bits) // 8) * 8, dtype=np.uint8)
+    words[:len(bits)] = bits
+    return words.view(np.uint64)
+
+
+def popcount(words):
+    return int(np.bitwise_count(words).sum(dtype=np.int64))
+
+
+class BitsetIndex:
+    """Bitsets por predicado, gênero, idade e obesidade de um dataset"""
+
+    def __init__(self, df):
+        self.n_rows = len(df)
+        self.n_words = -(-self.n_rows // 64)
+
+        # Um bitset por (coluna, valor), empilhados em uma matriz (predicados, palavras)
+        self.atoms = {}
+        bits = []
+        for column in SCENARIO_COLUMNS:
+            codes = category_codes(df[column], categories_of(column))
+            for i, value in enumerate(categories_of(column)):
+                self.atoms[(column, value)] = len(bits)
+                bits.append(pack(codes == i))
+
+        gender = df['gender'].to_numpy()
+        age = df['age'].to_numpy()
+        self.age_min = int(age.min()) if len(age) else 0
+        self.ages = np.arange(self.age_min, int(age.max()) + 1 if len(age) else 1)
+        self.gender_bits = np.stack([pack(gender == g) for g in BINARY_CATEGORIES])
+        self.age_bits = np.stack([pack(age == a) for a in self.ages])
+        self.bits = np.stack(bits) if bits else np.zeros((0, self.n_words), dtype=np.uint64)
+        self.obese = pack(df['obesity_level'].isin(OBESITY_TYPES).to_numpy())
+
+    @property
+    def nbytes(self):
+        return sum(a.nbytes for a in (self.bits, self.gender_bits, self.age_bits, self.obese))
+
+    def _union(self, rows):
+        if len(rows) == 0:
+            return np.zeros(self.n_words, dtype=np.uint64)
+        return np.bitwise_or.reduce(rows, axis=0)
+
+    def select(self, genders, age_range):
+        """Bitset das linhas nos gêneros e na faixa etária (inclusiva) escolhidos"""
+        genders = sorted(g for g in genders if g in BINARY_CATEGORIES)
+        start = max(age_range[0] - self.age_min, 0)
+        stop = max(age_range[1] - self.age_min + 1, start)
+        return self._union(self.gender_bits[genders]) & self._union(self.age_bits[start:stop])
+
+    def match(self, clauses, within=None, memo=None):
+        """Bitset das linhas que atendem a algum grupo de `clauses` (lista de {coluna: [valores]})
+
+        `memo` guarda as uniões de valores já calculadas e pode ser compartilhado entre cenários.
+        """
+        memo = {} if memo is None else memo
+        result = np.zeros(self.n_words, dtype=np.uint64)
+        for clause in clauses:
+            words = within.copy() if within is not None else np.full(self.n_words, ~np.uint64(0))
+            for column, values in clause.items():
+                key = (column, frozenset(values))
+                if key not in memo:
+                    memo[key] = self._union(self.bits[[self.atoms[(column, v)] for v in values]])
+                words &= memo[key]
+            result |= words
+        # Bits além do número de linhas nunca contam
+        if within is None and self.n_rows % 64:
+            result[-1] &= np.uint64((1 << (self.n_rows % 64)) - 1)
+        return result
+
+    def evaluate(self, scenarios, within=None):
+        """(tamanho, % de obesidade) de cada cenário, opcionalmente restrito ao bitset `within`"""
+        memo = {}
+        results = []
+        for clauses in scenarios:
+            words = self.match(clauses, within, memo)
+            size = popcount(words)
+            obese = popcount(words & self.obese)
+            results.append((size, obese / size * 100 if size else float('nan')))
+        return results
@@ -0,0 +1,69 @@
+"""Predição em lote a partir de arquivos CSV no formato bruto (Base/Obesity.csv)."""
+
+from contextlib import nullcontext
+
+import numpy as np
+import pandas as pd
+
+from src import telemetry
+from src.config import EXPLAIN_WORKERS
+from src.explain import attribution_columns, explain_batch, explanation_pool
+from src.features import FEATURE_COLUMNS, RAW_COLUMNS, RAW_DTYPES, clean_raw
+
+DEFAULT_CHUNKSIZE = 20_000
+
+
+def score_chunks(source, model, chunksize=DEFAULT_CHUNKSIZE, explainer=None, pool=None):
+    """Lê o CSV em blocos e devolve, para cada bloco, as colunas de entrada com as predições
+
+    Com `explainer` (src.explain.ForestExplainer), cada linha recebe também as colunas
+    shap_<feature> da classe prevista, calculadas nos processos de `pool` se informado.
+    """
+    class_labels = np.asarray(model.classes_)
+    prob_columns = [f'prob_{label}' for label in class_labels]
+
+    reader = pd.read_csv(source, usecols=RAW_COLUMNS, dtype=RAW_DTYPES, chunksize=chunksize)
+    for chunk in reader:
+        missing = chunk[RAW_COLUMNS].isna().any(axis=1)
+        if missing.any():
+            raise ValueError(
+                f"{int(missing.sum())} linha(s) com valores ausentes próximo à linha {int(chunk.index[0]) + 2}"
+            )
+
+        with telemetry.span('lote.features'):
+            features = clean_raw(chunk)[FEATURE_COLUMNS]
+        with telemetry.span('lote.predict_proba'):
+            probabilities = model.predict_proba(features)
+
+        # O bloco já contém apenas as colunas brutas; as predições são anexadas a ele
+        result = chunk
+        result['bmi'] = features['bmi'].to_numpy()
+        result['predicted_class'] = class_labels[probabilities.argmax(axis=1)]
+        result[prob_columns] = probabilities.astype(np.float32)
+        if explainer is not None:
+            with telemetry.span('lote.shap'):
+                values = explain_batch(explainer, features, pool)
+            attributions = attribution_columns(explainer, values, probabilities.argmax(axis=1))
+            result[list(attributions.columns)] = attributions.to_numpy()
+        yield result
+
+
+def score_csv(source, model, dest, chunksize=DEFAULT_CHUNKSIZE, progress=None, explainer=None,
+              workers=EXPLAIN_WORKERS, pool=None):
+    """Pontua um CSV bruto bloco a bloco, gravando o resultado em `dest`; devolve o total de linhas
+
+    Com `explainer`, inclui as explicações TreeSHAP, calculadas nos processos de `pool` ou,
+    sem ele, em um pool de `workers` processos criado só para este arquivo.
+    """
+    total = 0
+    if explainer is None or pool is not None:
+        context = nullcontext(pool)
+    else:
+        context = explanation_pool(explainer, workers)
+    with context as pool:
+        for i, result in enumerate(score_chunks(source, model, chunksize, explainer, pool)):
+            result.to_csv(dest, header=(i == 0), index=False, float_format='%.6g')
+            total += len(result)
+            if progress is not None:
+                progress(total)
+    return total
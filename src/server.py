@@ -0,0 +1,339 @@
+"""Serviço HTTP local de predição com micro-lotes dinâmicos.
+
+Requisições concorrentes são agrupadas por alguns milissegundos e avaliadas em
+uma única chamada `predict_proba`, usando o mesmo modelo e o mesmo mapeamento de
+features da página de Predição.
+
+Uso:
+    python -m src.server [--host 127.0.0.1] [--port 8502] [--max-batch 256] [--max-wait-ms 5]
+
+Endpoints:
+    GET  /health          estado do serviço
+    GET  /stats           lotes avaliados e tamanho médio
+    GET  /drift           última verificação de drift das entradas servidas
+    POST /predict         um paciente (objeto JSON com os campos do formulário)
+    POST /predict/batch   {"patients": [...]} com vários pacientes
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+import numpy as np
+
+from src.drift import monitor as drift_monitor
+from src.features import FREQUENCY_OPTIONS, GENDER_OPTIONS, TRANSPORT_OPTIONS, YES_NO_OPTIONS, encode_form
+from src.model import load_model_artifacts
+
+# Campos do formulário, na ordem de `encode_form`
+INPUT_FIELDS = [
+    'gender', 'age', 'height', 'weight', 'family_history', 'favc', 'fcvc', 'ncp',
+    'caec', 'smoke', 'ch2o', 'scc', 'faf', 'tue', 'calc', 'mtrans'
+]
+NUMERIC_FIELDS = {'age', 'height', 'weight', 'fcvc', 'ncp', 'ch2o', 'faf', 'tue'}
+# Opções aceitas em cada campo categórico (as mesmas do formulário da página de Predição)
+FIELD_OPTIONS = {
+    'gender': GENDER_OPTIONS,
+    'family_history': YES_NO_OPTIONS,
+    'favc': YES_NO_OPTIONS,
+    'caec': FREQUENCY_OPTIONS,
+    'smoke': YES_NO_OPTIONS,
+    'scc': YES_NO_OPTIONS,
+    'calc': FREQUENCY_OPTIONS,
+    'mtrans': TRANSPORT_OPTIONS,
+}
+
+MAX_BODY_BYTES = 16 * 1024 * 1024
+
+STATUS_TEXT = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+               413: 'Payload Too Large', 500: 'Internal Server Error'}
+
+
+class RequestError(Exception):
+    """Erro de validação devolvido ao cliente com o status HTTP correspondente"""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def patients_to_columns(patients):
+    """Valida uma lista de pacientes (dicts) e a converte em colunas prontas para `encode_form`
+
+    Valores inválidos são recusados aqui, antes do agrupamento: uma linha ruim não derruba o lote
+    das outras requisições.
+    """
+    if not patients:
+        raise RequestError("Nenhum paciente informado")
+
+    columns = {}
+    for field in INPUT_FIELDS:
+        try:
+            values = [patient[field] for patient in patients]
+        except (KeyError, TypeError):
+            raise RequestError(f"Campo obrigatório ausente: '{field}'")
+        if field in NUMERIC_FIELDS:
+            try:
+                values = np.asarray(values, dtype=np.float64)
+            except (TypeError, ValueError):
+                raise RequestError(f"Campo '{field}' deve ser numérico")
+            if values.ndim != 1:
+                raise RequestError(f"Campo '{field}' deve ser numérico")
+            if not np.isfinite(values).all():
+                raise RequestError(f"Campo '{field}' deve ser finito")
+        else:
+            options = FIELD_OPTIONS[field]
+            for value in values:
+                if not isinstance(value, str) or value not in options:
+                    raise RequestError(f"Campo '{field}' inválido: {value!r} (opções: {', '.join(options)})")
+            values = np.asarray(values, dtype=object)
+        columns[field] = values
+
+    if (columns['height'] <= 0).any():
+        raise RequestError("Campo 'height' deve ser positivo")
+    return columns
+
+
+class MicroBatcher:
+    """Agrupa requisições concorrentes e avalia cada grupo com um único predict_proba"""
+
+    def __init__(self, model, max_batch=256, max_wait=0.005):
+        self.model = model
+        self.classes = [str(c) for c in model.classes_]
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.batches = 0
+        self.rows = 0
+        self._queue = asyncio.Queue()
+        self._task = None
+        self._getter = None
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._getter is not None:
+            self._getter.cancel()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def submit(self, patients):
+        """Enfileira pacientes e aguarda suas predições"""
+        columns = patients_to_columns(patients)
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((len(patients), columns, future))
+        return await future
+
+    async def _get(self, timeout=None):
+        """Próximo item da fila, ou None se não chegar em `timeout` segundos
+
+        A leitura pendente não é cancelada no prazo (`wait_for` pode descartar um item já retirado
+        da fila): ela fica guardada e é reaproveitada na chamada seguinte.
+        """
+        if self._getter is None:
+            self._getter = asyncio.ensure_future(self._queue.get())
+        done, _ = await asyncio.wait({self._getter}, timeout=timeout)
+        if not done:
+            return None
+        getter, self._getter = self._getter, None
+        return getter.result()
+
+    async def _collect(self):
+        # Bloqueia até a primeira requisição e depois aguarda no máximo `max_wait` por outras
+        items = [await self._get()]
+        rows = items[0][0]
+        deadline = time.monotonic() + self.max_wait
+
+        while rows < self.max_batch:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            item = await self._get(timeout)
+            if item is None:
+                break
+            items.append(item)
+            rows += item[0]
+        return items
+
+    def _score(self, items):
+        features = encode_form(*(np.concatenate([c[field] for _, c, _ in items]) for field in INPUT_FIELDS))
+        probabilities = self.model.predict_proba(features)
+        drift_monitor.observe(features, self.model.classes_[probabilities.argmax(axis=1)])
+        return features['bmi'].to_numpy(), probabilities
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            items = await self._collect()
+            try:
+                # O modelo roda fora do loop de eventos para não bloquear novas conexões
+                bmi, probabilities = await loop.run_in_executor(None, self._score, items)
+            except Exception as e:
+                for _, _, future in items:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            self.batches += 1
+            self.rows += len(bmi)
+            start = 0
+            for n, _, future in items:
+                if not future.done():
+                    future.set_result(self._format(bmi[start:start + n], probabilities[start:start + n]))
+                start += n
+
+    def _format(self, bmi, probabilities):
+        return [
+            {
+                'predicted_class': self.classes[int(row.argmax())],
+                'probabilities': dict(zip(self.classes, row.round(6).tolist())),
+                'bmi': int(b),
+            }
+            for b, row in zip(bmi, probabilities)
+        ]
+
+    def stats(self):
+        return {
+            'batches': self.batches,
+            'rows': self.rows,
+            'mean_batch_size': self.rows / self.batches if self.batches else 0.0,
+            'max_batch': self.max_batch,
+            'max_wait_ms': self.max_wait * 1000,
+        }
+
+
+async def _read_request(reader):
+    """Lê uma requisição HTTP/1.1; devolve (método, caminho, cabeçalhos, corpo) ou None ao fechar"""
+    request_line = await reader.readline()
+    if not request_line:
+        return None
+    try:
+        method, path, _ = request_line.decode('latin-1').split()
+    except ValueError:
+        raise RequestError("Linha de requisição inválida")
+
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+
+    try:
+        length = int(headers.get('content-length', 0) or 0)
+    except ValueError:
+        raise RequestError("Content-Length inválido")
+    if length > MAX_BODY_BYTES:
+        raise RequestError("Corpo da requisição muito grande", status=413)
+    body = await reader.readexactly(length) if length else b''
+    return method, path.split('?', 1)[0], headers, body
+
+
+def _response(status, payload, keep_alive):
+    body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+    head = (
+        f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+        "Content-Type: application/json; charset=utf-8\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+    )
+    return head.encode('latin-1') + body
+
+
+def _json_body(body):
+    try:
+        return json.loads(body or b'null')
+    except json.JSONDecodeError:
+        raise RequestError("JSON inválido")
+
+
+async def _dispatch(batcher, method, path, body):
+    if path == '/health':
+        return 200, {'status': 'ok'}
+    if path == '/stats':
+        return 200, batcher.stats()
+    if path == '/drift':
+        return 200, drift_monitor.history[-1] if drift_monitor.history else {'samples': 0, 'features': []}
+    if path not in ('/predict', '/predict/batch'):
+        raise RequestError(f"Endpoint não encontrado: {path}", status=404)
+    if method != 'POST':
+        raise RequestError("Use POST", status=405)
+
+    payload = _json_body(body)
+    if path == '/predict':
+        if not isinstance(payload, dict):
+            raise RequestError("Envie um objeto JSON com os dados do paciente")
+        return 200, (await batcher.submit([payload]))[0]
+
+    patients = payload.get('patients') if isinstance(payload, dict) else None
+    if not isinstance(patients, list):
+        raise RequestError("Envie {\"patients\": [...]}")
+    return 200, {'predictions': await batcher.submit(patients)}
+
+
+def make_handler(batcher):
+    async def handle(reader, writer):
+        try:
+            while True:
+                keep_alive = False
+                try:
+                    request = await _read_request(reader)
+                    if request is None:
+                        break
+                    method, path, headers, body = request
+                    keep_alive = headers.get('connection', '').lower() != 'close'
+                    status, payload = await _dispatch(batcher, method, path, body)
+                except RequestError as e:
+                    status, payload = e.status, {'error': str(e)}
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                except Exception as e:
+                    status, payload = 500, {'error': f"Erro ao fazer predição: {str(e)}"}
+
+                writer.write(_response(status, payload, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        finally:
+            writer.close()
+
+    return handle
+
+
+async def serve(host, port, max_batch, max_wait):
+    model, _ = load_model_artifacts()
+    batcher = MicroBatcher(model, max_batch=max_batch, max_wait=max_wait)
+    batcher.start()
+    drift_monitor.start()
+
+    server = await asyncio.start_server(make_handler(batcher), host, port)
+    print(f"Servindo predições em http://{host}:{port} (lote máx. {max_batch}, espera máx. {max_wait * 1000:g} ms)")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await batcher.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serviço HTTP de predição com micro-lotes")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8502)
+    parser.add_argument("--max-batch", type=int, default=256, help="Máximo de pacientes por lote")
+    parser.add_argument("--max-wait-ms", type=float, default=5.0, help="Espera máxima para formar um lote")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(serve(args.host, args.port, args.max_batch, args.max_wait_ms / 1000))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,303 @@
+"""Backend SQL embarcado (SQLite) para as consultas do dashboard.
+
+O dataset processado é carregado uma única vez, em blocos, em um banco SQLite
+local (`python -m src.sqlstore`), com as categorias gravadas como códigos
+inteiros e índices em `gender`, `age` e `obesity_level`. Com
+`DASHBOARD_BACKEND=sql`, o dashboard não carrega o dataset: cada estado dos
+filtros vira consultas de agregação (GROUP BY) cujos resultados preenchem um
+cubo só com as células da seleção, lido pelas mesmas funções de
+`src.cube.CubeSlice`; as taxas dos cenários de risco saem de uma única
+consulta com um SUM(CASE ...) por cenário. O processo do Streamlit guarda
+apenas resultados do tamanho das tabelas exibidas, qualquer que seja o
+número de pacientes.
+
+Uso:
+    python -m src.sqlstore [--source data/processed/obesity_data_clean.parquet]
+                           [--db data/processed/obesity_data.sqlite] [--chunksize 100000]
+"""
+
+import argparse
+import sqlite3
+import sys
+import threading
+import time
+from functools import cached_property
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src import telemetry
+from src.config import CLEAN_DATA_PATH, CLEAN_PARQUET_PATH, SQL_DB_PATH
+from src.cube import (
+    BINARY_CATEGORIES, DENSITY_COLUMN, HABIT_COLUMNS, HABIT_INDEX, CubeSlice, categories_of,
+    category_codes
+)
+from src.etl import DEFAULT_CHUNKSIZE
+from src.features import CATEGORIES, OBESITY_LEVELS, OBESITY_TYPES
+from src.scenarios import SCENARIO_COLUMNS
+
+# Colunas gravadas no banco; todas menos idade e IMC são códigos de categoria
+COLUMNS = ['gender', 'age', 'bmi', 'obesity_level'] + SCENARIO_COLUMNS
+CATEGORICAL = {
+    'gender': BINARY_CATEGORIES,
+    'obesity_level': OBESITY_LEVELS,
+    **{column: categories_of(column) for column in SCENARIO_COLUMNS},
+}
+# Índices: um por coluna de filtro/agrupamento e um composto que cobre a consulta dos KPIs
+# (filtro por gênero e idade, agrupamento por gênero, idade e nível, soma do IMC) sem ler a tabela
+INDEXES = {
+    'patients_gender': 'gender',
+    'patients_age': 'age',
+    'patients_obesity_level': 'obesity_level',
+    'patients_gender_age_level': 'gender, age, obesity_level, bmi',
+}
+
+# Colunas devolvidas por `rows` como categorias (as binárias continuam 0/1)
+DECODED = {'obesity_level', *CATEGORIES}
+
+OBESE_CODES = ', '.join(str(OBESITY_LEVELS.index(level)) for level in OBESITY_TYPES)
+
+
+def _source_chunks(source, chunksize):
+    """Blocos do dataset processado (Parquet ou CSV), apenas com as colunas gravadas"""
+    if Path(source).suffix == '.parquet':
+        import pyarrow.parquet as pq
+
+        for batch in pq.ParquetFile(source).iter_batches(batch_size=chunksize, columns=COLUMNS):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(source, usecols=COLUMNS, chunksize=chunksize)
+
+
+def _encode(chunk):
+    """Linhas do bloco como inteiros; descarta as sem gênero ou nível conhecidos (como o cubo)"""
+    columns = {
+        c: category_codes(chunk[c], CATEGORICAL[c]) if c in CATEGORICAL else chunk[c].to_numpy(dtype=np.int64)
+        for c in COLUMNS
+    }
+    valid = (columns['gender'] >= 0) & (columns['obesity_level'] >= 0)
+    return np.column_stack([columns[c][valid] for c in COLUMNS])
+
+
+def build(source=None, db_path=SQL_DB_PATH, chunksize=DEFAULT_CHUNKSIZE, progress=None):
+    """Grava o dataset processado no banco SQLite (substituído ao final); devolve o número de linhas"""
+    if source is None:
+        source = CLEAN_PARQUET_PATH if CLEAN_PARQUET_PATH.exists() else CLEAN_DATA_PATH
+    db_path = Path(db_path)
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = db_path.with_name(db_path.name + '.tmp')
+    tmp_path.unlink(missing_ok=True)
+
+    connection = sqlite3.connect(tmp_path)
+    try:
+        connection.execute("PRAGMA journal_mode=OFF")
+        connection.execute("PRAGMA synchronous=OFF")
+        connection.execute(f"CREATE TABLE patients ({', '.join(f'{c} INTEGER NOT NULL' for c in COLUMNS)})")
+        insert = f"INSERT INTO patients VALUES ({', '.join('?' * len(COLUMNS))})"
+
+        total = 0
+        for chunk in _source_chunks(source, chunksize):
+            rows = _encode(chunk)
+            connection.executemany(insert, rows.tolist())
+            total += len(rows)
+            if progress:
+                progress(total)
+
+        for name, columns in INDEXES.items():
+            connection.execute(f"CREATE INDEX {name} ON patients ({columns})")
+        age_min, age_max, bmi_min, bmi_max = connection.execute(
+            "SELECT MIN(age), MAX(age), MIN(bmi), MAX(bmi) FROM patients"
+        ).fetchone()
+        connection.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value)")
+        connection.executemany("INSERT INTO meta VALUES (?, ?)", [
+            ('n_rows', total), ('source', str(source)),
+            ('age_min', age_min or 0), ('age_max', age_max or 0), ('bmi_min', bmi_min or 0), ('bmi_max', bmi_max or 0),
+        ])
+        connection.commit()
+        connection.execute("ANALYZE")
+    finally:
+        connection.close()
+
+    tmp_path.replace(db_path)
+    return total
+
+
+def sql_version(db_path=SQL_DB_PATH):
+    """Identificador da versão do banco (muda quando ele é regravado)"""
+    stat = Path(db_path).stat()
+    return f"{Path(db_path).name}-{stat.st_mtime_ns}-{stat.st_size}"
+
+
+def _where(genders, age_range):
+    """Cláusula WHERE dos filtros de gênero e faixa etária (inclusiva) e seus parâmetros"""
+    if not genders:
+        return "0", ()
+    return (f"gender IN ({', '.join('?' * len(genders))}) AND age BETWEEN ? AND ?",
+            (*genders, int(age_range[0]), int(age_range[1])))
+
+
+def _condition(clauses):
+    """Expressão SQL de um cenário: OU de grupos, cada grupo um E de `coluna IN (códigos)`"""
+    groups = []
+    for clause in clauses:
+        terms = []
+        for column, values in clause.items():
+            if column not in SCENARIO_COLUMNS:
+                raise ValueError(f"Coluna de cenário desconhecida: {column}")
+            codes = ', '.join(str(categories_of(column).index(v)) for v in values)
+            terms.append(f"{column} IN ({codes})")
+        groups.append(f"({' AND '.join(terms) or '1'})")
+    return ' OR '.join(groups) or '0'
+
+
+class SqlStore:
+    """Consultas de agregação do dashboard sobre o banco SQLite (uma conexão somente leitura por thread)"""
+
+    def __init__(self, db_path=SQL_DB_PATH):
+        self.path = Path(db_path)
+        if not self.path.exists():
+            raise FileNotFoundError(f"Banco {self.path} não encontrado; gere-o com: python -m src.sqlstore")
+        self._local = threading.local()
+        meta = dict(self.query("SELECT key, value FROM meta"))
+        self.n_rows = int(meta['n_rows'])
+        self.age_min = int(meta['age_min'])
+        self.ages = np.arange(self.age_min, int(meta['age_max']) + 1)
+        self.bmi_min = int(meta['bmi_min'])
+        self.bmis = np.arange(self.bmi_min, int(meta['bmi_max']) + 1)
+        self.levels = np.asarray(OBESITY_LEVELS, dtype=object)
+
+    @property
+    def nbytes(self):
+        return self.ages.nbytes + self.bmis.nbytes
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(f"{self.path.as_uri()}?mode=ro", uri=True, check_same_thread=False)
+            self._local.connection = connection
+        return connection
+
+    def query(self, sql, params=()):
+        with telemetry.span('dashboard.sql'):
+            return self._connection().execute(sql, params).fetchall()
+
+    def select(self, genders, age_range):
+        """Agregados da seleção (mesma interface de `CountCube.select`), calculados no banco"""
+        genders = sorted(g for g in genders if g in BINARY_CATEGORIES)
+        start = max(age_range[0] - self.age_min, 0)
+        stop = max(age_range[1] - self.age_min + 1, start)
+        ages = self.ages[start:stop]
+        cube = ResultCube(self, genders, ages)
+        return CubeSlice(cube, genders, ages, (genders, slice(None)))
+
+    def evaluate(self, scenarios, genders, age_range):
+        """(tamanho, % de obesidade) de cada cenário na seleção, em uma única consulta"""
+        if not scenarios:
+            return []
+        genders = sorted(g for g in genders if g in BINARY_CATEGORIES)
+        where, params = _where(genders, age_range)
+        terms = []
+        for clauses in scenarios:
+            condition = _condition(clauses)
+            terms.append(f"SUM(CASE WHEN {condition} THEN 1 ELSE 0 END)")
+            terms.append(f"SUM(CASE WHEN ({condition}) AND obesity_level IN ({OBESE_CODES}) THEN 1 ELSE 0 END)")
+        row = self.query(f"SELECT {', '.join(terms)} FROM patients WHERE {where}", params)[0]
+
+        results = []
+        for size, obese in zip(row[::2], row[1::2]):
+            size, obese = size or 0, obese or 0
+            results.append((size, obese / size * 100 if size else float('nan')))
+        return results
+
+    def rows(self, genders, age_range, columns):
+        """Linhas da seleção só com `columns` (categorias decodificadas) e o `rowid` de cada uma"""
+        genders = sorted(g for g in genders if g in BINARY_CATEGORIES)
+        where, params = _where(genders, age_range)
+        result = self.query(f"SELECT rowid, {', '.join(columns)} FROM patients WHERE {where}", params)
+        values = np.array(result, dtype=np.int64).reshape(-1, len(columns) + 1)
+        frame = {'rowid': values[:, 0]}
+        for i, column in enumerate(columns, 1):
+            if column in DECODED:
+                frame[column] = pd.Categorical.from_codes(values[:, i], categories=CATEGORICAL[column])
+            else:
+                frame[column] = values[:, i]
+        return pd.DataFrame(frame)
+
+
+class ResultCube:
+    """Cubo com apenas as células de uma seleção, preenchido por consultas GROUP BY
+
+    Tem os atributos de `CountCube` lidos por `CubeSlice`; as tabelas de hábitos e da
+    dispersão só são consultadas quando algum gráfico as pede.
+    """
+
+    def __init__(self, store, genders, ages):
+        self.store = store
+        self.levels = store.levels
+        self.ages = ages
+        self.age_min = int(ages[0]) if len(ages) else store.age_min
+        self.bmis = store.bmis
+        self.bmi_min = store.bmi_min
+        self._where = _where(genders, (self.age_min, self.age_min + len(ages) - 1))
+
+        shape = (len(BINARY_CATEGORIES), len(ages), len(self.levels))
+        self.counts = np.zeros(shape, dtype=np.int64)
+        self.bmi_sum = np.zeros(shape, dtype=np.float64)
+        for gender, age, level, count, bmi_sum in self._group("COUNT(*), SUM(bmi)", 'gender, age, obesity_level'):
+            self.counts[gender, age - self.age_min, level] = count
+            self.bmi_sum[gender, age - self.age_min, level] = bmi_sum
+
+    def _group(self, aggregates, keys):
+        where, params = self._where
+        if not len(self.ages):
+            return []
+        return self.store.query(
+            f"SELECT {keys}, {aggregates} FROM patients WHERE {where} GROUP BY {keys}", params
+        )
+
+    @cached_property
+    def habit_counts(self):
+        # Só o gênero é mantido como dimensão: CubeSlice soma idades e gêneros da seleção
+        # Uma única varredura: uma soma condicional por categoria de cada hábito
+        table = np.zeros((len(BINARY_CATEGORIES), 1, len(self.levels), len(HABIT_INDEX)), dtype=np.int64)
+        sums = ', '.join(
+            f"SUM({column} = {code})" for column in HABIT_COLUMNS for code in range(len(categories_of(column)))
+        )
+        for gender, level, *counts in self._group(sums, 'gender, obesity_level'):
+            table[gender, 0, level] = counts
+        return table
+
+    @cached_property
+    def density(self):
+        table = np.zeros(
+            (len(BINARY_CATEGORIES), len(self.ages), len(categories_of(DENSITY_COLUMN)), len(self.bmis)),
+            dtype=np.int64
+        )
+        for gender, age, activity, bmi, count in self._group("COUNT(*)", f'gender, age, {DENSITY_COLUMN}, bmi'):
+            table[gender, age - self.age_min, activity, bmi - self.bmi_min] = count
+        return table
+
+    @property
+    def nbytes(self):
+        return self.counts.nbytes + self.bmi_sum.nbytes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Carrega o dataset processado no banco SQLite do dashboard")
+    parser.add_argument("--source", default=None, help="Parquet ou CSV processado (padrão: o do ETL)")
+    parser.add_argument("--db", default=SQL_DB_PATH, type=Path, help="Banco SQLite de saída")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE, help="Linhas lidas por bloco")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+
+    def progress(done):
+        print(f"\r{done:,} linhas", end="", file=sys.stderr, flush=True)
+
+    rows = build(args.source, args.db, args.chunksize, progress)
+    print(f"\n{rows:,} linhas gravadas em {args.db} em {time.perf_counter() - start:.1f} s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+"""Inicialização rápida do app: recursos compartilhados carregados sob demanda e aquecidos em segundo plano.
+
+O modelo, o dataset e as estruturas derivadas do dashboard ficam em um registro
+do processo (um valor por versão do artefato), compartilhado por todas as
+sessões. `start_warmup()` importa as bibliotecas pesadas e carrega esses
+recursos em uma thread de fundo assim que o app é aberto; uma página que os
+peça antes do fim do aquecimento aguarda a carga em andamento em vez de
+repeti-la. Os tempos de importação e carga são registrados no log
+`src.startup`.
+
+Este módulo só importa a biblioteca padrão (e `src.telemetry` e `src.config`): as
+dependências pesadas são importadas dentro das funções de carga.
+"""
+
+import importlib
+import json
+import logging
+import multiprocessing
+import threading
+import time
+
+from src import telemetry
+from src.config import (
+    CLEAN_DATA_PATH, CLEAN_PARQUET_PATH, DASHBOARD_BACKEND, INFERENCE_WORKERS, MODEL_INFO_PATH, MODEL_PATH,
+    SQL_DB_PATH
+)
+
+logger = logging.getLogger(__name__)
+if not logger.handlers:
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter("%(asctime)s %(name)s %(message)s"))
+    logger.addHandler(_handler)
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+# (etapa, segundos) de cada importação e carga feita neste processo
+timings = []
+
+
+def _timed(step, func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - start
+    timings.append((step, elapsed))
+    telemetry.record(f"startup.{step}", elapsed)
+    logger.info("%s: %.0f ms", step, elapsed * 1000)
+    return result
+
+
+class Resource:
+    """Valor carregado uma vez por versão e compartilhado entre threads e sessões"""
+
+    def __init__(self, name, load, version):
+        self.name = name
+        self._load = load
+        self._version_of = version
+        self._lock = threading.Lock()
+        self._entry = (None, None)      # (versão, valor), trocado de uma só vez
+
+    def version(self):
+        return self._version_of()
+
+    def get(self, version=None):
+        """Valor para `version` (padrão: versão atual); carrega se ainda não estiver em memória"""
+        version = self.version() if version is None else version
+        loaded_version, value = self._entry
+        if loaded_version == version:
+            return value
+        with self._lock:
+            # Outra thread pode ter concluído a carga enquanto esperávamos o lock
+            loaded_version, value = self._entry
+            if loaded_version != version:
+                value = _timed(f"carga de {self.name}", self._load, version)
+                self._entry = (version, value)
+            return value
+
+    @property
+    def loaded(self):
+        return self._entry[0] is not None
+
+
+# Versões dos artefatos pelo stat dos arquivos, só com a biblioteca padrão: as páginas as consultam a
+# cada rerun sem importar numpy/pandas. Mesmos identificadores de src.model.model_version,
+# src.data.data_version e src.sqlstore.sql_version.
+def _model_version():
+    stat = MODEL_PATH.stat()
+    return f"{stat.st_mtime_ns}-{stat.st_size}"
+
+
+def _model_info_version():
+    stat = MODEL_INFO_PATH.stat()
+    return f"{stat.st_mtime_ns}-{stat.st_size}"
+
+
+def _data_version():
+    path = CLEAN_PARQUET_PATH if CLEAN_PARQUET_PATH.exists() else CLEAN_DATA_PATH
+    stat = path.stat()
+    return f"{path.name}-{stat.st_mtime_ns}-{stat.st_size}"
+
+
+def _load_model(version):
+    from src.model import load_served_model
+    _, previous = model._entry
+    served = load_served_model()
+    # Um modelo anterior servido por processos libera o seu pool
+    if previous is not None and hasattr(previous[0], 'shutdown'):
+        previous[0].shutdown()
+    return served
+
+
+def _load_model_info(version):
+    with open(MODEL_INFO_PATH, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _load_explainer(version):
+    from src.explain import ForestExplainer
+    served, _ = model.get(version)
+    return ForestExplainer.from_model(served)
+
+
+def _sql_version():
+    stat = SQL_DB_PATH.stat()
+    return f"{SQL_DB_PATH.name}-{stat.st_mtime_ns}-{stat.st_size}"
+
+
+def _load_sql_store(version):
+    from src.sqlstore import SqlStore
+    return SqlStore()
+
+
+def _load_dataset(version):
+    from src.data import load_clean_data
+    return load_clean_data()
+
+
+def _load_cube(version):
+    from src.cube import CountCube
+    return CountCube(dataset.get(version))
+
+
+def _load_bitsets(version):
+    from src.scenarios import BitsetIndex
+    return BitsetIndex(dataset.get(version))
+
+
+def _load_drift_reference(version):
+    from src.data import load_clean_data
+    from src.drift import REFERENCE_COLUMNS, DriftReference
+    return DriftReference(load_clean_data(REFERENCE_COLUMNS))
+
+
+def _load_jitter(version):
+    from src.data import scatter_jitter
+    return scatter_jitter(len(dataset.get(version)))
+
+
+model = Resource('modelo', _load_model, _model_version)
+explainer = Resource('explicador SHAP', _load_explainer, _model_version)
+# Metadados e métricas do modelo, sem carregar a floresta (Home e Dashboard)
+model_info = Resource('metadados do modelo', _load_model_info, _model_info_version)
+dataset = Resource('dataset', _load_dataset, _data_version)
+cube = Resource('cubo de contagens', _load_cube, _data_version)
+bitsets = Resource('bitsets de cenários', _load_bitsets, _data_version)
+jitter = Resource('jitter da dispersão', _load_jitter, _data_version)
+drift_reference = Resource('referência de drift', _load_drift_reference, _data_version)
+sql_store = Resource('banco SQL do dashboard', _load_sql_store, _sql_version)
+
+# Etapas do aquecimento, em ordem: módulos a importar (str) ou recursos a carregar.
+# Primeiro o que a página de Predição usa, depois o dashboard e, por último, as explicações.
+# Com o backend SQL, o dashboard não carrega o dataset: só o banco é aberto. Com o pool de
+# inferência, o explicador é montado nos processos do pool, e este processo não importa o shap.
+DASHBOARD_RESOURCES = [sql_store] if DASHBOARD_BACKEND == 'sql' else [dataset, cube, bitsets, jitter]
+WARMUP_STEPS = [
+    'numpy', 'pandas', 'joblib', 'sklearn.ensemble', model, drift_reference,
+    'plotly.express', 'plotly.graph_objects', *DASHBOARD_RESOURCES,
+    *([] if INFERENCE_WORKERS else ['shap']), explainer,
+]
+
+_warmup_lock = threading.Lock()
+_warmup_thread = None
+
+
+def _warmup():
+    start = time.perf_counter()
+    for step in WARMUP_STEPS:
+        try:
+            if isinstance(step, str):
+                _timed(f"import {step}", importlib.import_module, step)
+            else:
+                step.get()
+        except Exception as e:
+            # A página correspondente mostrará o erro quando tentar usar o recurso
+            logger.warning("aquecimento de %s falhou: %s", getattr(step, 'name', step), e)
+    logger.info("aquecimento concluído em %.0f ms", (time.perf_counter() - start) * 1000)
+
+
+def start_warmup():
+    """Inicia (uma única vez por processo) o aquecimento em segundo plano; devolve a thread
+
+    Sem efeito nos processos do pool de inferência (`src.inference`): iniciados com
+    `spawn`, eles reimportam o script da página, mas só precisam do modelo.
+    """
+    global _warmup_thread
+    if multiprocessing.current_process().name != 'MainProcess':
+        return None
+    with _warmup_lock:
+        if _warmup_thread is None:
+            _warmup_thread = threading.Thread(target=_warmup, name="warmup", daemon=True)
+            _warmup_thread.start()
+        return _warmup_thread
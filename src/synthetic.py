@@ -0,0 +1,237 @@
+"""Gerador de dados sintéticos que preserva as distribuições de Base/Obesity.csv.
+
+O modelo é aprendido do arquivo bruto:
+
+- variáveis categóricas (incluindo gênero e nível de obesidade): frequências
+  conjuntas de todas as combinações observadas, sorteadas como um único
+  código, o que preserva as associações entre hábitos, gênero e classe;
+- variáveis numéricas: cópula gaussiana por (nível, gênero) — correlação dos
+  escores normais dos postos e quantis empíricos de cada coluna —, o que
+  mantém as marginais (inclusive as respostas inteiras do questionário) e a
+  dependência entre altura, peso e idade; grupos com poucas linhas usam o
+  nível inteiro.
+
+As linhas são geradas em blocos de tamanho fixo; o bloco i usa a semente
+(seed, i), de modo que a saída é a mesma com qualquer número de processos.
+Os blocos são gerados e serializados em paralelo e gravados em ordem em CSV
+ou Parquet, no esquema bruto ou no processado (`src.features.clean_raw`).
+
+Uso:
+    python -m src.synthetic --rows 10000000 --out data/synthetic/obesity_10m.parquet
+    python -m src.synthetic --rows 1000000 --out obesity_1m.csv --schema raw --workers 4 --seed 7
+"""
+
+import argparse
+import io
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from scipy.special import ndtr, ndtri
+
+from src.config import RAW_DATA_PATH
+from src.etl import to_columnar
+from src.features import CLEAN_COLUMNS, RAW_COLUMNS, RAW_DTYPES, clean_raw
+
+DEFAULT_CHUNKSIZE = 500_000
+
+TARGET = 'Obesity'
+CATEGORICAL_COLUMNS = [c for c in RAW_COLUMNS if RAW_DTYPES[c] == 'category'] + [TARGET]
+NUMERIC_COLUMNS = [c for c in RAW_COLUMNS if RAW_DTYPES[c] != 'category']
+
+# Mínimo de linhas para estimar uma cópula própria de (nível, gênero)
+MIN_GROUP_ROWS = 30
+
+# Casas decimais das numéricas geradas
+DECIMALS = 6
+
+
+class SyntheticModel:
+    """Frequências conjuntas das categóricas e cópulas por (nível, gênero) das numéricas"""
+
+    def __init__(self, raw):
+        raw = raw[RAW_COLUMNS + [TARGET]].dropna()
+        if raw.empty:
+            raise ValueError("Dataset bruto sem linhas completas")
+
+        # Cada combinação observada de categóricas vira um código com sua frequência
+        combos = raw.groupby(CATEGORICAL_COLUMNS, observed=True).size()
+        self.labels = {
+            c: np.asarray(sorted(raw[c].astype(str).unique()), dtype=object) for c in CATEGORICAL_COLUMNS
+        }
+        self.combo_codes = np.stack([
+            pd.Index(self.labels[c]).get_indexer(combos.index.get_level_values(c).astype(str))
+            for c in CATEGORICAL_COLUMNS
+        ], axis=1)
+        self.combo_probs = combos.to_numpy(dtype=np.float64) / combos.sum()
+
+        # Grupo numérico de cada combinação: (nível, gênero)
+        level = CATEGORICAL_COLUMNS.index(TARGET)
+        gender = CATEGORICAL_COLUMNS.index('Gender')
+        group_keys = sorted({(int(r[level]), int(r[gender])) for r in self.combo_codes})
+        self.combo_group = np.array(
+            [group_keys.index((int(r[level]), int(r[gender]))) for r in self.combo_codes], dtype=np.int64
+        )
+
+        values = raw[NUMERIC_COLUMNS].to_numpy(dtype=np.float64)
+        level_codes = pd.Index(self.labels[TARGET]).get_indexer(raw[TARGET].astype(str))
+        gender_codes = pd.Index(self.labels['Gender']).get_indexer(raw['Gender'].astype(str))
+
+        # Por grupo: fator de Cholesky da correlação dos escores normais e valores ordenados por coluna
+        self.factors, self.quantiles = [], []
+        for level_code, gender_code in group_keys:
+            rows = values[(level_codes == level_code) & (gender_codes == gender_code)]
+            if len(rows) < MIN_GROUP_ROWS:
+                rows = values[level_codes == level_code]
+            scores = ndtri((pd.DataFrame(rows).rank().to_numpy() - 0.5) / len(rows))
+            # Colunas constantes no grupo (ex.: TUE sempre 0) ficam sem correlação
+            with np.errstate(invalid='ignore', divide='ignore'):
+                correlation = np.nan_to_num(np.corrcoef(scores, rowvar=False))
+            np.fill_diagonal(correlation, 1.0 + 1e-6)
+            self.factors.append(np.linalg.cholesky(correlation))
+            self.quantiles.append(np.sort(rows, axis=0))
+
+    def sample(self, n_rows, rng):
+        """Gera `n_rows` linhas no esquema bruto (colunas de Base/Obesity.csv)"""
+        combo = rng.choice(len(self.combo_probs), size=n_rows, p=self.combo_probs)
+        codes = self.combo_codes[combo]
+        group = self.combo_group[combo]
+
+        noise = rng.standard_normal((n_rows, len(NUMERIC_COLUMNS)))
+        values = np.empty_like(noise)
+        order = np.argsort(group, kind='stable')
+        bounds = np.searchsorted(group[order], np.arange(len(self.factors) + 1))
+        for g, (factor, quantiles) in enumerate(zip(self.factors, self.quantiles)):
+            rows = order[bounds[g]:bounds[g + 1]]
+            # Escores correlacionados -> probabilidades -> quantis empíricos interpolados
+            position = ndtr(noise[rows] @ factor.T) * (len(quantiles) - 1)
+            grid = np.arange(len(quantiles))
+            for i in range(len(NUMERIC_COLUMNS)):
+                values[rows, i] = np.interp(position[:, i], grid, quantiles[:, i])
+        values = np.round(values, DECIMALS)
+
+        data = {c: values[:, i] for i, c in enumerate(NUMERIC_COLUMNS)}
+        for i, c in enumerate(CATEGORICAL_COLUMNS):
+            data[c] = pd.Categorical.from_codes(codes[:, i], categories=self.labels[c])
+        return pd.DataFrame(data)[RAW_COLUMNS + [TARGET]]
+
+
+def generate_chunk(model, n_rows, seed, index, schema='processed'):
+    """Bloco `index` da série de semente `seed`, no esquema 'raw' ou 'processed'"""
+    raw = model.sample(n_rows, np.random.default_rng([seed, index]))
+    if schema == 'raw':
+        return raw
+    clean = clean_raw(raw)
+    return clean[[c for c in CLEAN_COLUMNS if c in clean.columns]]
+
+
+# Modelo de cada processo de trabalho, recebido uma única vez pelo initializer
+_worker_model = None
+
+
+def _init_worker(model):
+    global _worker_model
+    _worker_model = model
+
+
+def _serialize(chunk, fmt, header):
+    """Serializa o bloco no processo que o gerou: bytes de CSV ou tabela Arrow"""
+    if fmt == 'csv':
+        buffer = io.StringIO()
+        chunk.to_csv(buffer, header=header, index=False)
+        return buffer.getvalue().encode('utf-8')
+    import pyarrow as pa
+    return pa.Table.from_pandas(to_columnar(chunk), preserve_index=False)
+
+
+def _worker_chunk(n_rows, seed, index, schema, fmt):
+    return _serialize(generate_chunk(_worker_model, n_rows, seed, index, schema), fmt, header=(index == 0))
+
+
+def output_format(path):
+    suffix = Path(path).suffix.lower()
+    if suffix not in ('.csv', '.parquet'):
+        raise ValueError(f"Formato de saída não suportado: {suffix or path} (use .csv ou .parquet)")
+    return suffix[1:]
+
+
+def generate(out_path, n_rows, schema='processed', seed=42, chunksize=DEFAULT_CHUNKSIZE,
+             workers=None, raw_path=RAW_DATA_PATH, progress=None):
+    """Gera `n_rows` linhas sintéticas em `out_path` (.csv ou .parquet); devolve o total gravado"""
+    if schema not in ('raw', 'processed'):
+        raise ValueError(f"Esquema desconhecido: {schema}")
+    fmt = output_format(out_path)
+    workers = workers or os.cpu_count() or 1
+    model = SyntheticModel(pd.read_csv(raw_path, usecols=RAW_COLUMNS + [TARGET],
+                                       dtype={**RAW_DTYPES, TARGET: 'category'}))
+    sizes = [min(chunksize, n_rows - start) for start in range(0, n_rows, chunksize)]
+
+    Path(out_path).parent.mkdir(parents=True, exist_ok=True)
+    writer = None
+    total = 0
+
+    def write(size, payload):
+        nonlocal writer, total
+        if fmt == 'csv':
+            f.write(payload)
+        else:
+            if writer is None:
+                import pyarrow.parquet as pq
+                writer = pq.ParquetWriter(out_path, payload.schema, compression='zstd')
+            writer.write_table(payload)
+        total += size
+        if progress is not None:
+            progress(total)
+
+    with open(out_path, 'wb') if fmt == 'csv' else nullcontext() as f:
+        try:
+            if workers == 1:
+                for i, size in enumerate(sizes):
+                    write(size, _serialize(generate_chunk(model, size, seed, i, schema), fmt, header=(i == 0)))
+            else:
+                with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(model,)) as pool:
+                    # Janela limitada de blocos pendentes: a memória não cresce com o total de linhas
+                    pending = deque()
+                    for i, size in enumerate(sizes):
+                        pending.append((size, pool.submit(_worker_chunk, size, seed, i, schema, fmt)))
+                        if len(pending) >= 2 * workers:
+                            size, future = pending.popleft()
+                            write(size, future.result())
+                    while pending:
+                        size, future = pending.popleft()
+                        write(size, future.result())
+        finally:
+            if writer is not None:
+                writer.close()
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera dados sintéticos com as distribuições de Base/Obesity.csv")
+    parser.add_argument("--rows", type=int, required=True, help="Número de linhas a gerar")
+    parser.add_argument("--out", type=Path, required=True, help="Arquivo de saída (.csv ou .parquet)")
+    parser.add_argument("--schema", choices=['processed', 'raw'], default='processed',
+                        help="Esquema processado (obesity_data_clean) ou bruto (Base/Obesity.csv)")
+    parser.add_argument("--seed", type=int, default=42, help="Semente (a saída não depende de --workers)")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE, help="Linhas por bloco")
+    parser.add_argument("--workers", type=int, default=None, help="Processos de geração (padrão: nº de CPUs)")
+    parser.add_argument("--raw", default=RAW_DATA_PATH, help="CSV bruto de onde as distribuições são aprendidas")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+
+    def progress(done):
+        print(f"\r{done:,}/{args.rows:,} linhas", end="", flush=True)
+
+    total = generate(args.out, args.rows, args.schema, args.seed, args.chunksize, args.workers, args.raw, progress)
+    elapsed = time.perf_counter() - start
+    print(f"\n{total:,} linhas gravadas em {args.out} em {elapsed:.1f} s ({total / elapsed:,.0f} linhas/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""Instrumentação leve dos caminhos críticos: spans com percentis móveis por etapa.
+
+Cada etapa (carga do modelo, codificação do formulário, `predict_proba`,
+filtros, montagem e serialização de gráficos...) é medida com o gerenciador de
+contexto `span(nome)` ou o decorador `timed(nome)`. As últimas
+`TELEMETRY_WINDOW` durações de cada etapa ficam em memória, compartilhadas por
+todas as sessões do processo, e `snapshot()` resume p50/p95/p99 dessa janela.
+
+Desativada (`TELEMETRY_ENABLED=0` ou `set_enabled(False)`), `span` devolve um
+contexto vazio e `timed` apenas chama a função: o custo é um teste de flag.
+
+Este módulo só importa a biblioteca padrão.
+"""
+
+import functools
+import json
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+
+from src.config import TELEMETRY_ENABLED, TELEMETRY_EXPORT_DIR, TELEMETRY_WINDOW
+
+PERCENTILES = (50, 95, 99)
+
+_enabled = TELEMETRY_ENABLED
+_lock = threading.Lock()
+_stages = {}
+
+
+class _Stage:
+    """Janela móvel de durações (s) e totais acumulados de uma etapa"""
+
+    def __init__(self, window):
+        self.samples = deque(maxlen=window)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+
+def enabled():
+    return _enabled
+
+
+def set_enabled(value):
+    global _enabled
+    _enabled = bool(value)
+
+
+def record(name, seconds):
+    """Registra uma duração (em segundos) para a etapa `name`"""
+    if not _enabled:
+        return
+    with _lock:
+        stage = _stages.get(name)
+        if stage is None:
+            stage = _stages[name] = _Stage(TELEMETRY_WINDOW)
+        stage.samples.append(seconds)
+        stage.count += 1
+        stage.total += seconds
+        stage.max = max(stage.max, seconds)
+
+
+class _Span:
+    __slots__ = ('name', 'start')
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        record(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def span(name):
+    """Contexto que mede o bloco como uma ocorrência da etapa `name`"""
+    return _Span(name) if _enabled else _NULL_SPAN
+
+
+def timed(name=None):
+    """Decorador que mede cada chamada da função (etapa padrão: módulo.função)"""
+    def decorator(func):
+        stage = name or f"{func.__module__}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(stage, time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+def _percentile(ordered, q):
+    """Percentil `q` (0-100) com interpolação linear de uma lista já ordenada"""
+    position = (len(ordered) - 1) * q / 100
+    lower = int(position)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+def samples(name):
+    """Durações (s) da janela atual de uma etapa, da mais antiga para a mais recente"""
+    with _lock:
+        stage = _stages.get(name)
+        return list(stage.samples) if stage is not None else []
+
+
+def snapshot():
+    """Resumo por etapa: contagem, total, média, máximo e percentis da janela (em ms)"""
+    with _lock:
+        stages = {name: (list(s.samples), s.count, s.total, s.max) for name, s in _stages.items()}
+    summary = {}
+    for name, (window, count, total, longest) in sorted(stages.items()):
+        ordered = sorted(window)
+        summary[name] = {
+            'count': count,
+            'window': len(ordered),
+            'total_ms': total * 1000,
+            'mean_ms': total / count * 1000,
+            'max_ms': longest * 1000,
+            **{f'p{q}_ms': _percentile(ordered, q) * 1000 for q in PERCENTILES},
+        }
+    return summary
+
+
+def reset():
+    with _lock:
+        _stages.clear()
+
+
+def export(path=None):
+    """Grava o resumo e as amostras da janela em JSON; devolve o caminho"""
+    path = Path(path) if path else TELEMETRY_EXPORT_DIR / f"telemetry-{datetime.now():%Y%m%d-%H%M%S}.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(export_json())
+    return path
+
+
+def export_json():
+    """Resumo e amostras (ms) de todas as etapas como texto JSON"""
+    summary = snapshot()
+    return json.dumps({
+        'date': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        'summary': summary,
+        'samples_ms': {name: [s * 1000 for s in samples(name)] for name in summary},
+    }, indent=2)
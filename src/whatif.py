@@ -0,0 +1,64 @@
+"""Simulações what-if: uma ou duas entradas do formulário variando sobre uma grade.
+
+Todas as combinações da grade são codificadas de uma vez por `encode_form` (que
+aceita arrays) e avaliadas em uma única chamada a `predict_proba`, em vez de uma
+travessia da floresta por ponto.
+"""
+
+import numpy as np
+
+from src.features import FREQUENCY_OPTIONS, TRANSPORT_OPTIONS, YES_NO_OPTIONS, encode_form
+
+# Entradas do formulário que podem variar: (rótulo, valores da grade)
+SWEEPS = {
+    'faf': ('Atividade física (dias/semana)', np.arange(0.0, 7.5, 0.5)),
+    'tue': ('Tempo de telas (horas/dia)', np.arange(0.0, 12.5, 0.5)),
+    'fcvc': ('Consumo de vegetais (0-3)', np.arange(0.0, 3.5, 0.5)),
+    'ncp': ('Refeições principais (1-4)', np.arange(1.0, 4.5, 0.5)),
+    'ch2o': ('Consumo de água (litros/dia)', np.arange(0.0, 3.5, 0.5)),
+    'weight': ('Peso (kg)', np.arange(40.0, 162.5, 2.5)),
+    'favc': ('Alimentos calóricos', YES_NO_OPTIONS),
+    'caec': ('Comer entre refeições', FREQUENCY_OPTIONS),
+    'calc': ('Consumo de álcool', FREQUENCY_OPTIONS),
+    'scc': ('Monitora calorias', YES_NO_OPTIONS),
+    'mtrans': ('Meio de transporte', TRANSPORT_OPTIONS),
+}
+
+
+def is_numeric(name):
+    return np.issubdtype(np.asarray(SWEEPS[name][1]).dtype, np.number)
+
+
+def sweep_grid(inputs, x, y=None):
+    """Argumentos de `encode_form` com `x` (e `y`) percorrendo a grade
+
+    `inputs` traz os valores atuais de todos os campos do formulário. Devolve os
+    argumentos (arrays com uma linha por ponto, x variando mais rápido) e os valores
+    de x e de y (None se só uma entrada varia).
+    """
+    if y == x:
+        raise ValueError("As duas entradas variadas devem ser diferentes")
+    x_values = SWEEPS[x][1]
+    y_values = SWEEPS[y][1] if y is not None else None
+
+    columns = dict(inputs)
+    if y is None:
+        columns[x] = np.asarray(x_values)
+    else:
+        y_index, x_index = np.indices((len(y_values), len(x_values))).reshape(2, -1)
+        columns[x] = np.asarray(x_values)[x_index]
+        columns[y] = np.asarray(y_values)[y_index]
+    return columns, x_values, y_values
+
+
+def sweep(model, inputs, x, y=None):
+    """Probabilidades em toda a grade, em uma única chamada a `predict_proba`
+
+    Devolve (probabilidades, valores de x, valores de y); as probabilidades têm shape
+    (len(x), classes) ou, com duas entradas, (len(y), len(x), classes).
+    """
+    columns, x_values, y_values = sweep_grid(inputs, x, y)
+    probabilities = model.predict_proba(encode_form(**columns))
+    if y_values is not None:
+        probabilities = probabilities.reshape(len(y_values), len(x_values), -1)
+    return probabilities, x_values, y_values